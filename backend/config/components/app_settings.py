@@ -14,10 +14,16 @@ INSTALLED_APPS = [
 
     'src.application',
     'src.reviews',
-    'src.users'
+    'src.users',
+    'src.telemetry',
+    'src.benchmarks',
+    'src.monitoring'
 ]
 
 MIDDLEWARE = [
+    'src.monitoring.middleware.ServerTimingMiddleware',
+    'src.monitoring.middleware.TracingMiddleware',
+    'src.monitoring.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -47,3 +53,5 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+
+TEST_RUNNER = 'src.tests.TestRunner'
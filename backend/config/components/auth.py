@@ -1,3 +1,4 @@
+import json
 import os
 
 from datetime import timedelta
@@ -47,10 +48,21 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '1/minute'
+        'anon': '1/minute',
+        # корзины токенов src.throttling.TokenBucketThrottle
+        'login': '10/minute',
+        'register': '10/hour',
+        'get_price': '120/minute',
+        'check_payment': '60/minute'
     }
 }
 
+# переопределение лимитов JSON-объектом, например для нагрузочного
+# теста с одного адреса: THROTTLE_RATES='{"login": "100000/minute"}'
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].update(
+    json.loads(os.environ.get('THROTTLE_RATES') or '{}')
+)
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
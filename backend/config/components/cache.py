@@ -0,0 +1,60 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Общий кэш процессов и хостов: лимиты запросов (throttling) DRF
+# и кэш приложения. По умолчанию лежит в том же Redis, что и очереди
+# Celery, отдельную базу можно задать в CACHE_REDIS_URL (redis://.../1).
+#
+# Пространство ключей: {CACHE_KEY_PREFIX}:{CACHE_VERSION}:{ключ}.
+# cache.clear() удаляет только ключи с CACHE_KEY_PREFIX.
+# Если после деплоя формат закэшированных значений изменился,
+# увеличьте CACHE_VERSION: старые ключи перестанут читаться
+# и истекут сами.
+CACHE_REDIS_URL = os.environ.get(
+    'CACHE_REDIS_URL', os.environ.get('REDIS_URL')
+)
+
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'cache')
+
+CACHE_VERSION = int(os.environ.get('CACHE_VERSION', 1))
+
+# соединений в пуле одного процесса, при исчерпании
+# запрос ждет свободное соединение до CACHE_POOL_TIMEOUT секунд
+CACHE_MAX_CONNECTIONS = int(os.environ.get('CACHE_MAX_CONNECTIONS', 50))
+
+CACHE_POOL_TIMEOUT = float(os.environ.get('CACHE_POOL_TIMEOUT', 2))
+
+# таймаут операций с Redis, секунды
+CACHE_SOCKET_TIMEOUT = float(os.environ.get('CACHE_SOCKET_TIMEOUT', 1))
+
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'src.monitoring.cache.InstrumentedRedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'VERSION': CACHE_VERSION,
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'pool_class': 'redis.BlockingConnectionPool',
+                'max_connections': CACHE_MAX_CONNECTIONS,
+                'timeout': CACHE_POOL_TIMEOUT,
+                'socket_timeout': CACHE_SOCKET_TIMEOUT,
+                'socket_connect_timeout': CACHE_SOCKET_TIMEOUT,
+                'health_check_interval': 30,
+            },
+        }
+    }
+else:
+    # без Redis (локальная разработка) кэш живет в памяти процесса
+    CACHES = {
+        'default': {
+            'BACKEND': 'src.monitoring.cache.InstrumentedLocMemCache',
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'VERSION': CACHE_VERSION,
+        }
+    }
@@ -26,5 +26,29 @@ CELERY_BEAT_SCHEDULE = {  # scheduler configuration
     'Get_eth_price_task': {
         'task': 'src.application.tasks.save_new_eth_price_in_db',
         'schedule': crontab(),  # crontab() runs the tasks every minute
+    },
+    'Release_unpaid_contracts_capacity_task': {
+        'task': 'src.application.tasks.release_unpaid_contracts_capacity',
+        'schedule': crontab(minute=0),  # every hour
+    },
+    'Update_contracts_lifecycle_task': {
+        'task': 'src.application.tasks.update_contracts_lifecycle',
+        'schedule': crontab(minute=1),  # every hour
+    },
+    'Allocate_contracts_to_miners_task': {
+        'task': 'src.application.tasks.allocate_contracts_to_miners',
+        'schedule': crontab(),  # crontab() runs the tasks every minute
+    },
+    'Delete_past_capacity_task': {
+        'task': 'src.application.tasks.delete_past_capacity',
+        'schedule': crontab(minute=5, hour=0),  # every day after midnight
+    },
+    'Delete_old_worker_hashrate_task': {
+        'task': 'src.application.tasks.delete_old_worker_hashrate',
+        'schedule': crontab(minute=15, hour=0),  # every day after midnight
+    },
+    'Maintain_telemetry_partitions_task': {
+        'task': 'src.telemetry.tasks.maintain_telemetry_partitions',
+        'schedule': crontab(minute=30),  # every hour
     }
 }
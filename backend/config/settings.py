@@ -28,6 +28,10 @@ include(
     'components/db.py'
 )
 
+include(
+    'components/cache.py'
+)
+
 include(
     'components/celery_settings.py'
 )
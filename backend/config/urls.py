@@ -11,7 +11,9 @@ urlpatterns = [
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('', include('src.users.api.urls')),
     path('', include('src.reviews.api.urls')),
-    path('', include('src.application.api.urls'))
+    path('', include('src.application.api.urls')),
+    path('', include('src.telemetry.api.urls')),
+    path('', include('src.monitoring.api.urls'))
 ]
 
 if settings.DEBUG:
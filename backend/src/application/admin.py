@@ -2,8 +2,13 @@ from django.contrib import admin
 from src.application.models import (
     MaintenanceCost,
     Contract,
-    RentalThCost
+    RentalThCost,
+    FarmHashrate,
+    Miner,
+    MinerAllocation
 )
+from src.application.capacity import release_capacity
+from src.pagination import EstimatedCountPaginator
 
 
 @admin.register(MaintenanceCost)
@@ -24,6 +29,15 @@ class RentalThCostAdmin(admin.ModelAdmin):
     readonly_fields = ['id']
 
 
+@admin.register(FarmHashrate)
+class FarmHashrateAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'hashrate'
+    )
+    readonly_fields = ['id']
+
+
 @admin.register(Contract)
 class ContractAdmin(admin.ModelAdmin):
     list_display = (
@@ -32,6 +46,41 @@ class ContractAdmin(admin.ModelAdmin):
         'hashrate',
         'contract_start',
         'contract_end',
-        'is_paid'
+        'is_paid',
+        'status',
+        'capacity_reserved',
+        'capacity_shortfall'
+    )
+    list_filter = ('status', 'is_paid', 'capacity_shortfall')
+    readonly_fields = ['customer', 'capacity_reserved']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def delete_model(self, request, obj):
+        release_capacity(obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for contract in queryset.filter(capacity_reserved=True):
+            release_capacity(contract)
+        super().delete_queryset(request, queryset)
+
+
+class MinerAllocationInline(admin.TabularInline):
+    model = MinerAllocation
+    fields = ('contract', 'hashrate', 'start', 'end')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(Miner)
+class MinerAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'name',
+        'hashrate',
+        'worker_name',
+        'is_active'
     )
-    readonly_fields = ['customer']
+    inlines = [MinerAllocationInline]
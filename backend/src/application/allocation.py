@@ -0,0 +1,395 @@
+import heapq
+import os
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from dotenv import load_dotenv
+
+from src.application.lifecycle import get_open_contracts
+from src.application.models import Contract, Miner, MinerAllocation
+
+
+load_dotenv()
+
+# через сколько минут повторить подбор для контракта,
+# которому не хватило майнеров
+ALLOCATION_RETRY_MINUTES = int(
+    os.environ.get('ALLOCATION_RETRY_MINUTES', 30)
+)
+
+# сколько контрактов подбирается за один запуск
+ALLOCATION_MAX_PENDING = int(os.environ.get('ALLOCATION_MAX_PENDING', 100))
+
+# допуск на погрешность сложения FloatField
+ALLOCATION_EPSILON = 1e-9
+
+# ключ advisory lock, чтобы распределение не запускалось параллельно
+ALLOCATION_LOCK_KEY = 270_001
+
+BULK_BATCH_SIZE = 5000
+
+
+class AllocationEngine:
+    """
+    Распределение хешрейта контрактов по майнерам.
+
+    Контракт занимает хешрейт майнера на полуинтервале [start, end),
+    при нехватке места на одном майнере хешрейт делится между
+    несколькими. Для первичного распределения используется
+    проход по времени (allocate_all), для новых контрактов —
+    подбор с учетом уже закрепленных распределений (allocate)
+    """
+
+    def __init__(self, miners: dict):
+        # miner_id -> хешрейт майнера
+        self.capacity = dict(miners)
+        # miner_id -> [(start, end, hashrate, contract_id), ...]
+        self.intervals = {miner_id: [] for miner_id in miners}
+        # contract_id -> [(miner_id, hashrate), ...]
+        self.allocations = {}
+        # miner_id -> верхняя оценка пиковой загрузки майнера
+        self._peak = {miner_id: 0.0 for miner_id in miners}
+        # новые распределения, которые еще не сохранены
+        self.created = []
+        # майнеры перебираются по кругу с места последней удачной
+        # постановки, чтобы не проверять заново уже заполненные
+        self._order = list(miners)
+        self._cursor = 0
+
+    def load(self, allocations):
+        """
+        Загружает уже существующие распределения
+        (contract_id, miner_id, hashrate, start, end)
+        """
+        for contract_id, miner_id, hashrate, start, end in allocations:
+            if miner_id not in self.capacity:
+                continue
+            self._pin(contract_id, miner_id, hashrate, start, end, new=False)
+
+    def _pin(self, contract_id, miner_id, hashrate, start, end, new=True):
+        if new:
+            self.created.append(
+                (contract_id, miner_id, hashrate, start, end)
+            )
+        self.intervals[miner_id].append((start, end, hashrate, contract_id))
+        self.allocations.setdefault(contract_id, []).append(
+            (miner_id, hashrate)
+        )
+        self._peak[miner_id] += hashrate
+
+    def peak_load(self, miner_id, start: date, end: date):
+        """
+        Вернет максимальную загрузку майнера на [start, end)
+        """
+        load = 0.0
+        changes = []
+        for a_start, a_end, hashrate, _ in self.intervals[miner_id]:
+            if a_start >= end or a_end <= start:
+                continue
+            if a_start <= start:
+                load += hashrate
+            else:
+                changes.append((a_start, hashrate))
+            if a_end < end:
+                changes.append((a_end, -hashrate))
+        peak = load
+        # освобождение в тот же день учитывается раньше занятия
+        for _, delta in sorted(changes):
+            load += delta
+            peak = max(peak, load)
+        return peak
+
+    def free_hashrate(self, miner_id, start: date, end: date):
+        capacity = self.capacity[miner_id]
+        if capacity - self._peak[miner_id] > ALLOCATION_EPSILON:
+            return capacity - self._peak[miner_id]
+        return capacity - self.peak_load(miner_id, start, end)
+
+    def allocate(self, contract_id, hashrate, start: date, end: date):
+        """
+        Распределяет один контракт с учетом уже закрепленных.
+
+        Контракт ставится целиком на первый майнер, где хватает места
+        на всем периоде, иначе хешрейт набирается с самых свободных
+        майнеров. Вернет нераспределенный остаток
+        """
+        free = []
+        count = len(self._order)
+        for offset in range(count):
+            index = (self._cursor + offset) % count
+            miner_id = self._order[index]
+            available = self.free_hashrate(miner_id, start, end)
+            if available >= hashrate - ALLOCATION_EPSILON:
+                self._pin(contract_id, miner_id, hashrate, start, end)
+                self._cursor = index
+                return 0.0
+            if available > ALLOCATION_EPSILON:
+                free.append((available, miner_id))
+        rest = hashrate
+        for available, miner_id in sorted(free, reverse=True):
+            part = min(rest, available)
+            self._pin(contract_id, miner_id, part, start, end)
+            rest -= part
+            if rest <= ALLOCATION_EPSILON:
+                break
+        return max(rest, 0.0)
+
+    def allocated_hashrate(self, contract_id):
+        return sum(
+            hashrate for _, hashrate in self.allocations.get(contract_id, [])
+        )
+
+    def release(self, contract_id):
+        for miner_id, _ in self.allocations.pop(contract_id, []):
+            intervals = [
+                interval for interval in self.intervals[miner_id]
+                if interval[3] != contract_id
+            ]
+            self.intervals[miner_id] = intervals
+            self._peak[miner_id] = sum(
+                interval[2] for interval in intervals
+            )
+
+    def allocate_all(self, contracts):
+        """
+        Распределяет контракты (contract_id, hashrate, start, end)
+        на пустой парк одним проходом по времени.
+
+        Контракты обрабатываются по дате начала, к этому моменту
+        майнеры завершившихся контрактов уже освобождены, поэтому
+        загрузка майнера не превышает его хешрейт ни в один день.
+        Вернет {contract_id: нераспределенный остаток}
+        """
+        # отсортированный список (свободный хешрейт, miner_id)
+        free = sorted(
+            (capacity, miner_id)
+            for miner_id, capacity in self.capacity.items()
+        )
+        current = dict(self.capacity)
+        ending = []
+        unallocated = {}
+
+        def set_free(miner_id, value):
+            del free[bisect_left(free, (current[miner_id], miner_id))]
+            current[miner_id] = value
+            insort(free, (value, miner_id))
+
+        for contract_id, hashrate, start, end in sorted(
+            contracts, key=lambda contract: contract[2]
+        ):
+            while ending and ending[0][0] <= start:
+                _, _, miner_id, part = heapq.heappop(ending)
+                set_free(miner_id, current[miner_id] + part)
+            rest = hashrate
+            while rest > ALLOCATION_EPSILON and free and \
+                    free[-1][0] > ALLOCATION_EPSILON:
+                index = bisect_left(free, (rest - ALLOCATION_EPSILON,))
+                available, miner_id = free[min(index, len(free) - 1)]
+                part = min(rest, available)
+                set_free(miner_id, available - part)
+                self._pin(contract_id, miner_id, part, start, end)
+                heapq.heappush(ending, (end, contract_id, miner_id, part))
+                rest -= part
+            if rest > ALLOCATION_EPSILON:
+                unallocated[contract_id] = rest
+        return unallocated
+
+
+def get_allocatable_contracts():
+    """
+    Оплаченные контракты, которые еще не завершились
+    """
+    return get_open_contracts().filter(
+        is_paid=True, contract_end__gt=date.today()
+    )
+
+
+def _contract_rows(contracts, field='hashrate'):
+    today = date.today()
+    return [
+        (contract_id, hashrate, max(start, today), end)
+        for contract_id, hashrate, start, end in contracts.values_list(
+            'id', field, 'contract_start', 'contract_end'
+        ).iterator(chunk_size=BULK_BATCH_SIZE)
+    ]
+
+
+def _with_allocated(queryset):
+    return queryset.annotate(
+        allocated=Coalesce(Sum('allocations__hashrate'), Value(0.0))
+    )
+
+
+def _delete_stale():
+    """
+    Удаляет распределения завершившихся и неоплаченных контрактов,
+    снятых с работы майнеров, а также контрактов, у которых
+    поменялся период или уменьшился хешрейт
+    """
+    MinerAllocation.objects.exclude(
+        contract__in=get_allocatable_contracts(),
+        miner__is_active=True
+    ).delete()
+    MinerAllocation.objects.filter(
+        ~Q(end=F('contract__contract_end'))
+        | Q(start__lt=F('contract__contract_start'))
+    ).delete()
+    MinerAllocation.objects.filter(
+        contract__in=_with_allocated(get_allocatable_contracts()).filter(
+            allocated__gt=F('hashrate') + ALLOCATION_EPSILON
+        ).values('id')
+    ).delete()
+
+
+def get_overloaded_miners():
+    """
+    Майнеры, загрузка которых хотя бы в один день больше их хешрейта
+    (например, после уменьшения хешрейта майнера).
+    Загружаются распределения только тех майнеров, у которых
+    сумма распределений больше хешрейта
+    """
+    candidates = dict(
+        _with_allocated(Miner.objects.filter(is_active=True)).filter(
+            allocated__gt=F('hashrate') + ALLOCATION_EPSILON
+        ).values_list('id', 'hashrate')
+    )
+    if not candidates:
+        return []
+    engine = AllocationEngine(miners=candidates)
+    engine.load(
+        MinerAllocation.objects.filter(miner__in=candidates).values_list(
+            'contract_id', 'miner_id', 'hashrate', 'start', 'end'
+        ).iterator(chunk_size=BULK_BATCH_SIZE)
+    )
+    return [
+        miner_id for miner_id, capacity in candidates.items()
+        if engine.peak_load(miner_id, date.min, date.max)
+        > capacity + ALLOCATION_EPSILON
+    ]
+
+
+def _save(engine):
+    MinerAllocation.objects.bulk_create(
+        (
+            MinerAllocation(
+                contract_id=contract_id,
+                miner_id=miner_id,
+                hashrate=hashrate,
+                start=start,
+                end=end
+            )
+            for contract_id, miner_id, hashrate, start, end in engine.created
+        ),
+        batch_size=BULK_BATCH_SIZE
+    )
+
+
+def _set_retry(unallocated, allocated, now):
+    """
+    Откладывает повторный подбор для контрактов unallocated, которым
+    не хватило майнеров, чтобы не перебирать их каждый запуск,
+    и снимает отсрочку с распределенных контрактов allocated
+    """
+    Contract.objects.filter(pk__in=list(unallocated)).update(
+        allocation_retry_at=now + timedelta(minutes=ALLOCATION_RETRY_MINUTES)
+    )
+    Contract.objects.filter(
+        pk__in=list(allocated), allocation_retry_at__isnull=False
+    ).update(allocation_retry_at=None)
+
+
+def _try_lock():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_try_advisory_xact_lock(%s)', [ALLOCATION_LOCK_KEY]
+        )
+        return cursor.fetchone()[0]
+
+
+def sync_miner_allocations(rebuild: bool = False):
+    """
+    Приводит распределение хешрейта в соответствие с контрактами.
+
+    Распределения завершившихся, неоплаченных и измененных контрактов
+    удаляются, уже закрепленные остаются на своих майнерах, новые
+    (и распределенные не полностью) контракты подбираются поверх них,
+    не больше ALLOCATION_MAX_PENDING за запуск. Контракту, которому
+    не хватило майнеров, подбор повторяется через
+    ALLOCATION_RETRY_MINUTES. Если подбирать нечего,
+    распределения в Python не загружаются.
+    С rebuild=True или при перегрузке майнера (уменьшился хешрейт)
+    все распределяется заново.
+    Вернет сводку или None, если распределение уже выполняется
+    """
+    with transaction.atomic():
+        if not _try_lock():
+            return None
+        _delete_stale()
+        rebuild = rebuild or bool(get_overloaded_miners())
+        now = timezone.now()
+        if rebuild:
+            MinerAllocation.objects.all().delete()
+            # после пересборки отсрочка подбора не нужна
+            Contract.objects.filter(
+                allocation_retry_at__isnull=False
+            ).update(allocation_retry_at=None)
+            pending = _contract_rows(get_allocatable_contracts())
+        else:
+            contracts = _with_allocated(get_allocatable_contracts()).filter(
+                Q(allocation_retry_at__isnull=True)
+                | Q(allocation_retry_at__lte=now),
+                allocated__lt=F('hashrate') - ALLOCATION_EPSILON
+            ).annotate(
+                rest=F('hashrate') - F('allocated')
+            ).order_by(
+                F('allocation_retry_at').asc(nulls_first=True),
+                'contract_start'
+            )
+            # первичное распределение на пустой парк идет одним
+            # проходом allocate_all и не ограничивается
+            if MinerAllocation.objects.exists():
+                contracts = contracts[:ALLOCATION_MAX_PENDING]
+            pending = _contract_rows(contracts, field='rest')
+        if not pending:
+            return {'allocated': 0, 'unallocated': {}, 'rebuilt': rebuild}
+        miners = dict(
+            Miner.objects.filter(is_active=True).values_list('id', 'hashrate')
+        )
+        engine = AllocationEngine(miners=miners)
+        # распределения, завершившиеся до начала новых контрактов,
+        # на подбор не влияют
+        engine.load(
+            MinerAllocation.objects.filter(
+                end__gt=min(contract[2] for contract in pending)
+            ).values_list(
+                'contract_id', 'miner_id', 'hashrate', 'start', 'end'
+            ).iterator(chunk_size=BULK_BATCH_SIZE)
+        )
+        if engine.allocations:
+            unallocated = {}
+            for contract_id, hashrate, start, end in sorted(
+                pending, key=lambda contract: contract[2]
+            ):
+                rest = engine.allocate(contract_id, hashrate, start, end)
+                if rest > ALLOCATION_EPSILON:
+                    unallocated[contract_id] = rest
+        else:
+            unallocated = engine.allocate_all(pending)
+        _save(engine=engine)
+        _set_retry(
+            unallocated,
+            [] if rebuild else [
+                contract_id for contract_id, *_ in pending
+                if contract_id not in unallocated
+            ],
+            now
+        )
+    return {
+        'allocated': len(pending) - len(unallocated),
+        'unallocated': unallocated,
+        'rebuilt': rebuild
+    }
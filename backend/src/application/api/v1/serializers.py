@@ -1,7 +1,13 @@
 from datetime import date
+from django.db import transaction
 from rest_framework import serializers, exceptions
 from src.application.models import Contract
 from src.application.api.v1.formulas import calculate_contract_price
+from src.application.capacity import (
+    reserve_capacity,
+    reserve_paid_contract
+)
+from src.application.export import EXPORT_FORMATS
 
 from src.application.db_commands import get_cryptocurrency_price_or_404
 
@@ -76,6 +82,12 @@ class CreateContractSerizalizer(serializers.ModelSerializer):
             )
         return validated_data
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            contract = super().create(validated_data)
+            reserve_capacity(contract)
+        return contract
+
 
 class GetAllContractsSerizalizer(serializers.ModelSerializer):
 
@@ -87,7 +99,8 @@ class GetAllContractsSerizalizer(serializers.ModelSerializer):
             'hashrate',
             'contract_start',
             'contract_end',
-            'is_paid'
+            'is_paid',
+            'status'
         ]
 
 
@@ -109,12 +122,10 @@ class ChangeLastContractPaymentStatusSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         validated_data = super().validate(attrs)
-        customer_id = attrs.get('user_id')
         count = attrs.get('count')
         crypto_type = attrs.get('crypto_type')
-        contract = self.Meta.model.objects.filter(
-            customer_id=customer_id, is_paid=False
-        ).first()
+        # последний неоплаченный контракт пользователя находит представление
+        contract = self.instance
         contract_data = {
             'hashrate': contract.hashrate,
             'contract_start': contract.contract_start,
@@ -127,8 +138,6 @@ class ChangeLastContractPaymentStatusSerializer(serializers.ModelSerializer):
         usdt = current_payment.usdt if crypto_type != 'usdt'\
             else current_payment
         current_payment_usdt = usdt * count
-        print('PAYMENT', current_payment_usdt)
-        print('CONTRACT', contract_price)
         if contract_price != current_payment_usdt:
             raise exceptions.ValidationError(
                 detail={'count': 'Contract and payment amounts do not match.'},
@@ -137,5 +146,32 @@ class ChangeLastContractPaymentStatusSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         instance.is_paid = True
+        instance.status = instance.get_current_status()
         instance.save()
+        # оплата записывается в любом случае, резерв мог быть снят,
+        # пока контракт ждал оплаты, нехватку хешрейта разбирает
+        # администратор
+        reserve_paid_contract(instance)
         return instance
+
+
+class ExportContractsSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=EXPORT_FORMATS, default='ndjson'
+    )
+    status = serializers.ChoiceField(
+        choices=Contract.Status.choices, required=False
+    )
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def get_queryset(self):
+        params = self.validated_data
+        queryset = Contract.objects.all()
+        if params.get('status'):
+            queryset = queryset.filter(status=params.get('status'))
+        if params.get('since'):
+            queryset = queryset.filter(created_at__gte=params.get('since'))
+        if params.get('until'):
+            queryset = queryset.filter(created_at__lt=params.get('until'))
+        return queryset
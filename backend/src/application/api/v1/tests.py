@@ -0,0 +1,781 @@
+import csv
+import json
+import time
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from src.tests import CreateUsersTestCase, explain_without_seqscan
+from src.application import allocation
+from src.application.allocation import (
+    AllocationEngine,
+    sync_miner_allocations
+)
+from src.application.api.v1.serializers import (
+    ChangeLastContractPaymentStatusSerializer
+)
+from src.application.capacity import (
+    release_capacity,
+    reserve_capacity,
+    reserve_unreserved_contracts
+)
+from src.application.lifecycle import (
+    activate_contracts,
+    update_contracts_status
+)
+from src.application.pool import (
+    ShareAggregator,
+    get_delivered_hashrate,
+    stand_in_share_feed
+)
+from src.caching import get_response_cache_key
+from src.pagination import EstimatedCountPaginator
+from src.application.models import (
+    Contract,
+    FarmHashrate,
+    HashrateCapacity,
+    Miner,
+    MinerAllocation,
+    RentalThCost,
+    WorkerHashrate
+)
+
+
+User = get_user_model()
+
+
+class ContractCapacityTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        self.create_token()
+        FarmHashrate.objects.create(hashrate=100)
+        self.contract_start = date.today() + timedelta(days=1)
+        self.contract_end = self.contract_start + timedelta(days=10)
+        return result
+
+    def create_contract(self, user, hashrate):
+        return self.client.post(
+            path=reverse('create_contract'),
+            headers={'Authorization': f'Bearer {user.get("token")}'},
+            data={
+                'hashrate': hashrate,
+                'contract_start': self.contract_start,
+                'contract_end': self.contract_end
+            }
+        )
+
+    def test_create_contracts_within_capacity(self):
+        """
+        Проверяет, что контракты в пределах хешрейта фермы
+        создаются и резервируют хешрейт на каждый день периода
+        """
+        users = list(self.users.values())
+        for user in users[:2]:
+            response = self.create_contract(user=user, hashrate=50)
+            self.assertEqual(response.status_code, 201)
+
+        days = HashrateCapacity.objects.all()
+        self.assertEqual(days.count(), 10)
+        for day in days:
+            self.assertEqual(day.reserved, 100)
+        self.assertEqual(
+            Contract.objects.filter(capacity_reserved=True).count(), 2
+        )
+
+    def test_create_contract_over_capacity(self):
+        """
+        Проверяет, что нельзя продать больше хешрейта,
+        чем есть у фермы
+        """
+        users = list(self.users.values())
+        response = self.create_contract(user=users[0], hashrate=80)
+        self.assertEqual(response.status_code, 201)
+
+        response = self.create_contract(user=users[1], hashrate=30)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('hashrate', response.json().keys())
+        self.assertEqual(Contract.objects.count(), 1)
+        for day in HashrateCapacity.objects.all():
+            self.assertEqual(day.reserved, 80)
+
+    def test_release_capacity(self):
+        """
+        Проверяет, что снятый резерв можно продать снова
+        """
+        users = list(self.users.values())
+        response = self.create_contract(user=users[0], hashrate=100)
+        self.assertEqual(response.status_code, 201)
+
+        release_capacity(Contract.objects.get())
+        for day in HashrateCapacity.objects.all():
+            self.assertEqual(day.reserved, 0)
+
+        response = self.create_contract(user=users[1], hashrate=100)
+        self.assertEqual(response.status_code, 201)
+
+    def test_stale_contract_is_reserved_once(self):
+        """
+        Проверяет, что повторный резерв по устаревшей копии
+        контракта не добавляет его хешрейт еще раз
+        """
+        response = self.create_contract(
+            user=list(self.users.values())[0], hashrate=40
+        )
+        self.assertEqual(response.status_code, 201)
+        stale = Contract.objects.get()
+        stale.capacity_reserved = False
+        reserve_capacity(stale)
+        self.assertTrue(stale.capacity_reserved)
+        self.assertEqual(
+            set(HashrateCapacity.objects.values_list('reserved', flat=True)),
+            {40}
+        )
+
+        release_capacity(stale)
+        release_capacity(Contract.objects.get(pk=stale.pk))
+        self.assertEqual(
+            set(HashrateCapacity.objects.values_list('reserved', flat=True)),
+            {0}
+        )
+
+    def test_no_reservation_without_farm_hashrate(self):
+        """
+        Проверяет, что без общего хешрейта фермы контракт
+        не помечается зарезервированным и зарезервируется,
+        когда хешрейт фермы задан
+        """
+        FarmHashrate.objects.all().delete()
+        response = self.create_contract(
+            user=list(self.users.values())[0], hashrate=40
+        )
+        self.assertEqual(response.status_code, 201)
+        contract = Contract.objects.get()
+        self.assertFalse(contract.capacity_reserved)
+        self.assertFalse(HashrateCapacity.objects.exists())
+
+        FarmHashrate.objects.create(hashrate=100)
+        reserve_capacity(contract)
+        contract.refresh_from_db()
+        self.assertTrue(contract.capacity_reserved)
+        self.assertEqual(
+            set(HashrateCapacity.objects.values_list('reserved', flat=True)),
+            {40}
+        )
+
+    def test_payment_is_recorded_without_capacity(self):
+        """
+        Проверяет, что оплата контракта записывается, даже если
+        хешрейта на него уже не хватает, а контракт помечается
+        для администратора
+        """
+        users = list(self.users.values())
+        response = self.create_contract(user=users[0], hashrate=100)
+        self.assertEqual(response.status_code, 201)
+        contract = Contract.objects.create(
+            customer=User.objects.get(username=users[1]['username']),
+            hashrate=30,
+            contract_start=self.contract_start,
+            contract_end=self.contract_end
+        )
+
+        with self.assertLogs('src.application.capacity', 'ERROR'):
+            ChangeLastContractPaymentStatusSerializer().update(contract, {})
+        contract.refresh_from_db()
+        self.assertTrue(contract.is_paid)
+        self.assertFalse(contract.capacity_reserved)
+        self.assertTrue(contract.capacity_shortfall)
+        self.assertEqual(
+            set(HashrateCapacity.objects.values_list('reserved', flat=True)),
+            {100}
+        )
+
+    def test_reserve_unreserved_contracts(self):
+        """
+        Проверяет, что оплаченные контракты, созданные без хешрейта
+        фермы, резервируются, а при нехватке хешрейта помечаются
+        и больше не повторяются
+        """
+        FarmHashrate.objects.all().delete()
+        customer = User.objects.first()
+        for hashrate in (60, 60):
+            Contract.objects.create(
+                customer=customer,
+                hashrate=hashrate,
+                contract_start=self.contract_start,
+                contract_end=self.contract_end,
+                is_paid=True
+            )
+        self.assertEqual(reserve_unreserved_contracts(), 0)
+        self.assertFalse(HashrateCapacity.objects.exists())
+
+        FarmHashrate.objects.create(hashrate=100)
+        with self.assertLogs('src.application.capacity', 'ERROR'):
+            self.assertEqual(reserve_unreserved_contracts(), 1)
+        self.assertEqual(
+            Contract.objects.filter(capacity_reserved=True).count(), 1
+        )
+        self.assertEqual(
+            Contract.objects.filter(capacity_shortfall=True).count(), 1
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(reserve_unreserved_contracts(), 0)
+
+
+class AllocationEngineTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.today = date.today()
+
+    def days(self, start, end):
+        return self.today + timedelta(days=start), \
+            self.today + timedelta(days=end)
+
+    def assertWithinCapacity(self, engine, horizon=60):
+        for miner_id, capacity in engine.capacity.items():
+            for day in range(horizon):
+                current = self.today + timedelta(days=day)
+                load = sum(
+                    hashrate
+                    for start, end, hashrate, _ in engine.intervals[miner_id]
+                    if start <= current < end
+                )
+                self.assertLessEqual(load, capacity + 1e-9)
+
+    def test_allocate_all_reuses_miners_after_contract_end(self):
+        """
+        Проверяет, что майнер освобождается к концу контракта
+        и может быть отдан следующему
+        """
+        engine = AllocationEngine(miners={1: 100})
+        unallocated = engine.allocate_all([
+            (1, 100, *self.days(0, 10)),
+            (2, 100, *self.days(10, 20)),
+            (3, 100, *self.days(5, 15)),
+        ])
+        self.assertEqual(unallocated, {3: 100})
+        self.assertEqual(engine.allocations[1], [(1, 100)])
+        self.assertEqual(engine.allocations[2], [(1, 100)])
+        self.assertWithinCapacity(engine)
+
+    def test_allocate_all_splits_large_contract(self):
+        """
+        Проверяет, что контракт больше майнера делится между майнерами
+        """
+        engine = AllocationEngine(miners={1: 100, 2: 100, 3: 100})
+        unallocated = engine.allocate_all([(1, 250, *self.days(0, 30))])
+        self.assertEqual(unallocated, {})
+        self.assertEqual(engine.allocated_hashrate(1), 250)
+        self.assertEqual(len(engine.allocations[1]), 3)
+
+    def test_allocate_respects_future_allocations(self):
+        """
+        Проверяет, что новый контракт не занимает майнер,
+        закрепленный за контрактом, который начнется позже
+        """
+        engine = AllocationEngine(miners={1: 100, 2: 100})
+        engine.load([(1, 1, 100, *self.days(20, 40))])
+        rest = engine.allocate(2, 60, *self.days(0, 30))
+        self.assertEqual(rest, 0)
+        self.assertEqual(engine.allocations[2], [(2, 60)])
+
+        rest = engine.allocate(3, 100, *self.days(0, 10))
+        self.assertEqual(rest, 0)
+        self.assertEqual(engine.allocations[3], [(1, 100)])
+        self.assertWithinCapacity(engine)
+
+    def test_release(self):
+        """
+        Проверяет, что снятый контракт освобождает майнер
+        """
+        engine = AllocationEngine(miners={1: 100})
+        engine.allocate(1, 100, *self.days(0, 30))
+        self.assertEqual(engine.allocate(2, 50, *self.days(0, 30)), 50)
+        engine.release(1)
+        engine.release(2)
+        self.assertEqual(engine.allocate(3, 100, *self.days(0, 30)), 0)
+
+
+class MinerAllocationTestCase(CreateUsersTestCase):
+
+    def create_contract(self, hashrate, start, end, is_paid=True):
+        return Contract.objects.create(
+            customer=User.objects.first(),
+            hashrate=hashrate,
+            contract_start=date.today() + timedelta(days=start),
+            contract_end=date.today() + timedelta(days=end),
+            is_paid=is_paid
+        )
+
+    def test_sync_miner_allocations(self):
+        """
+        Проверяет, что оплаченные контракты распределяются по майнерам,
+        а уже закрепленные не перераспределяются
+        """
+        for index in range(3):
+            Miner.objects.create(name=f'miner_{index}', hashrate=100)
+        first = self.create_contract(hashrate=150, start=0, end=30)
+        self.create_contract(hashrate=50, start=0, end=30, is_paid=False)
+
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('allocated'), 1)
+        allocations = list(
+            MinerAllocation.objects.values_list('id', flat=True)
+        )
+        self.assertEqual(
+            sum(first.allocations.values_list('hashrate', flat=True)), 150
+        )
+
+        second = self.create_contract(hashrate=150, start=0, end=30)
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('allocated'), 1)
+        self.assertEqual(summary.get('unallocated'), {})
+        self.assertEqual(
+            MinerAllocation.objects.filter(id__in=allocations).count(),
+            len(allocations)
+        )
+        self.assertEqual(
+            sum(second.allocations.values_list('hashrate', flat=True)), 150
+        )
+
+        first.delete()
+        third = self.create_contract(hashrate=150, start=0, end=30)
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('unallocated'), {})
+        self.assertEqual(
+            sum(third.allocations.values_list('hashrate', flat=True)), 150
+        )
+
+    def test_sync_without_changes_loads_nothing(self):
+        """
+        Проверяет, что без новых контрактов и изменений майнеров
+        распределения не загружаются и не пересоздаются
+        """
+        Miner.objects.create(name='miner', hashrate=100)
+        self.create_contract(hashrate=100, start=0, end=30)
+        sync_miner_allocations()
+        allocations = set(MinerAllocation.objects.values_list('id', flat=True))
+
+        with self.assertNumQueries(9):
+            summary = sync_miner_allocations()
+        self.assertEqual(
+            summary, {'allocated': 0, 'unallocated': {}, 'rebuilt': False}
+        )
+        self.assertEqual(
+            set(MinerAllocation.objects.values_list('id', flat=True)),
+            allocations
+        )
+
+    def test_unallocated_contract_is_retried_later(self):
+        """
+        Проверяет, что контракт, которому не хватило майнеров,
+        не подбирается повторно до истечения отсрочки
+        """
+        Miner.objects.create(name='miner', hashrate=100)
+        self.create_contract(hashrate=100, start=0, end=30)
+        sync_miner_allocations()
+        waiting = self.create_contract(hashrate=50, start=0, end=30)
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('unallocated'), {waiting.pk: 50})
+        waiting.refresh_from_db()
+        self.assertIsNotNone(waiting.allocation_retry_at)
+
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('unallocated'), {})
+
+        Miner.objects.create(name='miner_1', hashrate=100)
+        Contract.objects.filter(pk=waiting.pk).update(
+            allocation_retry_at=timezone.now()
+        )
+        summary = sync_miner_allocations()
+        self.assertEqual(summary.get('allocated'), 1)
+        waiting.refresh_from_db()
+        self.assertIsNone(waiting.allocation_retry_at)
+        self.assertEqual(
+            sum(waiting.allocations.values_list('hashrate', flat=True)), 50
+        )
+
+    def test_pending_contracts_are_limited(self):
+        """
+        Проверяет, что за запуск подбирается не больше
+        ALLOCATION_MAX_PENDING контрактов
+        """
+        self.addCleanup(
+            setattr, allocation, 'ALLOCATION_MAX_PENDING',
+            allocation.ALLOCATION_MAX_PENDING
+        )
+        allocation.ALLOCATION_MAX_PENDING = 1
+        Miner.objects.create(name='miner', hashrate=100)
+        self.create_contract(hashrate=10, start=0, end=30)
+        sync_miner_allocations()
+        for _ in range(2):
+            self.create_contract(hashrate=10, start=0, end=30)
+
+        self.assertEqual(sync_miner_allocations().get('allocated'), 1)
+        self.assertEqual(sync_miner_allocations().get('allocated'), 1)
+        self.assertEqual(sync_miner_allocations().get('allocated'), 0)
+
+    def test_miner_hashrate_drop_rebalances(self):
+        """
+        Проверяет, что после уменьшения хешрейта майнера распределение
+        пересобирается и майнер не загружен больше своего хешрейта
+        """
+        first = Miner.objects.create(name='miner_0', hashrate=150)
+        contract = self.create_contract(hashrate=100, start=0, end=30)
+        self.create_contract(hashrate=50, start=0, end=30)
+        sync_miner_allocations()
+        self.assertEqual(
+            sum(first.allocations.values_list('hashrate', flat=True)), 150
+        )
+
+        Miner.objects.create(name='miner_1', hashrate=100)
+        Miner.objects.filter(pk=first.pk).update(hashrate=60)
+        summary = sync_miner_allocations()
+        self.assertTrue(summary.get('rebuilt'))
+        self.assertLessEqual(
+            sum(first.allocations.values_list('hashrate', flat=True)), 60
+        )
+        self.assertEqual(summary.get('unallocated'), {})
+        self.assertEqual(
+            sum(contract.allocations.values_list('hashrate', flat=True)), 100
+        )
+
+    def test_contract_hashrate_change_reallocates(self):
+        """
+        Проверяет, что контракт с измененным хешрейтом
+        распределяется заново
+        """
+        Miner.objects.create(name='miner', hashrate=100)
+        contract = self.create_contract(hashrate=80, start=0, end=30)
+        sync_miner_allocations()
+        Contract.objects.filter(pk=contract.pk).update(hashrate=40)
+        summary = sync_miner_allocations()
+        self.assertFalse(summary.get('rebuilt'))
+        self.assertEqual(summary.get('allocated'), 1)
+        self.assertEqual(
+            sum(contract.allocations.values_list('hashrate', flat=True)), 40
+        )
+
+
+class DeliveredHashrateTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        self.miner = Miner.objects.create(
+            name='miner', hashrate=100, worker_name='account.miner'
+        )
+        self.contract = Contract.objects.create(
+            customer=User.objects.first(),
+            hashrate=40,
+            contract_start=date.today(),
+            contract_end=date.today() + timedelta(days=30),
+            is_paid=True
+        )
+        return result
+
+    def test_aggregate_shares_by_minute(self):
+        """
+        Проверяет, что шары складываются в одну строку
+        на воркер в минуту, в том числе между пачками
+        """
+        aggregator = ShareAggregator(flush_size=3)
+        shares = [
+            {'worker': 'account.miner', 'difficulty': 2, 'ts': 120 + i}
+            for i in range(10)
+        ]
+        aggregator.add_many(shares)
+        aggregator.flush()
+        self.assertEqual(aggregator.total, 10)
+        stats = WorkerHashrate.objects.get()
+        self.assertEqual(stats.shares, 10)
+        self.assertEqual(stats.difficulty, 20)
+
+    def test_delivered_hashrate(self):
+        """
+        Проверяет, что фактический хешрейт контракта считается
+        по доле майнера, закрепленной за контрактом
+        """
+        self.assertIsNone(get_delivered_hashrate(contract=self.contract))
+        sync_miner_allocations()
+        self.assertIsNone(get_delivered_hashrate(contract=self.contract))
+
+        aggregator = ShareAggregator()
+        aggregator.add_many(stand_in_share_feed(
+            rate=50,
+            duration=3600,
+            workers={'account.miner': 50}
+        ))
+        aggregator.flush()
+        delivered = get_delivered_hashrate(contract=self.contract)
+        self.assertAlmostEqual(delivered, 20, delta=1)
+
+    def test_miner_without_hashrate(self):
+        """
+        Проверяет, что майнер с нулевым хешрейтом, на котором
+        остались закрепления, не ломает подсчет
+        """
+        sync_miner_allocations()
+        aggregator = ShareAggregator()
+        aggregator.add_many(stand_in_share_feed(
+            rate=50, duration=600, workers={'account.miner': 50}
+        ))
+        aggregator.flush()
+        Miner.objects.update(hashrate=0)
+        self.assertEqual(get_delivered_hashrate(contract=self.contract), 0)
+
+
+class ContractLifecycleTestCase(CreateUsersTestCase):
+
+    def create_contract(self, start, end, is_paid=True):
+        return Contract.objects.create(
+            customer=User.objects.first(),
+            hashrate=10,
+            contract_start=date.today() + timedelta(days=start),
+            contract_end=date.today() + timedelta(days=end),
+            is_paid=is_paid
+        )
+
+    def test_update_contracts_status(self):
+        """
+        Проверяет перевод контрактов по статусам
+        """
+        started = self.create_contract(start=-5, end=5)
+        unpaid = self.create_contract(start=-5, end=5, is_paid=False)
+        future = self.create_contract(start=5, end=10)
+        finished = self.create_contract(start=-10, end=0)
+
+        summary = update_contracts_status()
+        self.assertEqual(summary, {'expired': 1, 'activated': 1})
+        statuses = dict(Contract.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[started.id], Contract.Status.ACTIVE)
+        self.assertEqual(statuses[unpaid.id], Contract.Status.PENDING)
+        self.assertEqual(statuses[future.id], Contract.Status.PENDING)
+        self.assertEqual(statuses[finished.id], Contract.Status.EXPIRED)
+
+        summary = update_contracts_status(
+            today=date.today() + timedelta(days=7)
+        )
+        self.assertEqual(summary, {'expired': 2, 'activated': 1})
+
+    def test_activate_contracts_in_chunks(self):
+        """
+        Проверяет, что контракты переводятся пачками
+        до последней неполной пачки
+        """
+        for _ in range(7):
+            self.create_contract(start=0, end=5)
+        self.assertEqual(activate_contracts(chunk_size=3), 7)
+        self.assertEqual(
+            Contract.objects.filter(status=Contract.Status.ACTIVE).count(), 7
+        )
+
+
+class ExportContractsTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        User.objects.update(is_staff=True)
+        self.create_token()
+        self.auth_data = {
+            'Authorization': f'Bearer {self.users["user_1"]["token"]}'
+        }
+        for index, user in enumerate(User.objects.all()):
+            Contract.objects.create(
+                customer=user,
+                hashrate=10,
+                contract_start=date.today() - timedelta(days=index),
+                contract_end=date.today() + timedelta(days=10),
+                is_paid=True
+            )
+        return result
+
+    def export(self, **params):
+        response = self.client.get(
+            path=reverse('export_contracts'),
+            data=params,
+            headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        """
+        Проверяет выгрузку всех контрактов в CSV по порядку id
+        """
+        content = self.export(export_format='csv')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), Contract.objects.count())
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            sorted(Contract.objects.values_list('id', flat=True))
+        )
+        # параметры сети не загружены, доход не оценивается
+        self.assertEqual({row['accrued_btc'] for row in rows}, {''})
+
+    def test_export_ndjson_with_filter(self):
+        """
+        Проверяет выгрузку в NDJSON с фильтром по статусу
+        """
+        Contract.objects.filter(
+            id=Contract.objects.first().id
+        ).update(status=Contract.Status.ACTIVE)
+        lines = self.export(status='active').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0]).get('status'), 'active')
+
+
+class EstimatedCountPaginatorTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        customer = User.objects.get(username=self.users['user_1']['username'])
+        Contract.objects.bulk_create([
+            Contract(
+                customer=customer,
+                hashrate=10,
+                contract_start=date.today(),
+                contract_end=date.today() + timedelta(days=10),
+                is_paid=index % 2 == 0
+            )
+            for index in range(50)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Contract._meta.db_table}')
+        return result
+
+    def paginator(self, queryset, threshold):
+        paginator = EstimatedCountPaginator(queryset, 10)
+        paginator.estimate_threshold = threshold
+        return paginator
+
+    def test_estimated_count(self):
+        """
+        Проверяет, что выше порога количество берется из статистики,
+        а ниже считается точно
+        """
+        self.assertEqual(
+            self.paginator(Contract.objects.all(), threshold=1).count, 50
+        )
+        estimate = self.paginator(
+            Contract.objects.filter(is_paid=True), threshold=1
+        ).count
+        self.assertAlmostEqual(estimate, 25, delta=10)
+        self.assertEqual(self.paginator(
+            Contract.objects.filter(is_paid=True), threshold=1000
+        ).count, 25)
+
+    def test_contracts_list_page_number(self):
+        """
+        Проверяет постраничный список контрактов пользователя
+        """
+        self.create_token()
+        response = self.client.get(
+            path=reverse('all_contracts'),
+            data={'page': 2, 'page_size': 20},
+            headers={
+                'Authorization':
+                    f'Bearer {self.users["user_1"]["token"]}'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json().get('count'), 50)
+        self.assertEqual(len(response.json().get('results')), 20)
+
+
+class ContractIndexesTestCase(CreateUsersTestCase):
+
+    def test_hot_lookups_use_indexes(self):
+        """
+        Проверяет, что поиск неоплаченного и последнего контракта
+        пользователя и список его контрактов идут по индексам
+        """
+        customer_id = User.objects.first().uuid
+        plan = explain_without_seqscan(Contract.objects.filter(
+            customer_id=customer_id, is_paid=False
+        ).order_by('-created_at')[:1])
+        self.assertIn('contract_unpaid_customer_idx', plan)
+
+        plan = explain_without_seqscan(Contract.objects.filter(
+            customer_id=customer_id
+        ).order_by('-created_at', '-id')[:21])
+        self.assertIn('contract_customer_created_idx', plan)
+
+
+class ResponseCacheTestCase(CreateUsersTestCase):
+    """
+    Кэш ответов на примере расчета стоимости контракта
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.cost = RentalThCost.objects.create(cost=1)
+        start = date.today() + timedelta(days=1)
+        self.path = reverse('get_price', kwargs={
+            'hashrate': '10',
+            'contract_start': start.isoformat(),
+            'contract_end': (start + timedelta(days=1)).isoformat()
+        })
+        self.key = get_response_cache_key(
+            'get_price', RequestFactory().get(self.path)
+        )
+        return result
+
+    def get_price(self):
+        response = self.client.get(path=self.path)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'], response.json()['contract_price']
+
+    def set_cost(self, cost):
+        RentalThCost.objects.filter(pk=self.cost.pk).update(cost=cost)
+
+    def expire(self):
+        entry = cache.get(self.key)
+        entry['fresh_until'] = time.time() - 1
+        cache.set(self.key, entry)
+
+    def test_fresh_response_is_cached(self):
+        """
+        Проверяет, что свежий ответ отдается из кэша
+        без запросов к базе
+        """
+        self.assertEqual(self.get_price(), ('miss', 864000))
+        self.set_cost(2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_price(), ('hit', 864000))
+
+    def test_stale_response_is_refreshed_after_sending(self):
+        """
+        Проверяет, что устаревший ответ отдается из кэша
+        и пересчитывается после отправки
+        """
+        self.get_price()
+        self.set_cost(2)
+        self.expire()
+        self.assertEqual(self.get_price(), ('stale', 864000))
+        self.assertEqual(self.get_price(), ('hit', 1728000))
+
+    def test_single_flight(self):
+        """
+        Проверяет, что устаревший ответ не пересчитывается,
+        пока его пересчитывает другой процесс
+        """
+        self.get_price()
+        self.set_cost(2)
+        self.expire()
+        # ключ уже пересчитывает другой процесс
+        cache.add(f'{self.key}:lock', 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_price(), ('stale', 864000))
+            self.assertEqual(self.get_price(), ('stale', 864000))
+
+    def test_errors_are_not_cached(self):
+        """
+        Проверяет, что ответы с ошибкой не кэшируются
+        """
+        path = self.path.replace('/10/', '/abc/')
+        self.assertEqual(self.client.get(path=path).status_code, 400)
+        self.assertNotIn('X-Cache', self.client.get(path=path))
@@ -4,7 +4,8 @@ from src.application.api.v1.views import (
     GetDailyIncomeView,
     GetAllContractsView,
     ChangeLastContractPaymentStatus,
-    CalculateContractPriceView
+    CalculateContractPriceView,
+    ExportContractsView
 )
 
 urlpatterns = [
@@ -19,6 +20,7 @@ urlpatterns = [
         ChangeLastContractPaymentStatus.as_view(),
         name='check_payment'
     ),
+    path('export/', ExportContractsView.as_view(), name='export_contracts'),
     path('<int:pk>/', GetDailyIncomeView.as_view(), name='get_incomes'),
     path('', GetAllContractsView.as_view(), name='all_contracts')
 ]
@@ -1,34 +1,43 @@
 from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from src.application.api.v1.serializers import (
     CreateContractSerizalizer,
     GetAllContractsSerizalizer,
     ChangeLastContractPaymentStatusSerializer,
-    GetContractPriceSerizalizer
+    GetContractPriceSerizalizer,
+    ExportContractsSerializer
 )
 from src.application.api.v1.formulas import (
     calculate_income_btc,
     calculate_income_usd
 )
+from src.application.export import render_contracts
 from src.application.models import Contract
+from src.application.pool import get_delivered_hashrate
+from src.caching import cache_response
+from src.pagination import KeysetPagination
+from src.throttling import RateLimitMixin
 
 
-class APIListPagination(PageNumberPagination):
+class APIListPagination(KeysetPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 30
 
 
-class CalculateContractPriceView(generics.GenericAPIView):
+class CalculateContractPriceView(RateLimitMixin, generics.GenericAPIView):
     """Посчитает стоимость контракта в USDT"""
     serializer_class = GetContractPriceSerizalizer
+    throttle_scope = 'get_price'
 
+    # курсы и сложность сети обновляются раз в минуту
+    @cache_response('get_price', timeout=30, stale_timeout=60)
     def get(self, request, *args, **kwargs):
-        print(kwargs)
         serializer = self.serializer_class(
             data=kwargs
         )
@@ -76,6 +85,7 @@ class GetAllContractsView(generics.ListAPIView):
     """Выводит список всех контрактов пользователя"""
     serializer_class = GetAllContractsSerizalizer
     pagination_class = APIListPagination
+    filterset_fields = ['status']
     permission_classes = [
         IsAuthenticated,
     ]
@@ -88,18 +98,23 @@ class GetAllContractsView(generics.ListAPIView):
 
 
 class GetDailyIncomeView(APIView):
-    """Просмотр ежедневного дохода по контракту"""
+    """
+    Просмотр ежедневного дохода по контракту.
+
+    Доход считается по фактическому хешрейту за последние сутки,
+    а если статистики пула по контракту нет — по номинальному
+    """
     permission_classes = [
         IsAuthenticated,
     ]
 
     def get(self, request, *args, **kwargs):
-        contract = Contract.objects.filter(
-            pk=kwargs.get('pk'), customer_id=request.user.uuid
-        ).values(
-            'hashrate'
+        contract = get_object_or_404(
+            Contract, pk=kwargs.get('pk'), customer_id=request.user.uuid
         )
-        hashrate = contract[0].get('hashrate')
+        delivered_hashrate = get_delivered_hashrate(contract=contract)
+        hashrate = contract.hashrate if delivered_hashrate is None \
+            else delivered_hashrate
         income_btc = calculate_income_btc(
             btc_amount=hashrate
         )
@@ -109,19 +124,22 @@ class GetDailyIncomeView(APIView):
         return Response(
             data={
                 'income_btc': income_btc,
-                'income_usd': income_usd
+                'income_usd': income_usd,
+                'delivered_hashrate': delivered_hashrate
             },
             status=status.HTTP_200_OK
         )
 
 
-class ChangeLastContractPaymentStatus(generics.GenericAPIView):
+class ChangeLastContractPaymentStatus(RateLimitMixin,
+                                      generics.GenericAPIView):
     """
     Меняет статус оплаты
     у последнего контракта для пользователя
     """
 
     serializer_class = ChangeLastContractPaymentStatusSerializer
+    throttle_scope = 'check_payment'
 
     def post(self, request, *args, **kwargs):
         customer_id = request.data.get('user_id')
@@ -147,3 +165,31 @@ class ChangeLastContractPaymentStatus(generics.GenericAPIView):
         return Response(
             status=status.HTTP_204_NO_CONTENT
         )
+
+
+class ExportContractsView(APIView):
+    """
+    Потоковая выгрузка всех контрактов в CSV или NDJSON
+    с оценкой начисленного дохода (accrued_btc)
+    """
+    permission_classes = [IsAdminUser, ]
+
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson'
+    }
+
+    def get(self, request, *args, **kwargs):
+        serializer = ExportContractsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        export_format = serializer.validated_data.get('export_format')
+        response = StreamingHttpResponse(
+            render_contracts(
+                export_format=export_format,
+                queryset=serializer.get_queryset()
+            ),
+            content_type=self.content_types[export_format]
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="contracts.{export_format}"'
+        return response
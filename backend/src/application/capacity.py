@@ -0,0 +1,158 @@
+import logging
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from rest_framework import exceptions, status
+
+from src.application.lifecycle import get_open_contracts
+from src.application.models import Contract, FarmHashrate, HashrateCapacity
+
+
+logger = logging.getLogger(__name__)
+
+# допуск на погрешность сложения FloatField
+CAPACITY_EPSILON = 1e-9
+
+
+class CapacityExceeded(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {
+        'hashrate': 'Not enough hashrate capacity for the selected period.'
+    }
+    default_code = 'capacity_exceeded'
+
+
+def get_farm_hashrate():
+    """
+    Вернет общий хешрейт фермы
+    или None, если он не задан администратором
+    """
+    farm = FarmHashrate.objects.filter(id='farm_hashrate').first()
+    return farm.hashrate if farm else None
+
+
+def get_available_hashrate(start: date, end: date):
+    """
+    Вернет хешрейт, доступный на всем периоде [start, end)
+    """
+    total = get_farm_hashrate()
+    if total is None:
+        return None
+    reserved = HashrateCapacity.objects.filter(
+        day__gte=start, day__lt=end
+    ).values_list('reserved', flat=True)
+    return max(total - max(reserved, default=0), 0)
+
+
+def _days(start: date, end: date):
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def reserve_capacity(contract: Contract):
+    """
+    Резервирует хешрейт контракта на каждый день периода.
+
+    Флаг capacity_reserved ставится первым запросом транзакции:
+    строка контракта остается заблокированной до коммита, и
+    параллельный вызов для того же контракта резерв не повторит.
+    Хешрейт добавляется одним условным UPDATE только к дням,
+    где он помещается, без предварительной блокировки дней:
+    если обновлены не все дни, транзакция откатывается.
+    Если общий хешрейт фермы не задан, резервировать нечего
+    и флаг не ставится, такие контракты резервирует
+    reserve_unreserved_contracts
+    """
+    total = get_farm_hashrate()
+    start = max(contract.contract_start, date.today())
+    end = contract.contract_end
+    if total is None or start >= end:
+        return
+    with transaction.atomic():
+        claimed = Contract.objects.filter(
+            pk=contract.pk, capacity_reserved=False
+        ).update(capacity_reserved=True)
+        if claimed:
+            days = _days(start, end)
+            HashrateCapacity.objects.bulk_create(
+                [HashrateCapacity(day=day) for day in days],
+                ignore_conflicts=True
+            )
+            updated = HashrateCapacity.objects.filter(
+                day__gte=start,
+                day__lt=end,
+                reserved__lte=total - contract.hashrate + CAPACITY_EPSILON
+            ).update(reserved=F('reserved') + contract.hashrate)
+            if updated < len(days):
+                raise CapacityExceeded()
+    # без claimed хешрейт уже зарезервирован другим вызовом
+    contract.capacity_reserved = True
+
+
+def reserve_paid_contract(contract: Contract):
+    """
+    Резервирует хешрейт оплаченного контракта. Оплата уже
+    записана, поэтому при нехватке хешрейта контракт только
+    помечается флагом capacity_shortfall для администратора.
+    Вернет True, если хешрейта не хватило
+    """
+    try:
+        reserve_capacity(contract)
+    except CapacityExceeded:
+        Contract.objects.filter(pk=contract.pk).update(
+            capacity_shortfall=True
+        )
+        contract.capacity_shortfall = True
+        logger.error(
+            'Not enough hashrate capacity for paid contract %s', contract.pk
+        )
+        return True
+    return False
+
+
+def reserve_unreserved_contracts():
+    """
+    Резервирует хешрейт оплаченных незавершенных контрактов,
+    созданных, пока общий хешрейт фермы не был задан.
+    Контракты, которым хешрейта уже не хватило, не повторяются.
+    Вернет число контрактов, которым хешрейта не хватило
+    """
+    if get_farm_hashrate() is None:
+        return 0
+    contracts = get_open_contracts().filter(
+        is_paid=True,
+        capacity_reserved=False,
+        capacity_shortfall=False,
+        contract_end__gt=date.today()
+    ).order_by('created_at')
+    return sum(
+        reserve_paid_contract(contract) for contract in contracts.iterator()
+    )
+
+
+def release_capacity(contract: Contract):
+    """
+    Возвращает в резерв хешрейт контракта
+    за оставшиеся (не прошедшие) дни
+    """
+    start = max(contract.contract_start, date.today())
+    with transaction.atomic():
+        released = Contract.objects.filter(
+            pk=contract.pk, capacity_reserved=True
+        ).update(capacity_reserved=False)
+        if released:
+            HashrateCapacity.objects.filter(
+                day__gte=start, day__lt=contract.contract_end
+            ).update(
+                reserved=Greatest(F('reserved') - contract.hashrate, 0.0)
+            )
+    contract.capacity_reserved = False
+
+
+def delete_past_capacity_days():
+    """
+    Удаляет строки резерва за прошедшие дни:
+    по истекшим периодам хешрейт уже не продается
+    """
+    return HashrateCapacity.objects.filter(day__lt=date.today()).delete()
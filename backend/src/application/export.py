@@ -0,0 +1,107 @@
+import csv
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404
+
+from src.application.api.v1.formulas import calculate_income_btc
+from src.application.models import Contract
+
+
+# сколько строк забирать из серверного курсора за раз
+EXPORT_CHUNK_SIZE = 2000
+
+CONTRACT_EXPORT_FIELDS = [
+    'id',
+    'customer_id',
+    'hashrate',
+    'contract_start',
+    'contract_end',
+    'is_paid',
+    'status',
+    'created_at',
+]
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# сколько строк отдавать клиенту одним куском
+EXPORT_LINES_PER_CHUNK = 500
+
+
+class Echo:
+    """
+    Буфер для csv.writer, который сразу отдает записанную строку
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_daily_income_per_th():
+    """
+    Доход в BTC с 1 TH в сутки по текущим параметрам сети
+    или None, если параметры еще не загружены
+    """
+    try:
+        return calculate_income_btc()
+    except Http404:
+        return None
+
+
+def accrued_btc(row: dict, income_per_th, today: date):
+    """
+    Оценка начисленного дохода по контракту на сегодня
+    по текущим параметрам сети
+    """
+    if income_per_th is None or not row['is_paid']:
+        return None
+    days = (min(today, row['contract_end']) - row['contract_start']).days
+    return max(days, 0) * row['hashrate'] * income_per_th
+
+
+def iter_contracts(queryset=None):
+    """
+    Строки контрактов для выгрузки. Читаются через серверный курсор,
+    поэтому память не зависит от количества строк
+    """
+    if queryset is None:
+        queryset = Contract.objects.all()
+    income_per_th = get_daily_income_per_th()
+    today = date.today()
+    rows = queryset.order_by('id').values(
+        *CONTRACT_EXPORT_FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        row['accrued_btc'] = accrued_btc(row, income_per_th, today)
+        yield row
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CONTRACT_EXPORT_FIELDS + ['accrued_btc'])
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def _join_lines(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_LINES_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def render_contracts(export_format: str, queryset=None):
+    rows = iter_contracts(queryset=queryset)
+    if export_format == 'csv':
+        return _join_lines(render_csv(rows))
+    return _join_lines(render_ndjson(rows))
@@ -0,0 +1,79 @@
+from datetime import date
+
+from django.db import transaction
+
+from src.application.models import Contract
+
+
+# сколько контрактов обновлять одним UPDATE
+STATUS_UPDATE_CHUNK_SIZE = 5000
+
+OPEN_STATUSES = [Contract.Status.PENDING, Contract.Status.ACTIVE]
+
+
+def get_open_contracts():
+    """
+    Незавершенные контракты. Фильтр по статусу совпадает с условием
+    частичного индекса contract_open_end_idx
+    """
+    return Contract.objects.filter(status__in=OPEN_STATUSES)
+
+
+def get_active_contracts():
+    return Contract.objects.filter(status=Contract.Status.ACTIVE)
+
+
+def _update_in_chunks(queryset, status: str, chunk_size: int):
+    """
+    Переводит контракты в статус status пачками по chunk_size,
+    каждая пачка — отдельная короткая транзакция.
+    Строки, заблокированные другими транзакциями, пропускаются
+    до следующего запуска
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = queryset.select_for_update(skip_locked=True).order_by()
+            updated = Contract.objects.filter(
+                pk__in=list(ids.values_list('pk', flat=True)[:chunk_size])
+            ).update(status=status)
+        total += updated
+        if updated < chunk_size:
+            return total
+
+
+def activate_contracts(today: date = None,
+                       chunk_size: int = STATUS_UPDATE_CHUNK_SIZE):
+    today = today or date.today()
+    return _update_in_chunks(
+        queryset=Contract.objects.filter(
+            status=Contract.Status.PENDING,
+            is_paid=True,
+            contract_start__lte=today,
+            contract_end__gt=today
+        ),
+        status=Contract.Status.ACTIVE,
+        chunk_size=chunk_size
+    )
+
+
+def expire_contracts(today: date = None,
+                     chunk_size: int = STATUS_UPDATE_CHUNK_SIZE):
+    today = today or date.today()
+    return _update_in_chunks(
+        queryset=get_open_contracts().filter(contract_end__lte=today),
+        status=Contract.Status.EXPIRED,
+        chunk_size=chunk_size
+    )
+
+
+def update_contracts_status(today: date = None):
+    """
+    Переводит контракты по жизненному циклу:
+    оплаченные и начавшиеся — в действующие,
+    с прошедшей датой завершения — в завершенные
+    """
+    return {
+        'expired': expire_contracts(today=today),
+        'activated': activate_contracts(today=today)
+    }
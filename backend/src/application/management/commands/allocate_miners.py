@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from src.application.allocation import sync_miner_allocations
+
+
+class Command(BaseCommand):
+    help = 'Распределяет хешрейт оплаченных контрактов по майнерам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Распределить все контракты заново'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = sync_miner_allocations(rebuild=options['rebuild'])
+        elapsed = time.perf_counter() - started
+        if summary is None:
+            self.stderr.write('Allocation is already running.')
+            return
+        if summary['rebuilt']:
+            self.stdout.write('Allocations were rebuilt.')
+        self.stdout.write(
+            f'Allocated {summary["allocated"]} contracts, '
+            f'{len(summary["unallocated"])} without enough miners '
+            f'in {elapsed:.2f}s'
+        )
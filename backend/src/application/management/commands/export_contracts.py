@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.application.api.v1.serializers import ExportContractsSerializer
+from src.application.export import EXPORT_FORMATS, render_contracts
+
+
+class Command(BaseCommand):
+    help = 'Выгружает контракты в CSV или NDJSON с постоянным расходом памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=EXPORT_FORMATS,
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument('--status')
+        parser.add_argument(
+            '--since', help='Контракты, созданные начиная с даты (ISO)'
+        )
+        parser.add_argument(
+            '--until', help='Контракты, созданные до даты (ISO)'
+        )
+
+    def handle(self, *args, **options):
+        serializer = ExportContractsSerializer(data={
+            key: options[key]
+            for key in ('export_format', 'status', 'since', 'until')
+            if options[key]
+        })
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+        chunks = render_contracts(
+            export_format=serializer.validated_data.get('export_format'),
+            queryset=serializer.get_queryset()
+        )
+        output = sys.stdout if options['output'] == '-' \
+            else open(options['output'], 'w', newline='')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,79 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from src.application.pool import (
+    SHARES_FLUSH_SIZE,
+    ShareAggregator,
+    stand_in_share_feed
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает шары пула (NDJSON: worker, difficulty, ts) '
+        'в поминутную статистику воркеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            nargs='?',
+            default='-',
+            help='Файл с шарами в формате NDJSON, по умолчанию stdin'
+        )
+        parser.add_argument(
+            '--stand-in',
+            action='store_true',
+            help='Читать шары из локальной замены фида пула'
+        )
+        parser.add_argument(
+            '--rate',
+            type=int,
+            default=20_000,
+            help='Шар в секунду для локального фида'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=60,
+            help='Длительность локального фида в секундах'
+        )
+        parser.add_argument(
+            '--flush-size',
+            type=int,
+            default=SHARES_FLUSH_SIZE,
+            help='Сколько шар копить в памяти до записи в базу'
+        )
+
+    def read_ndjson(self, source):
+        stream = sys.stdin if source == '-' else open(source)
+        try:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def handle(self, *args, **options):
+        if options['stand_in']:
+            shares = stand_in_share_feed(
+                rate=options['rate'], duration=options['duration']
+            )
+        else:
+            shares = self.read_ndjson(options['source'])
+        aggregator = ShareAggregator(flush_size=options['flush_size'])
+        started = time.perf_counter()
+        try:
+            aggregator.add_many(shares)
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f'Invalid share record: {exc}')
+        aggregator.flush()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Ingested {aggregator.total} shares in {elapsed:.2f}s '
+            f'({aggregator.total / max(elapsed, 1e-9):.0f} shares/s)'
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0009_delete_btcprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmHashrate',
+            fields=[
+                ('id', models.CharField(default='farm_hashrate', max_length=20, primary_key=True, serialize=False)),
+                ('hashrate', models.FloatField(default=0, verbose_name='Хешрейт фермы (в TH)')),
+            ],
+            options={
+                'verbose_name': 'хешрейт фермы',
+                'verbose_name_plural': 'Данные о хешрейте фермы',
+            },
+        ),
+        migrations.CreateModel(
+            name='HashrateCapacity',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False, verbose_name='День')),
+                ('reserved', models.FloatField(default=0, verbose_name='Зарезервировано (в TH)')),
+            ],
+            options={
+                'verbose_name': 'резерв хешрейта',
+                'verbose_name_plural': 'Резервы хешрейта по дням',
+                'ordering': ('day',),
+            },
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='capacity_reserved',
+            field=models.BooleanField(default=False, verbose_name='Хешрейт зарезервирован'),
+        ),
+    ]
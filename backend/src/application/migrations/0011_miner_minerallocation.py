@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-19 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0010_farmhashrate_hashratecapacity_contract_capacity_reserved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Miner',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Название')),
+                ('hashrate', models.FloatField(verbose_name='Хешрейт (в TH)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='В работе')),
+            ],
+            options={
+                'verbose_name': 'майнер',
+                'verbose_name_plural': 'Майнеры',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='MinerAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hashrate', models.FloatField(verbose_name='Хешрейт (в TH)')),
+                ('start', models.DateField(verbose_name='Начало')),
+                ('end', models.DateField(verbose_name='Завершение')),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='application.contract', verbose_name='Контракт')),
+                ('miner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='application.miner', verbose_name='Майнер')),
+            ],
+            options={
+                'verbose_name': 'распределение хешрейта',
+                'verbose_name_plural': 'Распределение хешрейта по майнерам',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='minerallocation',
+            index=models.Index(fields=['miner', 'end'], name='application_miner_i_3d8bc5_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0011_miner_minerallocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerHashrate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_name', models.CharField(max_length=100, verbose_name='Воркер')),
+                ('minute', models.DateTimeField(verbose_name='Минута')),
+                ('shares', models.PositiveIntegerField(default=0, verbose_name='Шары')),
+                ('difficulty', models.FloatField(default=0, verbose_name='Суммарная сложность шар')),
+            ],
+            options={
+                'verbose_name': 'статистика воркера',
+                'verbose_name_plural': 'Статистика воркеров пула',
+            },
+        ),
+        migrations.AddField(
+            model_name='miner',
+            name='worker_name',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='Воркер в пуле'),
+        ),
+        migrations.AddConstraint(
+            model_name='workerhashrate',
+            constraint=models.UniqueConstraint(fields=('worker_name', 'minute'), name='unique_worker_minute'),
+        ),
+    ]
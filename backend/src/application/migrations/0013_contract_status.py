@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0012_miner_worker_name_workerhashrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает начала'), ('active', 'Действует'), ('expired', 'Завершен')], default='pending', max_length=10, verbose_name='Статус'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 04:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # индекс строится CONCURRENTLY, без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('application', '0014_contract_customer_created_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contract',
+            index=models.Index(fields=['-created_at', '-id'], name='contract_created_idx'),
+        ),
+    ]
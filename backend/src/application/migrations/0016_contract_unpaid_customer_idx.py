@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 04:48
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # индекс строится CONCURRENTLY, без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('application', '0015_contract_created_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('is_paid', False)), fields=['customer', '-created_at'], name='contract_unpaid_customer_idx'),
+        ),
+    ]
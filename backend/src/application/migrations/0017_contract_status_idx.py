@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 04:39
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # индексы строятся CONCURRENTLY, без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('application', '0016_contract_unpaid_customer_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'active'])), fields=['contract_end'], name='contract_open_end_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('is_paid', True), ('status', 'pending')), fields=['contract_start'], name='contract_paid_pending_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['customer'], name='contract_active_customer_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.db import migrations, transaction
+
+
+CHUNK_SIZE = 5000
+
+
+def update_in_chunks(Contract, queryset, status):
+    # как src.application.lifecycle._update_in_chunks: короткие
+    # транзакции, заблокированные строки обновит задача статусов
+    while True:
+        with transaction.atomic():
+            ids = queryset.select_for_update(skip_locked=True).order_by()
+            updated = Contract.objects.filter(
+                pk__in=list(ids.values_list('pk', flat=True)[:CHUNK_SIZE])
+            ).update(status=status)
+        if updated < CHUNK_SIZE:
+            return
+
+
+def backfill_status(apps, schema_editor):
+    Contract = apps.get_model('application', 'Contract')
+    today = date.today()
+    update_in_chunks(
+        Contract,
+        Contract.objects.filter(
+            status__in=['pending', 'active'], contract_end__lte=today
+        ),
+        'expired'
+    )
+    update_in_chunks(
+        Contract,
+        Contract.objects.filter(
+            status='pending',
+            is_paid=True,
+            contract_start__lte=today,
+            contract_end__gt=today
+        ),
+        'active'
+    )
+
+
+class Migration(migrations.Migration):
+    # статусы проставляются пачками в отдельных транзакциях,
+    # без долгой блокировки всей таблицы контрактов
+    atomic = False
+
+    dependencies = [
+        ('application', '0017_contract_status_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
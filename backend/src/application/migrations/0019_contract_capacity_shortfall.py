@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0018_backfill_contract_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='capacity_shortfall',
+            field=models.BooleanField(default=False, verbose_name='Не хватило хешрейта'),
+        ),
+    ]
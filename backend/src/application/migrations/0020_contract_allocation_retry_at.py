@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0019_contract_capacity_shortfall'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='allocation_retry_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Повторить распределение по майнерам после'),
+        ),
+    ]
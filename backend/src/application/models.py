@@ -1,3 +1,5 @@
+from datetime import date
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -64,6 +66,40 @@ class RentalThCost(models.Model):
         verbose_name_plural = 'Данные о стоимость аренды 1 TH (в usd)'
 
 
+class FarmHashrate(models.Model):
+    id = models.CharField(
+        primary_key=True, max_length=20, default='farm_hashrate'
+    )
+    hashrate = models.FloatField(
+        verbose_name='Хешрейт фермы (в TH)',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'хешрейт фермы'
+        verbose_name_plural = 'Данные о хешрейте фермы'
+
+
+class HashrateCapacity(models.Model):
+    """
+    Зарезервированный контрактами хешрейт на конкретный день.
+
+    Строки создаются по мере необходимости и блокируются
+    построчно при резервировании, поэтому покупки на
+    непересекающиеся периоды не ждут друг друга
+    """
+    day = models.DateField(primary_key=True, verbose_name='День')
+    reserved = models.FloatField(
+        verbose_name='Зарезервировано (в TH)',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'резерв хешрейта'
+        verbose_name_plural = 'Резервы хешрейта по дням'
+        ordering = ('day',)
+
+
 class CryptocurrencyToUsdtExchange(models.Model):
     id = models.CharField(
         primary_key=True, max_length=20
@@ -80,6 +116,11 @@ class CryptocurrencyToUsdtExchange(models.Model):
 
 class Contract(models.Model):
 
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает начала'
+        ACTIVE = 'active', 'Действует'
+        EXPIRED = 'expired', 'Завершен'
+
     customer = models.ForeignKey(
         User,
         to_field='uuid',
@@ -91,6 +132,23 @@ class Contract(models.Model):
     contract_start = models.DateField(verbose_name='Начало')
     contract_end = models.DateField(verbose_name='Завершение')
     is_paid = models.BooleanField(default=False, verbose_name='Оплачено')
+    capacity_reserved = models.BooleanField(
+        default=False, verbose_name='Хешрейт зарезервирован'
+    )
+    capacity_shortfall = models.BooleanField(
+        default=False, verbose_name='Не хватило хешрейта'
+    )
+    allocation_retry_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Повторить распределение по майнерам после'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус'
+    )
 
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата создания'
@@ -100,3 +158,115 @@ class Contract(models.Model):
         verbose_name = 'контракт'
         verbose_name_plural = 'Контракты'
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(
+                fields=['contract_end'],
+                name='contract_open_end_idx',
+                condition=models.Q(status__in=['pending', 'active'])
+            ),
+            models.Index(
+                fields=['contract_start'],
+                name='contract_paid_pending_idx',
+                condition=models.Q(status='pending', is_paid=True)
+            ),
+            models.Index(
+                fields=['customer'],
+                name='contract_active_customer_idx',
+                condition=models.Q(status='active')
+            ),
+            models.Index(
+                fields=['customer', '-created_at', '-id'],
+                name='contract_customer_created_idx'
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='contract_created_idx'
+            ),
+            models.Index(
+                fields=['customer', '-created_at'],
+                name='contract_unpaid_customer_idx',
+                condition=models.Q(is_paid=False)
+            ),
+        ]
+
+    def get_current_status(self, today: date = None):
+        """
+        Статус контракта по датам и оплате на день today
+        """
+        today = today or date.today()
+        if self.contract_end <= today:
+            return self.Status.EXPIRED
+        if self.is_paid and self.contract_start <= today:
+            return self.Status.ACTIVE
+        return self.Status.PENDING
+
+
+class Miner(models.Model):
+    name = models.CharField(
+        max_length=100, unique=True, verbose_name='Название'
+    )
+    hashrate = models.FloatField(verbose_name='Хешрейт (в TH)')
+    worker_name = models.CharField(
+        max_length=100, blank=True, db_index=True,
+        verbose_name='Воркер в пуле'
+    )
+    is_active = models.BooleanField(default=True, verbose_name='В работе')
+
+    class Meta:
+        verbose_name = 'майнер'
+        verbose_name_plural = 'Майнеры'
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
+class MinerAllocation(models.Model):
+    """
+    Часть хешрейта контракта, закрепленная за майнером.
+    Период контракта продублирован для выборки по интервалам
+    """
+    contract = models.ForeignKey(
+        Contract,
+        verbose_name='Контракт',
+        on_delete=models.CASCADE,
+        related_name='allocations'
+    )
+    miner = models.ForeignKey(
+        Miner,
+        verbose_name='Майнер',
+        on_delete=models.CASCADE,
+        related_name='allocations'
+    )
+    hashrate = models.FloatField(verbose_name='Хешрейт (в TH)')
+    start = models.DateField(verbose_name='Начало')
+    end = models.DateField(verbose_name='Завершение')
+
+    class Meta:
+        verbose_name = 'распределение хешрейта'
+        verbose_name_plural = 'Распределение хешрейта по майнерам'
+        indexes = [
+            models.Index(fields=['miner', 'end']),
+        ]
+
+
+class WorkerHashrate(models.Model):
+    """
+    Шары воркера пула, агрегированные за минуту
+    """
+    worker_name = models.CharField(max_length=100, verbose_name='Воркер')
+    minute = models.DateTimeField(verbose_name='Минута')
+    shares = models.PositiveIntegerField(default=0, verbose_name='Шары')
+    difficulty = models.FloatField(
+        default=0, verbose_name='Суммарная сложность шар'
+    )
+
+    class Meta:
+        verbose_name = 'статистика воркера'
+        verbose_name_plural = 'Статистика воркеров пула'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['worker_name', 'minute'],
+                name='unique_worker_minute'
+            ),
+        ]
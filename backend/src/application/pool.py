@@ -0,0 +1,165 @@
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.db.models import Min, Sum
+from django.utils import timezone as django_timezone
+from psycopg2.extras import execute_values
+
+from src.application.models import Contract, Miner, WorkerHashrate
+
+
+# хешей на одну шару единичной сложности
+HASHES_PER_DIFFICULTY = 2 ** 32
+
+# сколько шар копить в памяти до записи в базу
+SHARES_FLUSH_SIZE = 50_000
+
+# окно, за которое считается фактический хешрейт
+DELIVERED_HASHRATE_WINDOW = timedelta(hours=24)
+
+UPSERT_WORKER_HASHRATE_SQL = '''
+    INSERT INTO application_workerhashrate
+        (worker_name, minute, shares, difficulty)
+    VALUES %s
+    ON CONFLICT (worker_name, minute) DO UPDATE SET
+        shares = application_workerhashrate.shares + EXCLUDED.shares,
+        difficulty = application_workerhashrate.difficulty
+            + EXCLUDED.difficulty
+'''
+
+
+class ShareAggregator:
+    """
+    Агрегирует шары пула по воркерам и минутам в памяти.
+
+    В базу попадает одна строка на воркер в минуту: при записи
+    значения складываются с уже сохраненными, поэтому минуту
+    можно дописывать из нескольких пачек и процессов
+    """
+
+    def __init__(self, flush_size: int = SHARES_FLUSH_SIZE):
+        self.flush_size = flush_size
+        # (worker_name, минута в секундах) -> [шар, суммарная сложность]
+        self.buckets = defaultdict(lambda: [0, 0.0])
+        self.pending = 0
+        self.total = 0
+
+    def add(self, worker: str, difficulty: float, timestamp: float):
+        bucket = self.buckets[(worker, int(timestamp) // 60 * 60)]
+        bucket[0] += 1
+        bucket[1] += difficulty
+        self.pending += 1
+        if self.pending >= self.flush_size:
+            self.flush()
+
+    def add_many(self, shares):
+        for share in shares:
+            self.add(
+                worker=share['worker'],
+                difficulty=share['difficulty'],
+                timestamp=share['ts']
+            )
+
+    def flush(self):
+        if not self.buckets:
+            return 0
+        rows = [
+            (
+                worker,
+                datetime.fromtimestamp(minute, tz=timezone.utc),
+                shares,
+                difficulty
+            )
+            for (worker, minute), (shares, difficulty) in self.buckets.items()
+        ]
+        with connection.cursor() as cursor:
+            execute_values(
+                cursor, UPSERT_WORKER_HASHRATE_SQL, rows, page_size=1000
+            )
+        self.total += self.pending
+        self.buckets.clear()
+        self.pending = 0
+        return len(rows)
+
+
+def get_delivered_hashrate(contract: Contract, until: datetime = None,
+                           window: timedelta = DELIVERED_HASHRATE_WINDOW):
+    """
+    Вернет фактический хешрейт контракта (в TH) за окно
+    или None, если по его майнерам нет статистики пула.
+
+    Хешрейт майнера делится между контрактами пропорционально
+    закрепленной за ними доле и не превышает эту долю
+    """
+    until = until or django_timezone.now()
+    allocations = list(
+        contract.allocations.exclude(
+            miner__worker_name=''
+        ).values_list(
+            'hashrate', 'miner__hashrate', 'miner__worker_name'
+        )
+    )
+    if not allocations:
+        return None
+    delivered = {
+        worker: (total, first)
+        for worker, total, first in WorkerHashrate.objects.filter(
+            worker_name__in=[worker for _, _, worker in allocations],
+            minute__gte=until - window,
+            minute__lt=until
+        ).values('worker_name').annotate(
+            total=Sum('difficulty'), first=Min('minute')
+        ).values_list('worker_name', 'total', 'first')
+    }
+    if not delivered:
+        return None
+    hashrate = 0.0
+    for allocated, miner_hashrate, worker in allocations:
+        # у майнера с нулевым хешрейтом закреплять нечего, такие
+        # закрепления снимает sync_miner_allocations
+        if worker not in delivered or miner_hashrate <= 0:
+            continue
+        total, first = delivered[worker]
+        # статистика могла начаться позже начала окна
+        seconds = (until - first).total_seconds()
+        miner_delivered = total * HASHES_PER_DIFFICULTY / seconds / 10 ** 12
+        hashrate += min(
+            allocated, miner_delivered * allocated / miner_hashrate
+        )
+    return hashrate
+
+
+def stand_in_share_feed(rate: int, duration: float, workers=None):
+    """
+    Локальная замена фида пула: шары воркеров майнеров
+    с частотой rate шар/с на протяжении duration секунд.
+
+    Сложность шар подобрана так, чтобы фактический хешрейт
+    майнеров совпадал с номинальным. Время шар синтетическое,
+    поэтому фид отдается так быстро, как его читают
+    """
+    if workers is None:
+        workers = dict(
+            Miner.objects.exclude(worker_name='').values_list(
+                'worker_name', 'hashrate'
+            )
+        )
+    names = list(workers)
+    if not names:
+        return
+    per_worker = rate / len(names)
+    difficulty = {
+        name: hashrate * 10 ** 12 / HASHES_PER_DIFFICULTY / per_worker
+        for name, hashrate in workers.items()
+    }
+    started = time.time() - duration
+    for index in range(int(rate * duration)):
+        worker = names[random.randrange(len(names))]
+        yield {
+            'worker': worker,
+            'difficulty': difficulty[worker],
+            'ts': started + index / rate
+        }
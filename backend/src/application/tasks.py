@@ -1,14 +1,24 @@
 import os
-import requests
 
+from datetime import timedelta
 from dotenv import load_dotenv
+from django.utils import timezone
 from config.celery import app
+from src.application.allocation import sync_miner_allocations
+from src.application.capacity import (
+    release_capacity,
+    reserve_unreserved_contracts,
+    delete_past_capacity_days
+)
+from src.application.lifecycle import update_contracts_status
+from src.application.models import Contract, WorkerHashrate
 from src.application.db_commands import (
     update_or_create_difficulty,
     update_or_create_reward,
     update_or_create_btc_price,
     update_or_create_eth_price
 )
+from src.monitoring.metrics import upstream_request
 
 
 load_dotenv()
@@ -19,11 +29,26 @@ BTC_DATA_TOKEN = os.environ.get('BTC_DATA_TOKEN')
 BTC_TO_USD = os.environ.get('BTC_TO_USD')
 ETH_TO_USD = os.environ.get('ETH_TO_USD')
 
+# сколько секунд ждать ответа внешнего сервиса, иначе воркер
+# может зависнуть на медленном ответе
+UPSTREAM_REQUEST_TIMEOUT = float(
+    os.environ.get('UPSTREAM_REQUEST_TIMEOUT', 10)
+)
+
+UNPAID_CONTRACT_RESERVATION_HOURS = int(
+    os.environ.get('UNPAID_CONTRACT_RESERVATION_HOURS', 24)
+)
+POOL_STATS_RETENTION_DAYS = int(
+    os.environ.get('POOL_STATS_RETENTION_DAYS', 7)
+)
+
 
 @app.task
 def save_new_block_data_in_db():
     try:
-        resonse = requests.post(
+        resonse = upstream_request(
+            'block',
+            'post',
             url=LAST_BLOCK_DATA,
             headers={
                 'x-api-key': BTC_DATA_TOKEN
@@ -33,7 +58,8 @@ def save_new_block_data_in_db():
                 "method": "getblockchaininfo",
                 "params": [],
                 "id": "getblock.io"
-            }
+            },
+            timeout=UPSTREAM_REQUEST_TIMEOUT
         )
         if resonse.status_code == 200:
             block_data = resonse.json().get('result')
@@ -50,7 +76,12 @@ def save_new_block_data_in_db():
 @app.task
 def save_new_btc_price_in_db():
     try:
-        resonse = requests.get(url=BTC_TO_USD)
+        resonse = upstream_request(
+            'btc_price',
+            'get',
+            url=BTC_TO_USD,
+            timeout=UPSTREAM_REQUEST_TIMEOUT
+        )
         if resonse.status_code == 200:
             btc_price = resonse.json().get('price')
             if btc_price:
@@ -62,10 +93,61 @@ def save_new_btc_price_in_db():
 @app.task
 def save_new_eth_price_in_db():
     try:
-        resonse = requests.get(url=ETH_TO_USD)
+        resonse = upstream_request(
+            'eth_price',
+            'get',
+            url=ETH_TO_USD,
+            timeout=UPSTREAM_REQUEST_TIMEOUT
+        )
         if resonse.status_code == 200:
             eth_price = resonse.json().get('price')
             if eth_price:
                 update_or_create_eth_price(eth_price=eth_price)
     except Exception:
         return None
+
+
+@app.task
+def release_unpaid_contracts_capacity():
+    """
+    Снимает резерв хешрейта с контрактов,
+    которые не были оплачены вовремя.
+
+    При последующей оплате контракт попробует
+    зарезервировать хешрейт снова
+    """
+    deadline = timezone.now() - timedelta(
+        hours=UNPAID_CONTRACT_RESERVATION_HOURS
+    )
+    contracts = Contract.objects.filter(
+        status=Contract.Status.PENDING,
+        is_paid=False,
+        capacity_reserved=True,
+        created_at__lt=deadline
+    )
+    for contract in contracts.iterator():
+        release_capacity(contract)
+
+
+@app.task
+def delete_past_capacity():
+    delete_past_capacity_days()
+
+
+@app.task
+def allocate_contracts_to_miners():
+    # контракты, оплаченные до того, как задан хешрейт фермы
+    reserve_unreserved_contracts()
+    return sync_miner_allocations()
+
+
+@app.task
+def delete_old_worker_hashrate():
+    WorkerHashrate.objects.filter(
+        minute__lt=timezone.now() - timedelta(days=POOL_STATS_RETENTION_DAYS)
+    ).delete()
+
+
+@app.task
+def update_contracts_lifecycle():
+    return update_contracts_status()
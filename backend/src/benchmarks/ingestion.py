@@ -0,0 +1,211 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connections
+
+from src.application import tasks as application_tasks
+from src.application.models import (
+    CryptocurrencyToUsdtExchange,
+    Difficulty,
+    Reward
+)
+from src.benchmarks.load import percentiles
+from src.users import tasks as users_tasks
+
+
+def get_difficulty():
+    return Difficulty.objects.filter(
+        id='difficulty'
+    ).values_list('difficulty', flat=True).first()
+
+
+def get_price(crypto_type: str):
+    return CryptocurrencyToUsdtExchange.objects.filter(
+        id=crypto_type
+    ).values_list('usdt', flat=True).first()
+
+
+# источник -> (задача загрузки, чтение загруженного значения из базы)
+INGESTION_SOURCES = {
+    'block': (application_tasks.save_new_block_data_in_db, get_difficulty),
+    'btc': (
+        application_tasks.save_new_btc_price_in_db,
+        lambda: get_price('btc')
+    ),
+    'eth': (
+        application_tasks.save_new_eth_price_in_db,
+        lambda: get_price('eth')
+    ),
+}
+
+
+@contextmanager
+def point_tasks_to(upstream, timeout: float):
+    """
+    Направляет задачи загрузки на локальные сервисы
+    с таймаутом timeout, после выхода возвращает настройки
+    """
+    settings = [
+        (application_tasks, 'LAST_BLOCK_DATA', upstream.urls['LAST_BLOCK_DATA']),
+        (application_tasks, 'BTC_TO_USD', upstream.urls['BTC_TO_USD']),
+        (application_tasks, 'ETH_TO_USD', upstream.urls['ETH_TO_USD']),
+        (application_tasks, 'UPSTREAM_REQUEST_TIMEOUT', timeout),
+        (users_tasks, 'BASE_URL', upstream.urls['BASE_URL']),
+        (users_tasks, 'UPSTREAM_REQUEST_TIMEOUT', timeout),
+    ]
+    saved = [
+        (module, name, getattr(module, name)) for module, name, _ in settings
+    ]
+    for module, name, value in settings:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+@contextmanager
+def preserve_network_parameters():
+    """
+    Возвращает после прогона параметры сети и курсы,
+    которые перезаписали задачи загрузки
+    """
+    models = (Difficulty, Reward, CryptocurrencyToUsdtExchange)
+    saved = {model: list(model.objects.all()) for model in models}
+    try:
+        yield
+    finally:
+        for model, rows in saved.items():
+            model.objects.exclude(pk__in=[row.pk for row in rows]).delete()
+            for row in rows:
+                row.save()
+
+
+class IngestionRun:
+    """
+    Имитация воркера Celery с workers потоками, которому beat
+    каждые interval секунд ставит задачи загрузки всех источников
+    и wallets_per_tick задач создания кошелька
+    """
+
+    def __init__(self, upstream, workers: int = 4, interval: float = 1.0,
+                 duration: float = 10.0, wallets_per_tick: int = 0):
+        self.upstream = upstream
+        self.workers = workers
+        self.interval = interval
+        self.duration = duration
+        self.wallets_per_tick = wallets_per_tick
+        self.lock = threading.Lock()
+        self.busy = 0.0
+        # источник -> [(ожидание в очереди, выполнение, успех, свежесть)]
+        self.records = {name: [] for name in INGESTION_SOURCES}
+        self.records['wallet'] = []
+
+    def run_task(self, source: str, queued_at: float):
+        started = time.perf_counter()
+        succeeded = False
+        freshness = None
+        try:
+            if source == 'wallet':
+                users_tasks.create_user_wallet.run('bench-access-token')
+                succeeded = True
+            else:
+                task, read_value = INGESTION_SOURCES[source]
+                # задачи загрузки не пробрасывают ошибки, об успехе
+                # говорит только новое значение в базе
+                task.run()
+                issued_at = self.upstream.issued.get(read_value())
+                if issued_at is not None:
+                    succeeded = True
+                    freshness = time.time() - issued_at
+        except Exception:
+            pass
+        finally:
+            finished = time.perf_counter()
+            with self.lock:
+                self.busy += finished - started
+                self.records[source].append((
+                    started - queued_at,
+                    finished - started,
+                    succeeded,
+                    freshness
+                ))
+
+    def close_connections(self, pool):
+        """
+        Закрывает соединения с базой всех потоков пула: барьер
+        не дает одному потоку взять две задачи закрытия
+        """
+        barrier = threading.Barrier(self.workers)
+
+        def close():
+            barrier.wait()
+            connections.close_all()
+
+        for future in [pool.submit(close) for _ in range(self.workers)]:
+            future.result()
+
+    def run(self):
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        started = time.perf_counter()
+        deadline = started + self.duration
+        next_tick = started
+        while next_tick < deadline:
+            for source in INGESTION_SOURCES:
+                pool.submit(self.run_task, source, time.perf_counter())
+            for _ in range(self.wallets_per_tick):
+                pool.submit(self.run_task, 'wallet', time.perf_counter())
+            next_tick += self.interval
+            time.sleep(max(next_tick - time.perf_counter(), 0))
+        self.close_connections(pool)
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+        return self.report(elapsed)
+
+    def report(self, elapsed: float):
+        sources = {}
+        for source, records in self.records.items():
+            if not records:
+                continue
+            total = [(wait + run) * 1000 for wait, run, _, _ in records]
+            waits = [wait * 1000 for wait, _, _, _ in records]
+            fresh = sorted(
+                freshness * 1000 for _, _, _, freshness in records
+                if freshness is not None
+            )
+            latency = percentiles(sorted(total))
+            sources[source] = {
+                'runs': len(records),
+                'succeeded': sum(succeeded for _, _, succeeded, _ in records),
+                'latency_p50_ms': round(latency[0], 1),
+                'latency_p95_ms': round(latency[1], 1),
+                'latency_p99_ms': round(latency[2], 1),
+                'queue_wait_mean_ms': round(statistics.fmean(waits), 1),
+            }
+            if source != 'wallet':
+                freshness = percentiles(fresh)
+                sources[source].update({
+                    'freshness_p50_ms': round(freshness[0], 1),
+                    'freshness_p95_ms': round(freshness[1], 1),
+                    'freshness_max_ms': round(fresh[-1], 1) if fresh else None,
+                })
+        return {
+            'conditions': {
+                'latency_s': self.upstream.latency,
+                'jitter_s': self.upstream.jitter,
+                'error_rate': self.upstream.error_rate,
+                'payload_size': self.upstream.payload_size,
+                'workers': self.workers,
+                'interval_s': self.interval,
+                'duration_s': self.duration,
+            },
+            'sources': sources,
+            'worker_occupancy': round(
+                self.busy / (self.workers * elapsed), 3
+            ),
+            'upstream': dict(self.upstream.stats),
+        }
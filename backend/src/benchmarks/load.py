@@ -0,0 +1,241 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from importlib.util import find_spec
+
+import httpx
+from django.conf import settings
+from django.urls import reverse
+
+
+# на сколько процентов p95 может вырасти, а RPS упасть относительно базы
+REGRESSION_TOLERANCE = 0.2
+
+# лимиты локального сервера: все виртуальные пользователи ходят
+# с 127.0.0.1, и с боевыми лимитами прогон мерил бы ответы 429
+BENCH_THROTTLE_RATES = {
+    'login': '1000000/minute',
+    'register': '1000000/minute',
+    'get_price': '1000000/minute',
+    'check_payment': '1000000/minute',
+}
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(workers: int = 4, port: int = None, timeout: float = 30,
+                 throttle_rates: dict = None):
+    """
+    Запускает приложение на 127.0.0.1 так же, как в entrypoint.sh
+    (gunicorn), а если gunicorn не установлен — через runserver.
+    throttle_rates переопределяют лимиты запросов сервера.
+    Вернет базовый url сервера
+    """
+    port = port or get_free_port()
+    if find_spec('gunicorn'):
+        command = [
+            sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+            '-w', str(workers), '--bind', f'127.0.0.1:{port}',
+            '--log-level', 'warning'
+        ]
+    else:
+        command = [
+            sys.executable, 'manage.py', 'runserver',
+            f'127.0.0.1:{port}', '--noreload'
+        ]
+    env = os.environ.copy()
+    if throttle_rates:
+        env['THROTTLE_RATES'] = json.dumps(throttle_rates)
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError('Local server exited on start')
+            try:
+                socket.create_connection(('127.0.0.1', port), 0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError('Local server did not start in time')
+                time.sleep(0.2)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentiles(values: list):
+    """
+    p50, p95 и p99 значений
+    """
+    if len(values) > 1:
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        return cuts[49], cuts[94], cuts[98]
+    value = values[0] if values else 0
+    return value, value, value
+
+
+def summarize(latencies: list, errors: int, elapsed: float):
+    """
+    Перцентили задержки в мс и пропускная способность прогона
+    """
+    latencies = sorted(latency * 1000 for latency in latencies)
+    p50, p95, p99 = percentiles(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0,
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0
+    }
+
+
+def run_load(client: httpx.Client, send, requests: int, concurrency: int):
+    """
+    Отправляет requests запросов функцией send(client, index)
+    из concurrency потоков
+    """
+    def timed(index):
+        started = time.perf_counter()
+        try:
+            response = send(client, index)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        return time.perf_counter() - started, failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        latencies=[latency for latency, failed in results if not failed],
+        errors=sum(failed for _, failed in results),
+        elapsed=elapsed
+    )
+
+
+class APIScenarios:
+    """
+    Сценарии нагрузочного теста публичного API.
+    Каждый сценарий — функция (client, index) -> response,
+    index выбирает виртуального пользователя.
+    daily_income ходит только от пользователей с контрактами
+    и пропускается, если контрактов нет ни у кого
+    """
+
+    def __init__(self, client: httpx.Client, usernames: list, password: str):
+        self.usernames = usernames
+        self.password = password
+        self.tokens = []
+        self.contracts = []
+        for username in usernames:
+            response = self.login(client, len(self.tokens))
+            if response.status_code == 429:
+                raise RuntimeError(
+                    'Login is rate limited by the server. Start it with '
+                    f'THROTTLE_RATES=\'{json.dumps(BENCH_THROTTLE_RATES)}\''
+                )
+            response.raise_for_status()
+            token = response.json()['data']['tokens']['access']
+            self.tokens.append(token)
+            index = len(self.tokens) - 1
+            contracts = client.get(
+                reverse('all_contracts'), headers=self.auth(index)
+            ).json()['results']
+            if contracts:
+                self.contracts.append((index, contracts[0]['id']))
+
+    def auth(self, index):
+        token = self.tokens[index % len(self.tokens)]
+        return {'Authorization': f'Bearer {token}'}
+
+    def login(self, client, index):
+        return client.post(reverse('login'), data={
+            'username': self.usernames[index % len(self.usernames)],
+            'password': self.password
+        })
+
+    def get_price(self, client, index):
+        start = date.today() + timedelta(days=index % 30)
+        return client.get(reverse('get_price', kwargs={
+            'hashrate': str(10 + index % 90),
+            'contract_start': start.isoformat(),
+            'contract_end': (start + timedelta(days=90)).isoformat()
+        }))
+
+    def daily_income(self, client, index):
+        user, pk = self.contracts[index % len(self.contracts)]
+        return client.get(
+            reverse('get_incomes', kwargs={'pk': pk}), headers=self.auth(user)
+        )
+
+    def contracts_list(self, client, index):
+        return client.get(reverse('all_contracts'), headers=self.auth(index))
+
+    def reviews_list(self, client, index):
+        return client.get(reverse('reviews'))
+
+    def get_scenarios(self):
+        scenarios = {
+            'login': self.login,
+            'get_price': self.get_price,
+            'daily_income': self.daily_income,
+            'contracts': self.contracts_list,
+            'reviews': self.reviews_list,
+        }
+        if not self.contracts:
+            del scenarios['daily_income']
+        return scenarios
+
+
+def compare_with_baseline(results: dict, baseline: dict,
+                          tolerance: float = REGRESSION_TOLERANCE):
+    """
+    Сравнит прогон с базой. Вернет строки отчета
+    и список сценариев, которые стали медленнее
+    """
+    lines = []
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f'{name}: no baseline')
+            continue
+        p95_delta = (current['p95_ms'] - base['p95_ms']) / max(
+            base['p95_ms'], 1e-9
+        )
+        rps_delta = (current['rps'] - base['rps']) / max(base['rps'], 1e-9)
+        slower = p95_delta > tolerance or rps_delta < -tolerance
+        if slower:
+            regressions.append(name)
+        lines.append(
+            f'{name}: p95 {base["p95_ms"]} -> {current["p95_ms"]} ms '
+            f'({p95_delta:+.0%}), rps {base["rps"]} -> {current["rps"]} '
+            f'({rps_delta:+.0%}){" REGRESSION" if slower else ""}'
+        )
+    return lines, regressions
+
+
+def load_baseline(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file).get('scenarios', {})
@@ -0,0 +1,150 @@
+import json
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from src.benchmarks.load import (
+    APIScenarios,
+    BENCH_THROTTLE_RATES,
+    REGRESSION_TOLERANCE,
+    compare_with_baseline,
+    load_baseline,
+    local_server,
+    run_load
+)
+from src.benchmarks.seed import (
+    BENCH_PASSWORD,
+    BENCH_USERNAME_PREFIX,
+    seed_benchmark_data
+)
+
+
+SCENARIOS = ('login', 'get_price', 'daily_income', 'contracts', 'reviews')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест публичного API: заполняет базу, поднимает '
+        'локальный сервер и считает p50/p95/p99 и RPS по сценариям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--contracts-per-user', type=int, default=20)
+        parser.add_argument('--reviews', type=int, default=500)
+        parser.add_argument(
+            '--no-seed',
+            action='store_true',
+            help='Не заполнять базу, пользователи уже созданы'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Запросов на сценарий'
+        )
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Воркеров gunicorn у локального сервера'
+        )
+        parser.add_argument(
+            '--url',
+            help=(
+                'Уже запущенный сервер, иначе поднимается локальный '
+                'без лимитов запросов. Лимиты запущенного сервера '
+                'снимает переменная окружения THROTTLE_RATES'
+            )
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='Сценарий для прогона, по умолчанию все'
+        )
+        parser.add_argument('--output', help='Файл для результата в JSON')
+        parser.add_argument('--baseline', help='Результат для сравнения')
+        parser.add_argument(
+            '--tolerance', type=float, default=REGRESSION_TOLERANCE
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Завершиться с ошибкой, если сценарий стал медленнее'
+        )
+
+    def handle(self, *args, **options):
+        if options['no_seed']:
+            usernames = [
+                f'{BENCH_USERNAME_PREFIX}{index}'
+                for index in range(options['users'])
+            ]
+        else:
+            usernames = seed_benchmark_data(
+                users=options['users'],
+                contracts_per_user=options['contracts_per_user'],
+                reviews=options['reviews']
+            )
+        server = nullcontext(options['url']) if options['url'] \
+            else local_server(
+                workers=options['workers'],
+                throttle_rates=BENCH_THROTTLE_RATES
+            )
+        concurrency = options['concurrency']
+        results = {}
+        with server as base_url, httpx.Client(
+            base_url=base_url,
+            timeout=30,
+            limits=httpx.Limits(max_connections=concurrency)
+        ) as client:
+            try:
+                scenarios = APIScenarios(
+                    client, usernames, BENCH_PASSWORD
+                ).get_scenarios()
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            for name in options['scenario'] or SCENARIOS:
+                if name not in scenarios:
+                    self.stderr.write(
+                        f'{name}: skipped, the users have no contracts'
+                    )
+                    continue
+                send = scenarios[name]
+                # прогрев соединений и кэшей сервера
+                run_load(client, send, concurrency * 2, concurrency)
+                results[name] = run_load(
+                    client, send, options['requests'], concurrency
+                )
+                self.stdout.write(
+                    f'{name}: ' + ', '.join(
+                        f'{key}={value}'
+                        for key, value in results[name].items()
+                    )
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'created_at': datetime.now(tz=timezone.utc).isoformat(),
+                    'requests': options['requests'],
+                    'concurrency': concurrency,
+                    'server': options['url'] or 'local',
+                    'scenarios': results
+                }, output, indent=4)
+
+        if options['baseline']:
+            lines, regressions = compare_with_baseline(
+                results,
+                load_baseline(options['baseline']),
+                tolerance=options['tolerance']
+            )
+            for line in lines:
+                self.stdout.write(line)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(
+                    f'Slower than baseline: {", ".join(regressions)}'
+                )
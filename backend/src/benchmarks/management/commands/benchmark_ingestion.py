@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from src.benchmarks.ingestion import (
+    IngestionRun,
+    point_tasks_to,
+    preserve_network_parameters
+)
+from src.benchmarks.upstream import FakeUpstreamServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогон задач загрузки данных против локальных замен внешних '
+        'сервисов: задержка загрузки, свежесть данных и загрузка воркеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.05,
+            help='Задержка ответа сервисов, с'
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.0,
+            help='Случайная добавка к задержке до jitter секунд'
+        )
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument(
+            '--payload-size',
+            type=int,
+            default=0,
+            help='Байт лишних данных в каждом ответе'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=10,
+            help='Таймаут запросов задач, с'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Потоков воркера (concurrency Celery)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Как часто ставить задачи загрузки, с'
+        )
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--wallets-per-tick', type=int, default=0)
+        parser.add_argument('--output', help='Файл для отчета в JSON')
+
+    def handle(self, *args, **options):
+        upstream = FakeUpstreamServer(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            payload_size=options['payload_size']
+        )
+        with upstream, point_tasks_to(upstream, options['timeout']), \
+                preserve_network_parameters():
+            report = IngestionRun(
+                upstream,
+                workers=options['workers'],
+                interval=options['interval'],
+                duration=options['duration'],
+                wallets_per_tick=options['wallets_per_tick']
+            ).run()
+        content = json.dumps(report, indent=4)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content)
+        self.stdout.write(content)
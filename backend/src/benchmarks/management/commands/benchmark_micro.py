@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from src.benchmarks.micro import (
+    SIGNIFICANCE_LEVEL,
+    SLOWDOWN_THRESHOLD,
+    compare,
+    describe,
+    get_micro_benchmarks,
+    load_baselines,
+    measure,
+    save_baselines
+)
+from src.benchmarks.seed import seed_network_parameters
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарки формул, сериализаторов и рендереров '
+        'со сравнением с сохраненной базой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark',
+            action='append',
+            help='Имя бенчмарка, по умолчанию все'
+        )
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--baseline',
+            default=str(settings.BASE_DIR / 'benchmark_micro.json')
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Сохранить результат как новую базу'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=SLOWDOWN_THRESHOLD
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=SIGNIFICANCE_LEVEL
+        )
+        parser.add_argument(
+            '--fail-on-slowdown',
+            action='store_true',
+            help='Завершиться с ошибкой, если что-то стало медленнее'
+        )
+
+    def handle(self, *args, **options):
+        baselines = load_baselines(options['baseline'])
+        results = {}
+        slower = []
+        # параметры сети нужны формулам, база после замеров откатывается
+        with transaction.atomic():
+            seed_network_parameters()
+            benchmarks = get_micro_benchmarks()
+            names = options['benchmark'] or list(benchmarks)
+            unknown = set(names) - set(benchmarks)
+            if unknown:
+                raise CommandError(
+                    f'Unknown benchmarks: {", ".join(sorted(unknown))}'
+                )
+            for name in names:
+                results[name] = describe(measure(
+                    benchmarks[name],
+                    repeat=options['repeat'],
+                    warmup=options['warmup']
+                ))
+                line = (
+                    f'{name:<32} median {results[name]["median_us"]:>10.2f} us'
+                    f'  stdev {results[name]["stdev_us"]:>8.2f} us'
+                )
+                if name in baselines:
+                    comparison = compare(
+                        results[name],
+                        baselines[name],
+                        threshold=options['threshold'],
+                        alpha=options['alpha']
+                    )
+                    line += (
+                        f'  {comparison["change"]:+.1%} '
+                        f'(p={comparison["p_value"]:.3f}) '
+                        f'{comparison["verdict"].upper()}'
+                    )
+                    if comparison['verdict'] == 'slower':
+                        slower.append(name)
+                self.stdout.write(line)
+            transaction.set_rollback(True)
+
+        if options['save']:
+            save_baselines(options['baseline'], {**baselines, **results})
+            self.stdout.write(f'Baseline saved to {options["baseline"]}')
+        if slower and options['fail_on_slowdown']:
+            raise CommandError(f'Slower than baseline: {", ".join(slower)}')
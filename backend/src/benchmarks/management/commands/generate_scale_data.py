@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from src.benchmarks.scale import ScaleDataGenerator, clear_scale_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует через COPY синтетических пользователей, контракты, '
+        'отзывы и поминутную историю майнеров для нагрузочных тестов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument(
+            '--contracts-per-user',
+            type=float,
+            default=8,
+            help='Среднее число контрактов пользователя'
+        )
+        parser.add_argument('--reviews', type=int, default=100_000)
+        parser.add_argument(
+            '--miners',
+            type=int,
+            default=0,
+            help='Майнеров с поминутной историей'
+        )
+        parser.add_argument(
+            '--history-days',
+            type=int,
+            default=7,
+            help='За сколько дней генерировать историю майнеров'
+        )
+        parser.add_argument('--seed', type=int, help='Seed генератора')
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=4,
+            help='Сколько пачек писать параллельно'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить ранее сгенерированные данные'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['clear']:
+            with transaction.atomic():
+                deleted = clear_scale_data()
+            self.stdout.write(f'Deleted {deleted} generated users')
+            return
+        counts = ScaleDataGenerator(
+            seed=options['seed'], jobs=options['jobs']
+        ).generate(
+            users=options['users'],
+            contracts_per_user=options['contracts_per_user'],
+            reviews=options['reviews'],
+            miners=options['miners'],
+            history_days=options['history_days']
+        )
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write(
+            ', '.join(f'{name}={count}' for name, count in counts.items())
+        )
+        self.stdout.write(
+            f'Generated {total} rows in {elapsed:.1f}s '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s)'
+        )
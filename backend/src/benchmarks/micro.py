@@ -0,0 +1,157 @@
+import json
+import math
+import statistics
+import time
+from datetime import date, timedelta
+
+from src.application.api.v1.formulas import (
+    calculate_contract_price,
+    calculate_income_btc
+)
+from src.application.api.v1.serializers import (
+    CreateContractSerizalizer,
+    GetContractPriceSerizalizer
+)
+from src.users.api.v1.renderars import UserDataRender
+
+
+# на какую долю медиана может вырасти, не считаясь замедлением
+SLOWDOWN_THRESHOLD = 0.05
+
+# уровень значимости для теста Уэлча
+SIGNIFICANCE_LEVEL = 0.01
+
+
+def get_micro_benchmarks():
+    """
+    Горячие пути для замера: имя -> функция без аргументов
+    """
+    start = date.today() + timedelta(days=1)
+    contract_data = {
+        'hashrate': 100,
+        'contract_start': start,
+        'contract_end': start + timedelta(days=90)
+    }
+    price_data = {
+        'hashrate': '100',
+        'contract_start': start.isoformat(),
+        'contract_end': (start + timedelta(days=90)).isoformat()
+    }
+    renderer = UserDataRender()
+    user_data = {
+        'uuid': '0b5ad4a2-4b2f-4bb4-9a55-6f6d1b5f6a1e',
+        'first_name': 'Ivan',
+        'last_name': 'Ivanov',
+        'username': 'ivanov',
+        'email': 'ivanov@example.com',
+        'phone_number': '89000000000',
+        'tokens': {'refresh': 'r' * 230, 'access': 'a' * 230}
+    }
+
+    def get_contract_price_serializer():
+        serializer = GetContractPriceSerizalizer(data=price_data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.data
+
+    def create_contract_serializer():
+        serializer = CreateContractSerizalizer(data=price_data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    return {
+        'calculate_income_btc': calculate_income_btc,
+        'calculate_contract_price': lambda: calculate_contract_price(
+            contract_data
+        ),
+        'get_contract_price_serializer': get_contract_price_serializer,
+        'create_contract_serializer': create_contract_serializer,
+        'user_data_render': lambda: renderer.render(user_data),
+    }
+
+
+def calibrate(func, min_time: float = 0.01):
+    """
+    Сколько вызовов нужно, чтобы один замер длился не меньше min_time
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started >= min_time:
+            return number
+        number *= 2
+
+
+def measure(func, repeat: int = 30, warmup: int = 3, number: int = None):
+    """
+    Вернет repeat замеров времени одного вызова в мкс.
+    Первые warmup замеров отбрасываются
+    """
+    number = number or calibrate(func)
+    samples = []
+    for index in range(warmup + repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - started) / number * 10 ** 6
+        if index >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def describe(samples: list):
+    return {
+        'median_us': round(statistics.median(samples), 3),
+        'mean_us': round(statistics.fmean(samples), 3),
+        'stdev_us': round(statistics.stdev(samples), 3)
+        if len(samples) > 1 else 0,
+        'min_us': round(min(samples), 3),
+        'samples': [round(sample, 3) for sample in samples]
+    }
+
+
+def welch_p_value(current: list, baseline: list):
+    """
+    Двусторонний p-value теста Уэлча о равенстве средних.
+    Для распределения статистики берется нормальное приближение,
+    при 20+ замерах в выборке его точности хватает
+    """
+    variance = statistics.variance(current) / len(current) + \
+        statistics.variance(baseline) / len(baseline)
+    if variance == 0:
+        return 0.0 if statistics.fmean(current) != statistics.fmean(
+            baseline
+        ) else 1.0
+    t = (statistics.fmean(current) - statistics.fmean(baseline)) / \
+        math.sqrt(variance)
+    return math.erfc(abs(t) / math.sqrt(2))
+
+
+def compare(current: dict, baseline: dict,
+            threshold: float = SLOWDOWN_THRESHOLD,
+            alpha: float = SIGNIFICANCE_LEVEL):
+    """
+    Сравнит замер с базой. Вернет изменение медианы, p-value
+    и вердикт: slower, faster или same
+    """
+    change = current['median_us'] / baseline['median_us'] - 1
+    p_value = welch_p_value(current['samples'], baseline['samples'])
+    verdict = 'same'
+    if p_value < alpha and abs(change) > threshold:
+        verdict = 'slower' if change > 0 else 'faster'
+    return {'change': change, 'p_value': p_value, 'verdict': verdict}
+
+
+def load_baselines(path):
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path, results: dict):
+    with open(path, 'w') as baseline_file:
+        json.dump(results, baseline_file, indent=4, sort_keys=True)
+        baseline_file.write('\n')
@@ -0,0 +1,419 @@
+import math
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+from functools import partial
+from io import StringIO
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from src.application.models import Contract, Miner, WorkerHashrate
+from src.application.pool import HASHES_PER_DIFFICULTY
+from src.benchmarks.seed import BENCH_PASSWORD, seed_network_parameters
+from src.reviews.models import Review
+from src.reviews.moderation import delete_reviews
+from src.reviews.stats import rebuild_rating_counters
+from src.telemetry.db_commands import (
+    COPY_CHUNK_SIZE,
+    copy_telemetry,
+    ensure_telemetry_partitions
+)
+from src.telemetry.models import MinerTelemetry
+
+
+User = get_user_model()
+
+SCALE_USERNAME_PREFIX = 'scale_user_'
+SCALE_REVIEW_PREFIX = 'scale_'
+SCALE_MINER_PREFIX = 'scale-miner-'
+SCALE_WORKER_PREFIX = 'scale-worker-'
+
+# за сколько дней до сегодня регистрируются пользователи
+USERS_SPAN_DAYS = 730
+
+FIRST_NAMES = (
+    'Ivan', 'Anna', 'Petr', 'Maria', 'Alexey', 'Olga', 'Dmitry', 'Elena',
+    'Sergey', 'Natalia', 'Andrey', 'Irina', 'Pavel', 'Tatiana', 'Mikhail'
+)
+LAST_NAMES = (
+    'Ivanov', 'Petrov', 'Smirnov', 'Kuznetsov', 'Popov', 'Sokolov',
+    'Lebedev', 'Kozlov', 'Novikov', 'Morozov', 'Volkov', 'Fedorov'
+)
+
+# длительность контракта в днях -> вес
+CONTRACT_DURATIONS = {30: 40, 90: 30, 180: 20, 365: 10}
+
+# сложность одной шары воркера
+SHARE_DIFFICULTY = 2 ** 16
+
+# оценка отзыва -> вес, отзывы пишут в основном довольные и недовольные
+REVIEW_RATINGS = {5: 50, 4: 25, 3: 10, 2: 5, 1: 10}
+
+
+def _text(value: str):
+    """
+    Экранирование строки для текстового формата COPY
+    """
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace(
+        '\n', '\\n'
+    ).replace('\r', '\\r')
+
+
+def _bool(value: bool):
+    return 't' if value else 'f'
+
+
+def copy_lines(table: str, columns: tuple, lines: list):
+    """
+    Отправляет готовые строки формата COPY в таблицу
+    частями по COPY_CHUNK_SIZE строк, вернет число строк
+    """
+    sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+    total = 0
+    with connection.cursor() as cursor:
+        for offset in range(0, len(lines), COPY_CHUNK_SIZE):
+            buffer = StringIO(''.join(lines[offset:offset + COPY_CHUNK_SIZE]))
+            cursor.copy_expert(sql, buffer)
+            total += cursor.rowcount
+    return total
+
+
+def analyze(*models):
+    """
+    Обновляет статистику планировщика после массовой вставки,
+    иначе оценки строк (и EstimatedCountPaginator) врут
+    """
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+
+class ScaleDataGenerator:
+    """
+    Генератор синтетических данных для нагрузочных тестов.
+
+    Строки пишутся через COPY, пароль хешируется один раз на всех
+    пользователей. Распределения приближены к реальным: регистраций
+    больше в последние месяцы, контрактов у пользователя в среднем
+    contracts_per_user по экспоненциальному закону, хешрейт
+    логнормальный. Пользователи добавляются к уже созданным.
+
+    Данные пишутся пачками, каждая в своей транзакции. При jobs > 1
+    пачки пишутся параллельно в отдельных соединениях, у каждой пачки
+    свой генератор случайных чисел, поэтому при заданном seed
+    результат не зависит от порядка выполнения
+    """
+
+    def __init__(self, seed=None, now: datetime = None, jobs: int = 1):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.now = now or datetime.now(tz=timezone.utc)
+        self.today = self.now.date()
+        self.jobs = jobs
+
+    def fork(self, key):
+        """
+        Генератор для отдельной пачки
+        """
+        return ScaleDataGenerator(
+            seed=None if self.seed is None else f'{self.seed}:{key}',
+            now=self.now
+        )
+
+    def run_batches(self, batches: list):
+        """
+        Выполняет пачки (функции без аргументов, возвращающие кортеж
+        чисел строк) и вернет поэлементную сумму их результатов
+        """
+        def run(batch):
+            with transaction.atomic():
+                return batch()
+
+        def run_in_thread(batch):
+            try:
+                return run(batch)
+            finally:
+                connection.close()
+
+        if self.jobs > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(run_in_thread, batches))
+        else:
+            results = [run(batch) for batch in batches]
+        return tuple(map(sum, zip(*results)))
+
+    def days_ago(self, span: int):
+        """
+        Случайный сдвиг в прошлое до span дней,
+        недавние даты встречаются чаще
+        """
+        return timedelta(
+            seconds=span * 86400 * (1 - math.sqrt(self.random.random()))
+        )
+
+    def hashrate(self):
+        value = self.random.lognormvariate(math.log(50), 1)
+        return round(min(max(value, 1), 10_000), 1)
+
+    def user_lines(self, start: int, count: int, password: str):
+        """
+        Строки пользователей и их даты регистрации
+        """
+        lines = []
+        users = []
+        for index in range(start, start + count):
+            username = f'{SCALE_USERNAME_PREFIX}{index}'
+            user_uuid = str(
+                uuid.UUID(int=self.random.getrandbits(128), version=4)
+            )
+            date_joined = self.now - self.days_ago(USERS_SPAN_DAYS)
+            lines.append(
+                f'{user_uuid}\t{password}\t{username}\t'
+                f'{self.random.choice(FIRST_NAMES)}\t'
+                f'{self.random.choice(LAST_NAMES)}\t'
+                f'{username}@scale.local\t'
+                f'8{self.random.randrange(10 ** 10):010d}\t'
+                f'f\tf\tt\t{_bool(self.random.random() < 0.8)}\t'
+                f'{date_joined.isoformat()}\n'
+            )
+            users.append((user_uuid, date_joined))
+        return lines, users
+
+    def contract_lines(self, users: list, contracts_per_user: float):
+        lines = []
+        durations = [timedelta(days=days) for days in CONTRACT_DURATIONS]
+        cum_weights = list(accumulate(CONTRACT_DURATIONS.values()))
+        rand = self.random.random
+        for user_uuid, date_joined in users:
+            count = int(self.random.expovariate(1 / contracts_per_user)) \
+                if contracts_per_user else 0
+            for _ in range(count):
+                created_at = date_joined + (
+                    self.now - date_joined
+                ) * rand()
+                start = created_at.date() + timedelta(
+                    days=int(rand() * 14) + 1
+                )
+                end = start + self.random.choices(
+                    durations, cum_weights=cum_weights
+                )[0]
+                is_paid = rand() < 0.9
+                # как в Contract.get_current_status
+                if end <= self.today:
+                    status = Contract.Status.EXPIRED.value
+                elif is_paid and start <= self.today:
+                    status = Contract.Status.ACTIVE.value
+                else:
+                    status = Contract.Status.PENDING.value
+                # строк HashrateCapacity не создается, поэтому хешрейт
+                # не зарезервирован, иначе снятие резерва уведет
+                # reserved в минус
+                lines.append(
+                    f'{user_uuid}\t{self.hashrate()}\t{start}\t{end}\t'
+                    f'{_bool(is_paid)}\tf\tf\t{status}\t'
+                    f'{created_at.isoformat()}\n'
+                )
+        return lines
+
+    def users_batch(self, start: int, count: int, password: str,
+                    contracts_per_user: float):
+        lines, users = self.user_lines(start, count, password)
+        created_users = copy_lines(User._meta.db_table, (
+            'uuid', 'password', 'username', 'first_name', 'last_name',
+            'email', 'phone_number', 'is_superuser', 'is_staff',
+            'is_active', 'is_confirm', 'date_joined'
+        ), lines)
+        created_contracts = copy_lines(Contract._meta.db_table, (
+            'customer_id', 'hashrate', 'contract_start', 'contract_end',
+            'is_paid', 'capacity_reserved', 'capacity_shortfall', 'status',
+            'created_at'
+        ), self.contract_lines(users, contracts_per_user))
+        return created_users, created_contracts
+
+    def generate_users(self, users: int, contracts_per_user: float,
+                       batch_size: int = 50_000):
+        """
+        Создает users пользователей с контрактами.
+        Вернет число созданных пользователей и контрактов
+        """
+        if not users:
+            return 0, 0
+        start = User.objects.filter(
+            username__startswith=SCALE_USERNAME_PREFIX
+        ).count()
+        password = make_password(BENCH_PASSWORD)
+        return self.run_batches([
+            partial(
+                self.fork(f'users:{offset}').users_batch,
+                offset,
+                min(batch_size, start + users - offset),
+                password,
+                contracts_per_user
+            )
+            for offset in range(start, start + users, batch_size)
+        ])
+
+    def reviews_batch(self, start: int, count: int):
+        cum_weights = list(accumulate(REVIEW_RATINGS.values()))
+        words = LAST_NAMES + FIRST_NAMES
+        lines = []
+        for index in range(start, start + count):
+            text = ' '.join(self.random.choices(
+                words, k=max(int(self.random.expovariate(1 / 40)), 3)
+            ))
+            rating = self.random.choices(
+                list(REVIEW_RATINGS), cum_weights=cum_weights
+            )[0]
+            created_at = self.now - self.days_ago(USERS_SPAN_DAYS)
+            lines.append(
+                f'{self.random.choice(FIRST_NAMES)}\t'
+                f'{SCALE_REVIEW_PREFIX}{index}\t'
+                f'8{self.random.randrange(10 ** 10):010d}\t'
+                f'{_text(text)}\t{rating}\t{created_at.isoformat()}\t'
+                f'{_bool(self.random.random() < 0.8)}\n'
+            )
+        created = copy_lines(Review._meta.db_table, (
+            'first_name', 'last_name', 'phone_number', 'text', 'rating',
+            'created_at', 'is_published'
+        ), lines)
+        return (created,)
+
+    def generate_reviews(self, reviews: int, batch_size: int = 50_000):
+        if not reviews:
+            return 0
+        created, = self.run_batches([
+            partial(
+                self.fork(f'reviews:{offset}').reviews_batch,
+                offset,
+                min(batch_size, reviews - offset)
+            )
+            for offset in range(0, reviews, batch_size)
+        ])
+        # COPY идет в обход сигналов, счетчики оценок
+        # и кэш отзывов пересчитываются один раз
+        rebuild_rating_counters()
+        return created
+
+    def generate_history(self, miners: int, days: int):
+        """
+        Поминутная история майнеров за days дней до сегодня:
+        телеметрия и статистика воркеров пула.
+        Прежняя история сгенерированных майнеров удаляется
+        """
+        if not miners or not days:
+            return 0, 0
+        Miner.objects.bulk_create([
+            Miner(
+                name=f'{SCALE_MINER_PREFIX}{index}',
+                worker_name=f'{SCALE_WORKER_PREFIX}{index}',
+                hashrate=self.random.choice((100, 110, 140, 200))
+            )
+            for index in range(miners)
+        ], ignore_conflicts=True)
+        scale_miners = list(Miner.objects.filter(
+            name__startswith=SCALE_MINER_PREFIX
+        ).order_by('id')[:miners])
+
+        first_day = self.today - timedelta(days=days)
+        since = datetime.combine(first_day, time(), tzinfo=timezone.utc)
+        ensure_telemetry_partitions(days_ahead=days, start=first_day)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {MinerTelemetry._meta.db_table} '
+                f'WHERE miner_id = ANY(%s)',
+                [[miner.id for miner in scale_miners]]
+            )
+        WorkerHashrate.objects.filter(
+            worker_name__startswith=SCALE_WORKER_PREFIX
+        ).delete()
+
+        return self.run_batches([
+            partial(
+                self.fork(f'miner:{miner.id}').miner_history,
+                miner,
+                since,
+                days * 1440
+            )
+            for miner in scale_miners
+        ])
+
+    def miner_history(self, miner: Miner, since: datetime, minutes: int):
+        samples = []
+        lines = []
+        # доля времени, когда майнер выдает номинальный хешрейт
+        health = self.random.uniform(0.9, 1)
+        for minute in range(minutes):
+            recorded_at = since + timedelta(minutes=minute)
+            online = self.random.random() < health
+            hashrate = self.random.gauss(
+                miner.hashrate, miner.hashrate * 0.03
+            ) if online else 0
+            samples.append({
+                'miner': miner.id,
+                'ts': recorded_at.timestamp(),
+                'hashrate': hashrate,
+                'temperature': self.random.gauss(70, 4) if online else 35,
+                'power': self.random.gauss(3250, 60) if online else 10,
+            })
+            difficulty = hashrate * 10 ** 12 * 60 / HASHES_PER_DIFFICULTY
+            lines.append(
+                f'{miner.worker_name}\t{recorded_at.isoformat()}\t'
+                f'{int(difficulty / SHARE_DIFFICULTY)}\t{difficulty}\n'
+            )
+        return copy_telemetry(samples), copy_lines(
+            WorkerHashrate._meta.db_table,
+            ('worker_name', 'minute', 'shares', 'difficulty'),
+            lines
+        )
+
+    def generate(self, users: int = 0, contracts_per_user: float = 8,
+                 reviews: int = 0, miners: int = 0, history_days: int = 0):
+        seed_network_parameters()
+        created_users, contracts = self.generate_users(
+            users, contracts_per_user
+        )
+        counts = {
+            'users': created_users,
+            'contracts': contracts,
+            'reviews': self.generate_reviews(reviews),
+        }
+        counts['telemetry'], counts['worker_stats'] = self.generate_history(
+            miners, history_days
+        )
+        analyze(User, Contract, Review, WorkerHashrate, MinerTelemetry)
+        return counts
+
+
+def clear_scale_data():
+    """
+    Удаляет все сгенерированные данные
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Contract._meta.db_table} WHERE customer_id IN '
+            f'(SELECT uuid FROM {User._meta.db_table} WHERE username LIKE %s)',
+            [f'{SCALE_USERNAME_PREFIX}%']
+        )
+        cursor.execute(
+            f'DELETE FROM {MinerTelemetry._meta.db_table} WHERE miner_id IN '
+            f'(SELECT id FROM {Miner._meta.db_table} WHERE name LIKE %s)',
+            [f'{SCALE_MINER_PREFIX}%']
+        )
+    users = User.objects.filter(username__startswith=SCALE_USERNAME_PREFIX)
+    pks = list(users.values_list('pk', flat=True))
+    for offset in range(0, len(pks), COPY_CHUNK_SIZE):
+        User.objects.filter(
+            pk__in=pks[offset:offset + COPY_CHUNK_SIZE]
+        ).delete()
+    delete_reviews(
+        Review.objects.filter(last_name__startswith=SCALE_REVIEW_PREFIX)
+    )
+    WorkerHashrate.objects.filter(
+        worker_name__startswith=SCALE_WORKER_PREFIX
+    ).delete()
+    Miner.objects.filter(name__startswith=SCALE_MINER_PREFIX).delete()
+    return len(pks)
@@ -0,0 +1,111 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from src.application.models import (
+    Contract,
+    CryptocurrencyToUsdtExchange,
+    Difficulty,
+    MaintenanceCost,
+    RentalThCost,
+    Reward
+)
+from src.reviews.models import Review
+from src.reviews.stats import rebuild_rating_counters
+
+
+User = get_user_model()
+
+BENCH_USERNAME_PREFIX = 'bench_user_'
+BENCH_PASSWORD = 'Bench-Pa55word!'
+BENCH_REVIEW_NAME = 'bench'
+
+
+def seed_network_parameters():
+    """
+    Параметры сети и цены, без которых не считаются стоимость
+    и доход. Уже загруженные значения не перезаписываются
+    """
+    Difficulty.objects.get_or_create(
+        id='difficulty', defaults={'difficulty': 57 * 10 ** 12}
+    )
+    Reward.objects.get_or_create(
+        id='reward_block', defaults={'reward_block': 6.25}
+    )
+    MaintenanceCost.objects.get_or_create(
+        id='maintenance_cost', defaults={'cost': 0.05}
+    )
+    RentalThCost.objects.get_or_create(
+        id='th_rental_cost', defaults={'cost': 0.000001}
+    )
+    CryptocurrencyToUsdtExchange.objects.get_or_create(
+        id='btc', defaults={'usdt': 30_000}
+    )
+    CryptocurrencyToUsdtExchange.objects.get_or_create(
+        id='eth', defaults={'usdt': 1_800}
+    )
+
+
+@transaction.atomic
+def seed_benchmark_data(users: int = 50, contracts_per_user: int = 20,
+                        reviews: int = 500):
+    """
+    Заполняет базу данными для нагрузочного теста и вернет
+    имена пользователей. Повторный запуск досоздает недостающее
+    """
+    seed_network_parameters()
+    usernames = [f'{BENCH_USERNAME_PREFIX}{index}' for index in range(users)]
+    existing = set(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', flat=True))
+    # хешируем пароль один раз, PBKDF2 на каждого пользователя слишком долго
+    password = make_password(BENCH_PASSWORD)
+    created = User.objects.bulk_create([
+        User(
+            username=username,
+            email=f'{username}@bench.local',
+            password=password,
+            is_confirm=True
+        )
+        for username in usernames if username not in existing
+    ])
+
+    today = date.today()
+    contracts = []
+    for user in created:
+        for _ in range(contracts_per_user):
+            start = today - timedelta(days=random.randint(0, 180))
+            contracts.append(Contract(
+                customer=user,
+                hashrate=random.choice((10, 25, 50, 100, 250)),
+                contract_start=start,
+                contract_end=start + timedelta(
+                    days=random.choice((30, 90, 180, 365))
+                ),
+                is_paid=True
+            ))
+    for contract in contracts:
+        contract.status = contract.get_current_status(today)
+    Contract.objects.bulk_create(contracts, batch_size=5000)
+
+    missing_reviews = reviews - Review.objects.filter(
+        first_name=BENCH_REVIEW_NAME
+    ).count()
+    Review.objects.bulk_create([
+        Review(
+            first_name=BENCH_REVIEW_NAME,
+            last_name=f'reviewer_{index}',
+            phone_number='80000000000',
+            text='Benchmark review ' * random.randint(1, 20),
+            rating=random.randint(1, 5),
+            is_published=random.random() < 0.9
+        )
+        for index in range(max(missing_reviews, 0))
+    ], batch_size=5000)
+    # bulk_create идет в обход сигналов, счетчики оценок
+    # и кэш отзывов пересчитываются один раз
+    rebuild_rating_counters()
+    return usernames
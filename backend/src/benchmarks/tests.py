@@ -0,0 +1,297 @@
+import httpx
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from src.application.models import Contract, Difficulty, WorkerHashrate
+from src.benchmarks.ingestion import (
+    IngestionRun,
+    point_tasks_to,
+    preserve_network_parameters
+)
+from src.benchmarks.load import (
+    APIScenarios,
+    compare_with_baseline,
+    summarize
+)
+from src.benchmarks.micro import (
+    compare,
+    describe,
+    get_micro_benchmarks,
+    measure
+)
+from src.benchmarks.scale import (
+    SCALE_USERNAME_PREFIX,
+    ScaleDataGenerator,
+    clear_scale_data
+)
+from src.benchmarks.seed import (
+    BENCH_PASSWORD,
+    seed_benchmark_data,
+    seed_network_parameters
+)
+from src.benchmarks.upstream import FakeUpstreamServer
+from src.reviews.models import Review, ReviewRatingCounter
+from src.reviews.stats import get_rating_stats
+from src.telemetry.models import MinerTelemetry
+
+
+User = get_user_model()
+
+
+class FakeAPIClient:
+    """
+    Клиент без сервера: вход всегда успешен, контракты
+    есть только у пользователей из with_contracts
+    """
+
+    def __init__(self, with_contracts=()):
+        self.with_contracts = with_contracts
+        self.logins = 0
+
+    def response(self, method, data):
+        return httpx.Response(
+            200, json=data, request=httpx.Request(method, 'http://bench')
+        )
+
+    def post(self, url, data=None):
+        self.logins += 1
+        return self.response('POST', {
+            'data': {'tokens': {'access': str(self.logins)}}
+        })
+
+    def get(self, url, headers=None):
+        token = headers['Authorization'].split()[-1]
+        contracts = [{'id': 1}] if token in self.with_contracts else []
+        return self.response('GET', {'results': contracts})
+
+
+class LoadReportTestCase(SimpleTestCase):
+
+    def test_summarize(self):
+        """
+        Проверяет перцентили задержки, ошибки и RPS прогона
+        """
+        summary = summarize(
+            latencies=[index / 1000 for index in range(1, 101)],
+            errors=2,
+            elapsed=2
+        )
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['rps'], 50)
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p99_ms'], 99.01)
+
+    def test_compare_with_baseline(self):
+        """
+        Проверяет, что регрессией считается рост p95 выше допуска,
+        а сценарии без базы только отмечаются в отчете
+        """
+        baseline = {
+            'reviews': {'p95_ms': 10, 'rps': 100},
+            'login': {'p95_ms': 100, 'rps': 10},
+        }
+        lines, regressions = compare_with_baseline({
+            'reviews': {'p95_ms': 11, 'rps': 95},
+            'login': {'p95_ms': 150, 'rps': 10},
+            'contracts': {'p95_ms': 5, 'rps': 10},
+        }, baseline)
+        self.assertEqual(regressions, ['login'])
+        self.assertEqual(lines[-1], 'contracts: no baseline')
+
+
+    def test_users_without_contracts(self):
+        """
+        Проверяет, что daily_income ходит только от пользователей
+        с контрактами и пропускается, если контрактов нет
+        """
+        scenarios = APIScenarios(
+            FakeAPIClient(), ['first', 'second'], 'password'
+        ).get_scenarios()
+        self.assertNotIn('daily_income', scenarios)
+
+        scenarios = APIScenarios(
+            FakeAPIClient(with_contracts=('2',)), ['first', 'second'],
+            'password'
+        )
+        self.assertEqual(scenarios.contracts, [(1, 1)])
+
+
+class SeedBenchmarkDataTestCase(TestCase):
+
+    def test_seed_is_idempotent(self):
+        """
+        Проверяет, что повторное наполнение не создает
+        дубликаты пользователей, контрактов и отзывов
+        """
+        usernames = seed_benchmark_data(
+            users=3, contracts_per_user=2, reviews=5
+        )
+        seed_benchmark_data(users=3, contracts_per_user=2, reviews=5)
+        self.assertEqual(
+            User.objects.filter(username__in=usernames).count(), 3
+        )
+        self.assertEqual(Contract.objects.count(), 6)
+        self.assertEqual(Review.objects.count(), 5)
+        self.assertEqual(
+            get_rating_stats()['count'],
+            Review.objects.filter(is_published=True).count()
+        )
+
+
+class MicroBenchmarkTestCase(TestCase):
+
+    def test_benchmarks_run(self):
+        """
+        Проверяет, что все микробенчмарки выполняются
+        и возвращают нужное число замеров
+        """
+        seed_network_parameters()
+        for name, func in get_micro_benchmarks().items():
+            with self.subTest(benchmark=name):
+                samples = measure(func, repeat=3, warmup=1, number=2)
+                self.assertEqual(len(samples), 3)
+
+    def test_compare(self):
+        """
+        Проверяет, что замедлением считается только значимое
+        и достаточно большое изменение
+        """
+        baseline = describe([100 + index % 5 for index in range(30)])
+        slower = describe([130 + index % 5 for index in range(30)])
+        small = describe([103 + index % 5 for index in range(30)])
+        noisy = describe([90, 200, 95, 180, 85])
+        self.assertEqual(compare(slower, baseline)['verdict'], 'slower')
+        self.assertEqual(compare(baseline, slower)['verdict'], 'faster')
+        self.assertEqual(compare(small, baseline)['verdict'], 'same')
+        self.assertEqual(compare(noisy, baseline)['verdict'], 'same')
+
+
+class ScaleDataGeneratorTestCase(TestCase):
+
+    def test_generate(self):
+        """
+        Проверяет генерацию данных для нагрузочных тестов:
+        число записей, статусы контрактов, счетчики оценок
+        и удаление сгенерированных данных
+        """
+        counts = ScaleDataGenerator(seed=1).generate(
+            users=120,
+            contracts_per_user=3,
+            reviews=50,
+            miners=2,
+            history_days=1
+        )
+        users = User.objects.filter(username__startswith=SCALE_USERNAME_PREFIX)
+        self.assertEqual(counts['users'], 120)
+        self.assertEqual(users.count(), 120)
+        self.assertEqual(
+            Contract.objects.filter(customer__in=users).count(),
+            counts['contracts']
+        )
+        self.assertGreater(counts['contracts'], 0)
+        self.assertEqual(Review.objects.count(), 50)
+        self.assertEqual(
+            get_rating_stats()['count'],
+            Review.objects.filter(is_published=True).count()
+        )
+        self.assertEqual(counts['telemetry'], 2 * 1440)
+        self.assertEqual(MinerTelemetry.objects.count(), 2 * 1440)
+        self.assertEqual(WorkerHashrate.objects.count(), 2 * 1440)
+        self.assertTrue(users.first().check_password(BENCH_PASSWORD))
+        for contract in Contract.objects.all()[:50]:
+            self.assertEqual(contract.status, contract.get_current_status())
+            self.assertGreater(
+                contract.contract_start, contract.created_at.date()
+            )
+        # резерв хешрейта по дням не генерируется
+        self.assertFalse(
+            Contract.objects.filter(capacity_reserved=True).exists()
+        )
+
+        # повторный запуск добавляет пользователей к созданным
+        ScaleDataGenerator(seed=1).generate(users=10)
+        self.assertEqual(users.count(), 130)
+
+        self.assertEqual(clear_scale_data(), 130)
+        self.assertFalse(users.exists())
+        self.assertFalse(Contract.objects.exists())
+        self.assertFalse(WorkerHashrate.objects.exists())
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(get_rating_stats()['count'], 0)
+        self.assertFalse(ReviewRatingCounter.objects.filter(
+            count__lt=0
+        ).exists())
+
+    def test_same_seed_same_data(self):
+        """
+        Проверяет, что с одним seed генерируются одинаковые данные
+        """
+        now = timezone.now()
+        first = ScaleDataGenerator(seed=7, now=now).fork('users:0')
+        second = ScaleDataGenerator(seed=7, now=now).fork('users:0')
+        lines, users = first.user_lines(0, 10, 'password')
+        self.assertEqual(lines, second.user_lines(0, 10, 'password')[0])
+        self.assertEqual(
+            first.contract_lines(users, 5), second.contract_lines(users, 5)
+        )
+
+
+class IngestionRunTestCase(TransactionTestCase):
+    """
+    Задачи выполняются в потоках со своими соединениями,
+    поэтому данные должны быть закоммичены
+    """
+
+    def run_ingestion(self, upstream, timeout: float):
+        with upstream, point_tasks_to(upstream, timeout), \
+                preserve_network_parameters():
+            return IngestionRun(
+                upstream,
+                workers=2,
+                interval=0.2,
+                duration=0.5,
+                wallets_per_tick=1
+            ).run()
+
+    def test_values_are_ingested(self):
+        """
+        Проверяет, что все источники опрашиваются каждый такт,
+        а параметры сети после прогона восстанавливаются
+        """
+        seed_network_parameters()
+        report = self.run_ingestion(FakeUpstreamServer(latency=0.01), 5)
+        for source in ('block', 'btc', 'eth', 'wallet'):
+            with self.subTest(source=source):
+                stats = report['sources'][source]
+                self.assertEqual(stats['runs'], 3)
+                self.assertEqual(stats['succeeded'], 3)
+        self.assertIsNotNone(report['sources']['btc']['freshness_max_ms'])
+        self.assertEqual(report['upstream']['/price/btc 200'], 3)
+        # после прогона параметры сети возвращаются
+        self.assertEqual(
+            Difficulty.objects.get(id='difficulty').difficulty, 57 * 10 ** 12
+        )
+
+    def test_slow_upstream_is_abandoned(self):
+        """
+        Проверяет, что запросы к медленному внешнему сервису
+        прерываются по таймауту
+        """
+        seed_network_parameters()
+        report = self.run_ingestion(FakeUpstreamServer(latency=0.5), 0.1)
+        for source in ('block', 'btc', 'eth', 'wallet'):
+            with self.subTest(source=source):
+                self.assertEqual(report['sources'][source]['succeeded'], 0)
+        self.assertIsNone(report['sources']['eth']['freshness_max_ms'])
+
+    def test_upstream_errors(self):
+        """
+        Проверяет учет ошибок внешнего сервиса
+        """
+        seed_network_parameters()
+        report = self.run_ingestion(
+            FakeUpstreamServer(latency=0, error_rate=1), 5
+        )
+        self.assertEqual(report['sources']['block']['succeeded'], 0)
+        self.assertEqual(report['upstream']['/rpc 500'], 3)
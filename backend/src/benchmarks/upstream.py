@@ -0,0 +1,136 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeUpstreamServer:
+    """
+    Локальная замена внешних сервисов, с которыми работают задачи:
+    JSON-RPC getblock.io (LAST_BLOCK_DATA), курсы BTC и ETH
+    (BTC_TO_USD, ETH_TO_USD) и создание кошелька (BASE_URL).
+
+    Задержка ответа, доля ошибок и размер ответа настраиваются.
+    Каждое отданное значение уникально и запоминается вместе со
+    временем выдачи, чтобы считать свежесть данных в базе
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0,
+                 error_rate: float = 0.0, payload_size: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.counter = 0
+        # отданное значение -> время выдачи (time.time())
+        self.issued = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.get_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def urls(self):
+        return {
+            'LAST_BLOCK_DATA': f'{self.base_url}/rpc',
+            'BTC_TO_USD': f'{self.base_url}/price/btc',
+            'ETH_TO_USD': f'{self.base_url}/price/eth',
+            'BASE_URL': self.base_url,
+        }
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def issue_value(self, base: float):
+        """
+        Новое уникальное значение, запоминается время его выдачи
+        """
+        with self.lock:
+            self.counter += 1
+            value = base + self.counter
+            self.issued[value] = time.time()
+        return value
+
+    def respond(self, path: str):
+        """
+        Вернет код ответа и тело для пути запроса
+        """
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if random.random() < self.error_rate:
+            return 500, {'error': 'Injected upstream error'}
+        if path == '/rpc':
+            body = {
+                'jsonrpc': '2.0',
+                'id': 'getblock.io',
+                'result': {
+                    'difficulty': self.issue_value(57 * 10 ** 12),
+                    'blocks': 800_000
+                }
+            }
+        elif path == '/price/btc':
+            body = {'symbol': 'BTCUSDT', 'price': self.issue_value(30_000)}
+        elif path == '/price/eth':
+            body = {'symbol': 'ETHUSDT', 'price': self.issue_value(1_800)}
+        elif path.startswith('/api/v1/users/create'):
+            return 201, {'wallet': 'created'}
+        else:
+            return 404, {'error': 'Not found'}
+        if self.payload_size:
+            body['padding'] = 'x' * self.payload_size
+        return 200, body
+
+    def get_handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                status, body = upstream.respond(self.path)
+                with upstream.lock:
+                    upstream.stats[f'{self.path} {status}'] += 1
+                content = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                except (BrokenPipeError, ConnectionResetError):
+                    # клиент не дождался ответа по таймауту
+                    with upstream.lock:
+                        upstream.stats[f'{self.path} abandoned'] += 1
+
+            do_GET = handle_request
+            do_POST = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from src.responses import call_after_response
+
+
+logger = logging.getLogger(__name__)
+
+# на сколько секунд ключ закрепляется за пересчитывающим процессом;
+# если процесс упал, через это время пересчитает другой
+REFRESH_LOCK_TIMEOUT = 30
+
+# сколько секунд промах ждет, пока значение посчитает другой
+# процесс, и как часто проверяет кэш
+MISS_WAIT_TIMEOUT = 2
+MISS_WAIT_INTERVAL = 0.05
+
+# заголовок ответа: hit, stale или miss
+CACHE_STATUS_HEADER = 'X-Cache'
+
+
+def get_response_cache_key(key_prefix: str, request):
+    """
+    Ключ ответа: путь с параметрами запроса
+    """
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(f'{request.path}|{query}'.encode()).hexdigest()
+    return f'response:{key_prefix}:{digest}'
+
+
+def get_generation_key(key_prefix: str):
+    return f'response:{key_prefix}:generation'
+
+
+def invalidate_responses(key_prefix: str):
+    """
+    Делает недействительными все закэшированные ответы key_prefix:
+    увеличивает поколение, ответы прошлых поколений не отдаются.
+    Ответ, который считался во время вызова, сохранится
+    со старым поколением и тоже не будет отдан
+    """
+    key = get_generation_key(key_prefix)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ удалили между add и incr
+        cache.set(key, 1, None)
+
+
+def render_entry(response, fresh_timeout: int, generation: int):
+    """
+    Ответ DRF в виде, который кладется в кэш
+    """
+    response.render()
+    return {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'fresh_until': time.time() + fresh_timeout,
+        'generation': generation,
+    }
+
+
+def entry_response(entry: dict, status: str):
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    response[CACHE_STATUS_HEADER] = status
+    return response
+
+
+def cache_response(key_prefix: str, timeout: int, stale_timeout: int):
+    """
+    Кэширует ответы 200 публичного GET-метода view.
+
+    timeout секунд ответ свежий и отдается из кэша. Еще
+    stale_timeout секунд после этого отдается устаревший ответ,
+    а пересчитывает его первый запрос, получивший блокировку
+    ключа, — уже после отправки своего ответа клиенту.
+    При промахе считает тоже один процесс, остальные ждут
+    его результат до MISS_WAIT_TIMEOUT секунд.
+    Сбросить кэш view — invalidate_responses(key_prefix).
+
+    Ответ не зависит от пользователя, поэтому декоратор
+    подходит только для публичных view. Кэшируется только JSON:
+    страница Browsable API показывает пользователя
+    """
+    def decorator(method):
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.accepted_renderer.format != 'json':
+                return method(view, request, *args, **kwargs)
+            key = get_response_cache_key(key_prefix, request)
+            lock_key = f'{key}:lock'
+            generation_key = get_generation_key(key_prefix)
+            # ответ и поколение читаются одним запросом к кэшу
+            values = cache.get_many([key, generation_key])
+            generation = values.get(generation_key, 0)
+            entry = values.get(key)
+            if entry is not None and entry['generation'] != generation:
+                entry = None
+
+            def compute():
+                response = method(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    view.finalize_response(
+                        request, response, *args, **kwargs
+                    )
+                    cache.set(
+                        key, render_entry(response, timeout, generation),
+                        timeout + stale_timeout
+                    )
+                return response
+
+            def refresh():
+                try:
+                    compute()
+                except Exception:
+                    logger.exception('Response cache refresh failed')
+                finally:
+                    cache.delete(lock_key)
+
+            if entry is not None:
+                response = entry_response(entry, 'hit')
+                if entry['fresh_until'] <= time.time():
+                    response[CACHE_STATUS_HEADER] = 'stale'
+                    if cache.add(lock_key, 1, REFRESH_LOCK_TIMEOUT):
+                        call_after_response(response, refresh)
+                return response
+
+            if not cache.add(lock_key, 1, REFRESH_LOCK_TIMEOUT):
+                deadline = time.monotonic() + MISS_WAIT_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(MISS_WAIT_INTERVAL)
+                    values = cache.get_many([key, lock_key])
+                    entry = values.get(key)
+                    if entry and entry['generation'] == generation:
+                        return entry_response(entry, 'hit')
+                    # ответ не закэширован (не 200), ждать нечего
+                    if lock_key not in values:
+                        break
+                return method(view, request, *args, **kwargs)
+            try:
+                response = compute()
+            finally:
+                cache.delete(lock_key)
+            response[CACHE_STATUS_HEADER] = 'miss'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,43 @@
+import json
+
+from django.contrib import admin
+from django.utils.html import format_html
+from src.monitoring.models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at',
+        'source',
+        'duration_ms',
+        'plan_analyzed',
+        'short_sql'
+    )
+    list_filter = ('plan_analyzed',)
+    search_fields = ('source', 'sql')
+    fields = (
+        'created_at',
+        'source',
+        'duration_ms',
+        'sql',
+        'plan_analyzed',
+        'formatted_plan'
+    )
+    readonly_fields = fields
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description='План')
+    def formatted_plan(self, obj):
+        if obj.plan is None:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(obj.plan, indent=2))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
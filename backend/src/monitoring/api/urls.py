@@ -0,0 +1,7 @@
+from django.urls import path, include
+from src.monitoring.api.v1.views import MetricsView
+
+urlpatterns = [
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('api/v1/monitoring/', include('src.monitoring.api.v1.urls')),
+]
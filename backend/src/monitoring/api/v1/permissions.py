@@ -0,0 +1,43 @@
+import hmac
+import os
+
+from django.contrib.auth.models import AnonymousUser
+from dotenv import load_dotenv
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import BasePermission
+
+
+load_dotenv()
+
+# токен, с которым Prometheus читает /metrics;
+# без него метрики доступны только персоналу
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+METRICS_AUTH = 'metrics_token'
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Authorization: Bearer <METRICS_TOKEN>. Любой другой
+    токен передается дальше, в JWT-аутентификацию
+    """
+
+    def authenticate(self, request):
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        scheme, _, token = header.partition(' ')
+        if METRICS_TOKEN and scheme == 'Bearer' and hmac.compare_digest(
+            token.encode(), METRICS_TOKEN.encode()
+        ):
+            return AnonymousUser(), METRICS_AUTH
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+class HasMetricsAccess(BasePermission):
+
+    def has_permission(self, request, view):
+        return request.auth == METRICS_AUTH or bool(
+            request.user and request.user.is_staff
+        )
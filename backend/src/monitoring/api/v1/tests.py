@@ -0,0 +1,792 @@
+import json
+import os
+import pstats
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.urls import reverse
+from rest_framework.throttling import AnonRateThrottle
+from src.application import tasks as application_tasks
+from src.application.models import Contract, Difficulty
+from src.benchmarks.ingestion import point_tasks_to
+from src.benchmarks.upstream import FakeUpstreamServer
+from src.monitoring import profiling, signals, slow_queries, timing, tracing
+from src.monitoring.api.v1 import permissions
+from src.monitoring.middleware import ServerTimingMiddleware
+from src.monitoring.metrics import Histogram, MetricsRegistry, registry
+from src.monitoring.models import SlowQuery
+from src.monitoring.timing import (
+    RequestTimings,
+    ViewHistograms,
+    current_timings,
+    view_histograms
+)
+from src.tests import CreateUsersTestCase
+from src.users import tasks as users_tasks
+
+
+User = get_user_model()
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class ServerTimingTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        view_histograms.reset()
+        self.create_token()
+        self.auth_data = {
+            'Authorization': f'Bearer {self.users["user_1"]["token"]}'
+        }
+        return result
+
+    def test_server_timing_header(self):
+        """
+        Проверяет, что сотрудник получает в Server-Timing число
+        и время SQL-запросов, а остальные не получают заголовок
+        """
+        response = self.client.get(
+            path=reverse('all_contracts'), headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+        response = self.client.get(path=reverse('reviews'))
+        self.assertNotIn('Server-Timing', response)
+
+        User.objects.filter(
+            username=self.users['user_1']['username']
+        ).update(is_staff=True)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                path=reverse('all_contracts'), headers=self.auth_data
+            )
+        self.assertEqual(response.status_code, 200)
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(
+            list(metrics), ['total', 'db', 'cache', 'view', 'render']
+        )
+        self.assertEqual(
+            metrics['db']['desc'], f'"{len(queries)} queries"'
+        )
+        self.assertGreaterEqual(
+            float(metrics['total']['dur']), float(metrics['db']['dur'])
+        )
+
+    def test_view_timings(self):
+        """
+        Проверяет, что гистограммы копятся для всех запросов,
+        а читать и сбрасывать их может только сотрудник
+        """
+        self.client.get(path=reverse('reviews'))
+        self.client.get(path=reverse('reviews'))
+        response = self.client.get(
+            path=reverse('view_timings'), headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 403)
+
+        User.objects.filter(
+            username=self.users['user_1']['username']
+        ).update(is_staff=True)
+        response = self.client.get(
+            path=reverse('view_timings'), headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 200)
+        views = {row['view']: row for row in response.json()['views']}
+        self.assertEqual(views['GET reviews']['count'], 2)
+        self.assertEqual(
+            sum(views['GET reviews']['histogram'].values()), 2
+        )
+
+        response = self.client.delete(
+            path=reverse('view_timings'), headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            [row['view'] for row in view_histograms.snapshot()],
+            ['DELETE view_timings']
+        )
+
+
+class TimingsTestCase(SimpleTestCase):
+
+    def test_cache_access_is_counted(self):
+        """
+        Проверяет, что обращения к кэшу в запросе считаются
+        попаданиями и промахами
+        """
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            cache.set('monitoring_test', 1)
+            self.assertEqual(cache.get('monitoring_test'), 1)
+            self.assertIsNone(cache.get('monitoring_missing'))
+            self.assertEqual(
+                cache.get_many(['monitoring_test', 'monitoring_missing']),
+                {'monitoring_test': 1}
+            )
+        finally:
+            current_timings.reset(token)
+            cache.delete('monitoring_test')
+        self.assertEqual(timings.cache_hits, 2)
+        self.assertEqual(timings.cache_misses, 2)
+
+    def test_quantiles(self):
+        """
+        Проверяет квантили времени ответа по корзинам гистограммы
+        """
+        histograms = ViewHistograms(buckets=(10, 100))
+        for total in (0.005, 0.005, 0.05, 0.5):
+            timings = RequestTimings()
+            timings.total = total
+            histograms.observe('GET view', timings)
+        stats, = histograms.snapshot()
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['p50_ms'], 10)
+        self.assertEqual(stats['p95_ms'], None)
+        self.assertEqual(
+            stats['histogram'], {'10': 2, '100': 1, '+Inf': 1}
+        )
+
+
+@skipUnless(
+    settings.CACHES['default']['BACKEND'].endswith('InstrumentedRedisCache'),
+    'Cache is not in Redis'
+)
+class RedisCacheTestCase(SimpleTestCase):
+
+    def get_redis(self):
+        return cache._cache.get_client(write=True)
+
+    def test_clear_keeps_foreign_keys(self):
+        """
+        Проверяет, что очистка кэша удаляет ключи всех версий
+        и не трогает чужие ключи в той же базе Redis
+        """
+        redis = self.get_redis()
+        redis.set('monitoring_foreign', 1)
+        try:
+            cache.set('monitoring_test', 1)
+            cache.set('monitoring_test', 2, version=2)
+            cache.clear()
+            self.assertIsNone(cache.get('monitoring_test'))
+            self.assertIsNone(cache.get('monitoring_test', version=2))
+            self.assertEqual(redis.get('monitoring_foreign'), b'1')
+        finally:
+            redis.delete('monitoring_foreign')
+
+    def test_key_namespace(self):
+        """
+        Проверяет, что ключи кэша хранятся с префиксом и версией
+        """
+        cache.set('monitoring_test', 1)
+        try:
+            key = f'{cache.key_prefix}:{cache.version}:monitoring_test'
+            self.assertEqual(self.get_redis().get(key), b'1')
+        finally:
+            cache.delete('monitoring_test')
+
+    def test_pool_is_shared_between_threads(self):
+        """
+        Проверяет, что потоки используют общий пул соединений с Redis
+        """
+        # экземпляр кэша у каждого потока свой, пул соединений общий
+        instances = []
+        thread = threading.Thread(
+            target=lambda: instances.append(caches['default'])
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(instances[0], caches['default'])
+        self.assertIs(
+            instances[0]._cache._get_connection_pool(write=True),
+            caches['default']._cache._get_connection_pool(write=True)
+        )
+
+    def test_throttle_history_is_shared(self):
+        """
+        Проверяет, что история ограничения запросов хранится в Redis
+        и общая для всех экземпляров троттлинга
+        """
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        request = type('Request', (), {
+            'META': request.META, 'user': None, '_request': request
+        })
+        first, second = AnonRateThrottle(), AnonRateThrottle()
+        try:
+            self.assertTrue(first.allow_request(request, None))
+            self.assertFalse(second.allow_request(request, None))
+            self.assertTrue(self.get_redis().exists(
+                cache.make_key(first.key)
+            ))
+        finally:
+            cache.delete(first.key)
+
+
+class MetricsTestCase(CreateUsersTestCase):
+    """
+    Метрики пишутся в Redis под отдельным префиксом
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.prefix = registry.prefix
+        registry.prefix = f'{self.prefix}_test'
+        registry.reset()
+        self.token = permissions.METRICS_TOKEN
+        permissions.METRICS_TOKEN = 'metrics-secret'
+        return result
+
+    def tearDown(self):
+        registry.reset()
+        registry.prefix = self.prefix
+        permissions.METRICS_TOKEN = self.token
+
+    def get_metrics(self):
+        response = self.client.get(
+            path=reverse('metrics'),
+            headers={'Authorization': 'Bearer metrics-secret'}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_metrics_access(self):
+        """
+        Проверяет, что метрики отдаются по токену Prometheus
+        или сотруднику, остальным — 401
+        """
+        response = self.client.get(path=reverse('metrics'))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            path=reverse('metrics'),
+            headers={'Authorization': 'Bearer wrong'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        self.create_token()
+        User.objects.filter(
+            username=self.users['user_1']['username']
+        ).update(is_staff=True)
+        response = self.client.get(
+            path=reverse('metrics'),
+            headers={
+                'Authorization': f'Bearer {self.users["user_1"]["token"]}'
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    def test_request_duration(self):
+        """
+        Проверяет гистограмму времени ответа по view,
+        методу и коду ответа
+        """
+        self.client.get(path=reverse('reviews'))
+        self.client.get(path=reverse('reviews'))
+        metrics = self.get_metrics()
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{method="GET",status="200",view="reviews"} 2',
+            metrics
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket'
+            '{method="GET",status="200",view="reviews",le="+Inf"} 2',
+            metrics
+        )
+
+    def test_unknown_method_is_other(self):
+        """
+        Проверяет, что метод не из списка HTTP не создает
+        новую серию метрик
+        """
+        self.client.generic('BREW', reverse('reviews'))
+        metrics = self.get_metrics()
+        self.assertIn('method="other"', metrics)
+        self.assertNotIn('BREW', metrics)
+
+    def test_observations_are_buffered(self):
+        """
+        Проверяет, что замер не отправляется в Redis сразу,
+        а копится в буфере процесса до отправки
+        """
+        buffered = MetricsRegistry(prefix=f'{registry.prefix}_buffer')
+        # без фонового потока отправку вызывает только тест
+        buffered.flusher_pid = os.getpid()
+        histogram = buffered.histogram('test_seconds', 'Test', (1,))
+        try:
+            histogram.observe(0.5, name='a')
+            histogram.observe(2, name='a')
+            self.assertFalse(buffered.get_client().exists(histogram.key))
+            buffered.flush()
+            self.assertEqual(buffered.buffer, {})
+            self.assertEqual(buffered.get_client().hgetall(histogram.key), {
+                'name="a"|0': '1',
+                'name="a"|1': '1',
+                'name="a"|count': '2',
+                'name="a"|sum': '2.5',
+            })
+        finally:
+            buffered.reset()
+
+    def test_parameter_age(self):
+        """
+        Проверяет возраст сохраненных параметров сети
+        """
+        Difficulty.objects.create()
+        self.assertIn(
+            'network_parameter_age_seconds{parameter="difficulty"}',
+            self.get_metrics()
+        )
+
+    def test_celery_task_metrics(self):
+        """
+        Проверяет время выполнения задачи и время
+        ее запроса к внешнему сервису
+        """
+        headers = {}
+        signals.add_published_at(headers=headers)
+        self.assertIn('published_at', headers)
+
+        upstream = FakeUpstreamServer(latency=0)
+        with upstream, point_tasks_to(upstream, timeout=5):
+            application_tasks.save_new_btc_price_in_db.apply()
+        metrics = self.get_metrics()
+        self.assertIn(
+            'celery_task_runtime_seconds_count{state="SUCCESS",'
+            'task="src.application.tasks.save_new_btc_price_in_db"} 1',
+            metrics
+        )
+        self.assertIn(
+            'upstream_request_duration_seconds_count'
+            '{outcome="200",source="btc_price"} 1',
+            metrics
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        """
+        Проверяет, что корзины гистограммы накопительные,
+        как требует формат Prometheus
+        """
+        histogram = Histogram(registry, 'test_seconds', 'Test', (1, 2))
+        registry.metrics[histogram.name] = histogram
+        try:
+            for value in (0.5, 1.5, 1.5, 3):
+                histogram.observe(value, name='a')
+            self.assertIn('test_seconds_bucket{name="a",le="2"} 3', (
+                registry.collect()
+            ))
+            self.assertIn('test_seconds_sum{name="a"} 6.5', (
+                registry.collect()
+            ))
+        finally:
+            registry.reset()
+            del registry.metrics[histogram.name]
+
+
+class SlowQueryLogTestCase(CreateUsersTestCase):
+    """
+    Порог снижен до нуля, чтобы медленным считался любой запрос
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.settings_backup = (
+            timing.SLOW_QUERY_THRESHOLD_MS,
+            slow_queries.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            slow_queries.SLOW_QUERY_LOG_SIZE
+        )
+        timing.SLOW_QUERY_THRESHOLD_MS = 0
+        slow_queries.SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 1
+        return result
+
+    def tearDown(self):
+        (
+            timing.SLOW_QUERY_THRESHOLD_MS,
+            slow_queries.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            slow_queries.SLOW_QUERY_LOG_SIZE
+        ) = self.settings_backup
+
+    def test_view_slow_queries(self):
+        """
+        Проверяет, что медленный запрос view записывается
+        с планом EXPLAIN ANALYZE после отправки ответа
+        """
+        self.client.get(path=reverse('reviews'))
+        query = SlowQuery.objects.get(source='GET reviews')
+        self.assertIn('reviews_review', query.sql)
+        self.assertTrue(query.plan_analyzed)
+        self.assertIn('Shared Hit Blocks', query.plan[0]['Plan'])
+
+    def test_task_slow_queries(self):
+        """
+        Проверяет запись медленных запросов задачи Celery
+        """
+        application_tasks.update_contracts_lifecycle.apply()
+        self.assertTrue(SlowQuery.objects.filter(
+            source='src.application.tasks.update_contracts_lifecycle'
+        ).exists())
+
+    def test_modifying_query_is_not_executed(self):
+        """
+        Проверяет, что UPDATE только планируется и не меняет строки
+        """
+        user = User.objects.first()
+        sql = f'UPDATE {User._meta.db_table} SET first_name = %s'
+        slow_queries.save_slow_queries('test', [(sql, ['x'], False, 1.0)])
+        query = SlowQuery.objects.get(source='test')
+        self.assertFalse(query.plan_analyzed)
+        self.assertEqual(query.plan[0]['Plan']['Node Type'], 'ModifyTable')
+        user.refresh_from_db()
+        self.assertNotEqual(user.first_name, 'x')
+
+    def test_modifying_cte_is_not_executed(self):
+        """
+        Проверяет, что WITH с UPDATE и SELECT с блокировкой строк
+        только планируются
+        """
+        user = User.objects.first()
+        table = User._meta.db_table
+        slow_queries.save_slow_queries('cte', [(
+            f'WITH changed AS (UPDATE {table} SET first_name = %s '
+            f'RETURNING 1) SELECT count(*) FROM changed',
+            ['x'], False, 1.0
+        )])
+        slow_queries.save_slow_queries('locking', [(
+            f'SELECT * FROM {table} FOR UPDATE', None, False, 1.0
+        )])
+        for source in ('cte', 'locking'):
+            query = SlowQuery.objects.get(source=source)
+            self.assertFalse(query.plan_analyzed)
+            self.assertIsNotNone(query.plan)
+        user.refresh_from_db()
+        self.assertNotEqual(user.first_name, 'x')
+
+    def test_explain_runs_after_response(self):
+        """
+        Проверяет, что журнал пишется при закрытии ответа,
+        а не до его отправки
+        """
+        def view(request):
+            list(User.objects.all())
+            return HttpResponse('ok')
+
+        response = ServerTimingMiddleware(view)(RequestFactory().get('/'))
+        self.assertFalse(SlowQuery.objects.exists())
+        # как тестовый клиент: без request_finished, закрывающего
+        # соединение с базой
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertTrue(SlowQuery.objects.filter(
+            source='GET unmatched', plan_analyzed=True
+        ).exists())
+
+    def test_ring_buffer(self):
+        """
+        Проверяет, что журнал хранит только последние
+        SLOW_QUERY_LOG_SIZE запросов
+        """
+        slow_queries.SLOW_QUERY_LOG_SIZE = 3
+        slow_queries.SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 0
+        for index in range(5):
+            slow_queries.save_slow_queries(
+                f'source_{index}', [('SELECT 1', None, False, 1.0)]
+            )
+        self.assertEqual(
+            sorted(SlowQuery.objects.values_list('source', flat=True)),
+            ['source_2', 'source_3', 'source_4']
+        )
+
+    def test_admin(self):
+        """
+        Проверяет список и карточку медленного запроса в админке
+        """
+        slow_queries.save_slow_queries(
+            'test', [(f'SELECT * FROM {Contract._meta.db_table}', None,
+                      False, 1.0)]
+        )
+        admin_user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        self.client.force_login(admin_user)
+        response = self.client.get(
+            reverse('admin:monitoring_slowquery_changelist')
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse(
+            'admin:monitoring_slowquery_change',
+            args=[SlowQuery.objects.get(source='test').pk]
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Seq Scan')
+
+
+class ProfilingTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        self.profiles_dir = profiling.PROFILES_DIR
+        profiling.PROFILES_DIR = Path(tempfile.mkdtemp())
+        self.create_token()
+        self.staff = User.objects.get(
+            username=self.users['user_1']['username']
+        )
+        self.staff.is_staff = True
+        self.staff.save()
+        self.auth_data = {
+            'Authorization': f'Bearer {self.users["user_1"]["token"]}'
+        }
+        return result
+
+    def tearDown(self):
+        shutil.rmtree(profiling.PROFILES_DIR)
+        profiling.PROFILES_DIR = self.profiles_dir
+
+    def get_profiling_token(self):
+        response = self.client.post(
+            path=reverse('profiling_token'), headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['token']
+
+    def test_token_is_for_staff(self):
+        """
+        Проверяет, что токен профилирования выдается только персоналу,
+        а токен пользователя и неверный токен профилирование не включают
+        """
+        response = self.client.post(
+            path=reverse('profiling_token'),
+            headers={
+                'Authorization': f'Bearer {self.users["user_2"]["token"]}'
+            }
+        )
+        self.assertEqual(response.status_code, 403)
+
+        user = User.objects.get(username=self.users['user_2']['username'])
+        response = self.client.get(
+            path=reverse('reviews'),
+            headers={'X-Profile': profiling.make_profiling_token(user)}
+        )
+        self.assertNotIn('X-Profile-Id', response)
+        response = self.client.get(
+            path=reverse('reviews'), headers={'X-Profile': 'invalid'}
+        )
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_not_triggered(self):
+        """
+        Проверяет, что без токена запрос не профилируется
+        и не делает лишних запросов к базе
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(path=reverse('reviews'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list(profiling.PROFILES_DIR.iterdir()), [])
+
+    def test_sampling_profile(self):
+        """
+        Проверяет сэмплирующий профиль запроса в формате folded stacks
+        и его скачивание
+        """
+        response = self.client.get(
+            path=reverse('reviews'),
+            headers={'X-Profile': self.get_profiling_token()}
+        )
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Profile-Id']
+        self.assertTrue(name.endswith('_GET_reviews.folded'))
+        response = self.client.get(
+            path=reverse('profile_download', kwargs={'name': name}),
+            headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 200)
+        for line in b''.join(response.streaming_content).decode().split(
+            '\n'
+        )[:-1]:
+            self.assertRegex(line, r'^\S.* \d+$')
+
+    def test_cprofile_profile(self):
+        """
+        Проверяет профиль запроса в формате cProfile
+        """
+        token = self.get_profiling_token()
+        response = self.client.get(
+            path=reverse('reviews'),
+            data={'_profile': token, '_profile_mode': 'cprofile'}
+        )
+        name = response['X-Profile-Id']
+        self.assertTrue(name.endswith('.prof'))
+        stats = pstats.Stats(str(profiling.PROFILES_DIR / name))
+        self.assertTrue(any(
+            re.search('views', filename) for filename, _, _ in stats.stats
+        ))
+
+    def test_old_profiles_are_removed(self):
+        """
+        Проверяет, что хранятся только последние PROFILES_KEEP профилей
+        """
+        keep = profiling.PROFILES_KEEP
+        profiling.PROFILES_KEEP = 2
+        self.addCleanup(setattr, profiling, 'PROFILES_KEEP', keep)
+        paths = []
+        for index in range(3):
+            path = profiling.PROFILES_DIR / f'2026010{index}-000000_view.prof'
+            path.write_text('')
+            paths.append(path)
+        (profiling.PROFILES_DIR / 'notes.txt').write_text('')
+
+        path = profiling.profile_path('reviews', 'folded')
+        path.write_text('main 1\n')
+        self.assertEqual(
+            sorted(path.name for path in profiling.PROFILES_DIR.iterdir()),
+            sorted([paths[2].name, path.name, 'notes.txt'])
+        )
+
+    def test_download_missing_profile(self):
+        """
+        Проверяет скачивание несуществующего профиля
+        """
+        response = self.client.get(
+            path=reverse('profile_download', kwargs={'name': 'x.folded'}),
+            headers=self.auth_data
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TracingTestCase(CreateUsersTestCase):
+    """
+    Спаны пишутся во временный файл
+    """
+
+    trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+    parent_id = '00f067aa0ba902b7'
+
+    def setUp(self):
+        result = super().setUp()
+        self.exporter = tracing.exporter
+        self.path = Path(tempfile.mkstemp(suffix='.jsonl')[1])
+        tracing.exporter = tracing.FileSpanExporter(self.path)
+        return result
+
+    def tearDown(self):
+        tracing.exporter = self.exporter
+        self.path.unlink()
+
+    def get_spans(self):
+        with open(self.path) as trace_file:
+            return [json.loads(line) for line in trace_file]
+
+    def test_request_continues_incoming_trace(self):
+        """
+        Проверяет, что запрос с заголовком traceparent продолжает
+        входящую трассу
+        """
+        response = self.client.get(
+            path=reverse('reviews'),
+            headers={'traceparent': f'00-{self.trace_id}-{self.parent_id}-01'}
+        )
+        self.assertEqual(response['X-Trace-Id'], self.trace_id)
+        span, = self.get_spans()
+        self.assertEqual(span['name'], 'GET reviews')
+        self.assertEqual(span['kind'], 'server')
+        self.assertEqual(span['parent_id'], self.parent_id)
+        self.assertEqual(span['attributes']['http.status_code'], 200)
+        self.assertEqual(span['attributes']['db.queries'], 1)
+
+    def test_invalid_traceparent_starts_new_trace(self):
+        """
+        Проверяет, что при неверном traceparent начинается новая трасса
+        """
+        response = self.client.get(
+            path=reverse('reviews'),
+            headers={'traceparent': f'00-{"0" * 32}-{self.parent_id}-01'}
+        )
+        self.assertNotEqual(response['X-Trace-Id'], '0' * 32)
+        span, = self.get_spans()
+        self.assertIsNone(span['parent_id'])
+
+    def test_not_sampled_trace_is_not_exported(self):
+        """
+        Проверяет, что спаны трассы без флага sampled не сохраняются
+        """
+        response = self.client.get(
+            path=reverse('reviews'),
+            headers={'traceparent': f'00-{self.trace_id}-{self.parent_id}-00'}
+        )
+        self.assertEqual(response['X-Trace-Id'], self.trace_id)
+        self.assertEqual(self.get_spans(), [])
+
+    def test_task_and_upstream_call_join_trace(self):
+        """
+        Проверяет, что задача Celery и ее запрос к внешнему сервису
+        попадают в трассу запроса, который поставил задачу
+        """
+        upstream = FakeUpstreamServer(latency=0)
+        with upstream, point_tasks_to(upstream, timeout=5):
+            with tracing.start_span('GET login', 'server') as root:
+                headers = {}
+                signals.add_published_at(headers=headers)
+            users_tasks.create_user_wallet.apply(
+                args=('access-token',), headers=headers
+            )
+        spans = {span['name']: span for span in self.get_spans()}
+        task = spans['src.users.tasks.create_user_wallet']
+        upstream_call = spans['POST wallet']
+        self.assertEqual(task['trace_id'], root.trace_id)
+        self.assertEqual(task['parent_id'], root.span_id)
+        self.assertEqual(task['kind'], 'consumer')
+        self.assertEqual(task['attributes']['celery.state'], 'SUCCESS')
+        self.assertIn('celery.queue_wait_ms', task['attributes'])
+        self.assertEqual(upstream_call['parent_id'], task['span_id'])
+        self.assertEqual(upstream_call['attributes']['http.status_code'], 201)
+        self.assertIsNone(tracing.current_span.get())
+
+        traces = tracing.load_traces(self.path)
+        lines = tracing.format_trace(traces[root.trace_id])
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].endswith('    POST wallet [client]'))
+
+    def test_task_without_parent_starts_trace(self):
+        """
+        Проверяет, что задача без родительского спана начинает
+        новую трассу, а ошибка внешнего сервиса отмечается в спане
+        """
+        upstream = FakeUpstreamServer(latency=0, error_rate=1)
+        with upstream, point_tasks_to(upstream, timeout=5):
+            application_tasks.save_new_btc_price_in_db.apply()
+        spans = {span['name']: span for span in self.get_spans()}
+        task = spans['src.application.tasks.save_new_btc_price_in_db']
+        self.assertIsNone(task['parent_id'])
+        self.assertEqual(spans['GET btc_price']['status'], 'error')
+
+    def test_disabled(self):
+        """
+        Проверяет, что без экспортера трассы не создаются
+        """
+        tracing.exporter = None
+        response = self.client.get(path=reverse('reviews'))
+        self.assertNotIn('X-Trace-Id', response)
+        headers = {}
+        signals.add_published_at(headers=headers)
+        self.assertNotIn('traceparent', headers)
@@ -0,0 +1,20 @@
+from django.urls import path
+from src.monitoring.api.v1.views import (
+    ProfileDownloadView,
+    ProfilingTokenView,
+    ViewTimingsView
+)
+
+urlpatterns = [
+    path('timings/', ViewTimingsView.as_view(), name='view_timings'),
+    path(
+        'profiling/token/',
+        ProfilingTokenView.as_view(),
+        name='profiling_token'
+    ),
+    path(
+        'profiling/<str:name>/',
+        ProfileDownloadView.as_view(),
+        name='profile_download'
+    ),
+]
@@ -0,0 +1,86 @@
+import os
+
+from django.http import FileResponse, HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from src.monitoring.api.v1.permissions import (
+    HasMetricsAccess,
+    MetricsTokenAuthentication
+)
+from src.monitoring.metrics import registry
+from src.monitoring import profiling
+from src.monitoring.timing import TIMING_BUCKETS_MS, view_histograms
+
+
+class ViewTimingsView(APIView):
+    """
+    Время ответа по эндпоинтам: квантили по гистограмме,
+    среднее число и время SQL-запросов, время рендера
+    и обращения к кэшу. Данные процесса, который ответил
+    """
+    permission_classes = [IsAdminUser, ]
+
+    def get(self, request):
+        return Response(data={
+            'pid': os.getpid(),
+            'buckets_ms': TIMING_BUCKETS_MS,
+            'views': view_histograms.snapshot()
+        })
+
+    def delete(self, request):
+        view_histograms.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+    """
+    Метрики веб-приложения и воркеров Celery
+    в текстовом формате Prometheus
+    """
+    authentication_classes = [
+        MetricsTokenAuthentication,
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ]
+    permission_classes = [HasMetricsAccess, ]
+    swagger_schema = None
+
+    def get(self, request):
+        return HttpResponse(
+            registry.collect(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class ProfilingTokenView(APIView):
+    """
+    Токен для профилирования запросов: передается в заголовке
+    X-Profile или параметре _profile любого запроса
+    """
+    permission_classes = [IsAdminUser, ]
+
+    def post(self, request):
+        return Response(
+            data={
+                'token': profiling.make_profiling_token(request.user),
+                'expires_in': profiling.PROFILING_TOKEN_MAX_AGE
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class ProfileDownloadView(APIView):
+    """
+    Файл профиля по имени из заголовка X-Profile-Id
+    """
+    permission_classes = [IsAdminUser, ]
+
+    def get(self, request, name):
+        path = profiling.PROFILES_DIR / name
+        if not profiling.PROFILE_NAME_PATTERN.match(name) or \
+                not path.is_file():
+            raise exceptions.NotFound(detail='Profile not found.')
+        return FileResponse(open(path, 'rb'), as_attachment=True)
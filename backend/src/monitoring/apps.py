@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'src.monitoring'
+
+    def ready(self):
+        from src.monitoring import gauges, signals  # noqa: F401
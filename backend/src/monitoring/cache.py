@@ -0,0 +1,99 @@
+import threading
+
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+
+from src.monitoring.timing import record_cache_access
+
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Считает попадания и промахи кэша для Server-Timing
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            record_cache_access(hits=0, misses=1)
+            return default
+        record_cache_access(hits=1, misses=0)
+        return value
+
+    def get_many(self, keys, version=None):
+        values = super().get_many(keys, version=version)
+        # базовая реализация читает ключи через get, они уже посчитаны
+        if super().get_many.__func__ is not BaseCache.get_many:
+            hits = len(values)
+            record_cache_access(hits=hits, misses=len(keys) - hits)
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class SharedPoolRedisCacheClient(RedisCacheClient):
+    """
+    Клиент Redis с пулами соединений, общими для всех потоков
+    процесса. Django создает экземпляр кэша на каждый поток,
+    и без этого у каждого потока был бы свой пул
+    """
+
+    # (адрес сервера, параметры пула) -> пул
+    _shared_pools = {}
+    _shared_pools_lock = threading.Lock()
+
+    def _get_connection_pool(self, write):
+        server = self._servers[self._get_connection_pool_index(write)]
+        key = (server, self._pool_class, repr(sorted(
+            self._pool_options.items(), key=lambda item: item[0]
+        )))
+        pool = self._shared_pools.get(key)
+        if pool is None:
+            with self._shared_pools_lock:
+                pool = self._shared_pools.get(key)
+                if pool is None:
+                    pool = self._shared_pools[key] = self._pool_class.from_url(
+                        server, **self._pool_options
+                    )
+        return pool
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """
+    Кэш в Redis с общими пулами соединений.
+    clear удаляет только ключи своего пространства (KEY_PREFIX),
+    а не всю базу Redis, в которой лежат очереди Celery и метрики
+    """
+
+    # сколько ключей удаляется одной командой при очистке
+    CLEAR_BATCH_SIZE = 1000
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = SharedPoolRedisCacheClient
+
+    def get_client(self):
+        """
+        Клиент redis-py на общем пуле, для команд,
+        которых нет в API кэша Django
+        """
+        return self._cache.get_client(write=True)
+
+    def clear(self):
+        client = self.get_client()
+        batch = []
+        for key in client.scan_iter(
+            match=f'{self.key_prefix}:*', count=self.CLEAR_BATCH_SIZE
+        ):
+            batch.append(key)
+            if len(batch) == self.CLEAR_BATCH_SIZE:
+                client.delete(*batch)
+                batch = []
+        if batch:
+            client.delete(*batch)
+        return True
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.utils import timezone
+
+from src.application.models import Difficulty, Reward
+from src.monitoring.metrics import registry
+
+
+@registry.gauge(
+    'network_parameter_age_seconds',
+    'Сколько секунд назад обновлялись параметры сети'
+)
+def network_parameter_age():
+    now = timezone.now()
+    return [
+        ({'parameter': name}, round((now - updated_at).total_seconds(), 1))
+        for model, name in ((Difficulty, 'difficulty'), (Reward, 'reward'))
+        for updated_at in model.objects.values_list('updated_at', flat=True)
+    ]
+
+
+@registry.gauge(
+    'celery_queue_length',
+    'Задач Celery, ждущих воркера в очереди брокера'
+)
+def celery_queue_length():
+    queue = getattr(settings, 'CELERY_TASK_DEFAULT_QUEUE', 'celery')
+    length = registry.execute(lambda client: client.llen(queue))
+    return [] if length is None else [({'queue': queue}, length)]
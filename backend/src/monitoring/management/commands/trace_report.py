@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from src.monitoring.tracing import (
+    TRACE_EXPORT_PATH,
+    format_trace,
+    load_traces,
+    trace_duration
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбор трасс из файла экспорта: самые долгие трассы '
+        'с разбивкой по спанам запроса, задач и внешних сервисов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=TRACE_EXPORT_PATH,
+            help='Файл спанов, по умолчанию TRACE_EXPORT_PATH'
+        )
+        parser.add_argument('--trace', help='Показать одну трассу по id')
+        parser.add_argument(
+            '--name',
+            help='Только трассы, в которых есть спан с таким именем'
+        )
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError('Set TRACE_EXPORT_PATH or pass --file')
+        try:
+            traces = load_traces(options['file'])
+        except FileNotFoundError:
+            raise CommandError(f'No trace file {options["file"]}')
+        if options['trace']:
+            if options['trace'] not in traces:
+                raise CommandError(f'No trace {options["trace"]}')
+            selected = [options['trace']]
+        else:
+            selected = [
+                trace_id for trace_id, spans in traces.items()
+                if not options['name']
+                or any(span['name'] == options['name'] for span in spans)
+            ]
+            selected.sort(
+                key=lambda trace_id: trace_duration(traces[trace_id]),
+                reverse=True
+            )
+            selected = selected[:options['limit']]
+        for trace_id in selected:
+            spans = traces[trace_id]
+            self.stdout.write(
+                f'trace {trace_id}: {trace_duration(spans):.1f} ms, '
+                f'{len(spans)} spans'
+            )
+            for line in format_trace(spans):
+                self.stdout.write(line)
+            self.stdout.write('')
@@ -0,0 +1,311 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import redis
+import requests
+from dotenv import load_dotenv
+
+from src.monitoring.tracing import inject, start_span
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# префикс ключей метрик в Redis
+METRICS_PREFIX = os.environ.get('METRICS_PREFIX', 'metrics')
+
+# как часто замеры процесса отправляются в Redis, секунды
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+
+# после ошибки Redis метрики не пишутся столько секунд,
+# чтобы недоступный Redis не замедлял запросы и задачи
+METRICS_BACKOFF_SECONDS = 30
+
+# границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+
+def format_labels(labels: dict):
+    """
+    Метки в формате Prometheus: name="value",...
+    """
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace(
+            '"', '\\"'
+        ).replace('\n', '\\n'))
+        for name, value in sorted(labels.items())
+    )
+
+
+class Histogram:
+    """
+    Гистограмма, общая для всех процессов: значения копятся
+    в хеше Redis, по полю на корзину, сумму и число замеров
+    для каждого набора меток. Замер сначала попадает в буфер
+    процесса, см. MetricsRegistry.add
+    """
+    type = 'histogram'
+
+    def __init__(self, registry, name: str, documentation: str,
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+
+    @property
+    def key(self):
+        return f'{self.registry.prefix}:{self.name}'
+
+    def observe(self, value: float, **labels):
+        series = format_labels(labels)
+        bucket = next(
+            (index for index, bound in enumerate(self.buckets)
+             if value <= bound),
+            len(self.buckets)
+        )
+        self.registry.add(self.key, {
+            f'{series}|{bucket}': 1,
+            f'{series}|count': 1,
+            f'{series}|sum': float(value),
+        })
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Замеряет время блока. Метки можно дополнить
+        внутри блока через выданный словарь
+        """
+        labels = dict(labels)
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self, fields: dict):
+        series = {}
+        for field, value in fields.items():
+            labels, _, part = field.rpartition('|')
+            series.setdefault(labels, {})[part] = value
+        lines = []
+        for labels, parts in sorted(series.items()):
+            separator = ',' if labels else ''
+            cumulative = 0
+            for index, bound in enumerate(self.buckets):
+                cumulative += int(parts.get(str(index), 0))
+                lines.append(
+                    f'{self.name}_bucket{{{labels}{separator}le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            count = int(parts.get('count', 0))
+            lines.append(
+                f'{self.name}_bucket{{{labels}{separator}le="+Inf"}} {count}'
+            )
+            lines.append(f'{self.name}_sum{{{labels}}} {parts.get("sum", 0)}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Метрики веб-приложения и воркеров Celery в Redis.
+
+    Замеры копятся в буфере процесса и раз в
+    METRICS_FLUSH_INTERVAL секунд отправляются одним pipeline
+    из фонового потока, так что запросы и задачи в Redis
+    не ходят. Ошибки Redis не пробрасываются: метрики
+    пропускаются на METRICS_BACKOFF_SECONDS секунд
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = METRICS_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self.metrics = {}
+        self.gauges = []
+        self.client = None
+        self.disabled_until = 0.0
+        # (ключ хеша, поле) -> прибавка с прошлой отправки
+        self.buffer = {}
+        self.lock = threading.Lock()
+        self.flusher_pid = None
+
+    def get_client(self):
+        if self.client is None:
+            self.client = redis.Redis.from_url(
+                self.url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+                decode_responses=True
+            )
+        return self.client
+
+    def execute(self, func, default=None):
+        """
+        Вызовет func(client), при ошибке Redis вернет default
+        """
+        if not self.url or time.monotonic() < self.disabled_until:
+            return default
+        try:
+            return func(self.get_client())
+        except redis.RedisError as exc:
+            self.disabled_until = time.monotonic() + METRICS_BACKOFF_SECONDS
+            logger.warning('Metrics are disabled, Redis error: %s', exc)
+            return default
+
+    def add(self, key: str, increments: dict):
+        """
+        Прибавляет increments (поле -> число) к полям хеша key.
+        Целые прибавки пишутся HINCRBY, дробные — HINCRBYFLOAT
+        """
+        if not self.url or time.monotonic() < self.disabled_until:
+            return
+        with self.lock:
+            for field, value in increments.items():
+                self.buffer[key, field] = \
+                    self.buffer.get((key, field), 0) + value
+        self.start_flusher()
+
+    def start_flusher(self):
+        # поток не переживает fork, в дочернем процессе
+        # (воркеры gunicorn и Celery) он запускается заново
+        if self.flusher_pid == os.getpid():
+            return
+        with self.lock:
+            if self.flusher_pid == os.getpid():
+                return
+            self.flusher_pid = os.getpid()
+        threading.Thread(
+            target=self.flush_periodically, name='metrics-flusher',
+            daemon=True
+        ).start()
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        """
+        Отправляет накопленные замеры процесса в Redis
+        """
+        with self.lock:
+            buffer, self.buffer = self.buffer, {}
+        if not buffer:
+            return
+
+        def write(client):
+            pipeline = client.pipeline(transaction=False)
+            for (key, field), value in buffer.items():
+                if isinstance(value, int):
+                    pipeline.hincrby(key, field, value)
+                else:
+                    pipeline.hincrbyfloat(key, field, value)
+            pipeline.execute()
+
+        self.execute(write)
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: tuple = DEFAULT_BUCKETS):
+        metric = Histogram(self, name, documentation, buckets)
+        self.metrics[name] = metric
+        return metric
+
+    def gauge(self, name: str, documentation: str):
+        """
+        Декоратор функции, которая при сборе метрик вернет
+        список пар (метки, значение)
+        """
+        def register(func):
+            self.gauges.append((name, documentation, func))
+            return func
+        return register
+
+    def collect(self):
+        """
+        Все метрики в текстовом формате Prometheus
+        """
+        metrics = list(self.metrics.values())
+        self.flush()
+
+        def read(client):
+            pipeline = client.pipeline(transaction=False)
+            for metric in metrics:
+                pipeline.hgetall(metric.key)
+            return pipeline.execute()
+
+        values = self.execute(read, default=[{}] * len(metrics))
+        lines = []
+        for metric, fields in zip(metrics, values):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.collect(fields))
+        for name, documentation, func in self.gauges:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in func():
+                lines.append(f'{name}{{{format_labels(labels)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.buffer = {}
+        self.execute(lambda client: client.delete(
+            *[metric.key for metric in self.metrics.values()]
+        ))
+
+
+registry = MetricsRegistry()
+
+# замеры последних секунд перед остановкой процесса
+atexit.register(registry.flush)
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds',
+    'Время ответа на HTTP-запрос по view'
+)
+task_runtime = registry.histogram(
+    'celery_task_runtime_seconds',
+    'Время выполнения задачи Celery'
+)
+task_queue_wait = registry.histogram(
+    'celery_task_queue_wait_seconds',
+    'Время задачи Celery в очереди от публикации до начала выполнения',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+upstream_duration = registry.histogram(
+    'upstream_request_duration_seconds',
+    'Время запроса задачи к внешнему сервису'
+)
+
+
+def upstream_request(source: str, method: str, url: str, **kwargs):
+    """
+    requests.request с замером времени ответа внешнего сервиса
+    и клиентским спаном трассы. outcome — код ответа или имя
+    исключения. Сервису передается заголовок traceparent
+    """
+    span_name = f'{method.upper()} {source}'
+    with upstream_duration.time(source=source, outcome='error') as labels, \
+            start_span(span_name, 'client') as span:
+        kwargs['headers'] = inject(dict(kwargs.get('headers') or {}))
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException as exc:
+            labels['outcome'] = type(exc).__name__
+            raise
+        labels['outcome'] = response.status_code
+        if span is not None:
+            span.attributes['http.status_code'] = response.status_code
+            if response.status_code >= 500:
+                span.status = 'error'
+    return response
@@ -0,0 +1,192 @@
+from functools import partial
+
+from django.db import connection
+
+from src.monitoring.metrics import request_duration
+from src.monitoring.profiling import (
+    PROFILE_HEADER,
+    PROFILE_PARAM,
+    get_profiler,
+    get_profiling_user,
+    profile_path
+)
+from src.monitoring.slow_queries import save_slow_queries
+from src.monitoring import timing
+from src.monitoring.timing import (
+    RequestTimings,
+    current_timings,
+    view_histograms
+)
+from src.monitoring.tracing import (
+    parse_traceparent,
+    start_span,
+    tracing_enabled
+)
+from src.responses import call_after_response
+
+
+def get_url_name(request):
+    """
+    Имя url запроса, для ненайденных url — unmatched
+    """
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else 'unmatched'
+
+
+# методы с другими именами попадают в метрики как other,
+# чтобы клиент не мог создать произвольные серии
+HTTP_METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE'
+))
+
+
+def get_method(request):
+    return request.method if request.method in HTTP_METHODS else 'other'
+
+
+def show_server_timing(request):
+    """
+    Отдавать ли заголовок Server-Timing. Пользователя JWT
+    DRF записывает в request после аутентификации во view
+    """
+    if timing.SERVER_TIMING_PUBLIC:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_staff)
+
+
+class ServerTimingMiddleware:
+    """
+    Замеряет запрос: общее время, число и время SQL-запросов,
+    попадания в кэш, время view и рендера ответа.
+    Отдает замеры сотрудникам в заголовке Server-Timing, копит
+    гистограммы по view для всех запросов и пишет медленные
+    запросы в журнал.
+
+    Должен стоять первым в MIDDLEWARE, чтобы замерять
+    остальные middleware
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with connection.execute_wrapper(timings.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        timings.finish()
+        if show_server_timing(request):
+            response['Server-Timing'] = timings.server_timing()
+        url_name = get_url_name(request)
+        method = get_method(request)
+        view = f'{method} {url_name}'
+        view_histograms.observe(view, timings)
+        request_duration.observe(
+            timings.total,
+            view=url_name,
+            method=method,
+            status=response.status_code
+        )
+        if timings.slow_queries:
+            # планы EXPLAIN ANALYZE снимаются уже после отправки
+            # ответа клиенту
+            call_after_response(
+                response,
+                partial(save_slow_queries, view, timings.slow_queries)
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # ответы DRF рендерятся после view, время рендера
+        # считается до вызова post render callback
+        timings = current_timings.get()
+        if timings is not None:
+            timings.mark_view_finished()
+            response.add_post_render_callback(
+                lambda rendered: timings.mark_rendered()
+            )
+        return response
+
+
+class TracingMiddleware:
+    """
+    Открывает серверный спан запроса. Трасса продолжается, если
+    клиент прислал заголовок traceparent, иначе начинается новая.
+    Задачи Celery и запросы к внешним сервисам, вызванные
+    в запросе, становятся дочерними спанами.
+    Id трассы отдается в заголовке X-Trace-Id
+
+    Стоит после ServerTimingMiddleware, чтобы добавить
+    в спан число и время SQL-запросов
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not tracing_enabled():
+            return self.get_response(request)
+        parent = parse_traceparent(request.META.get('HTTP_TRACEPARENT'))
+        with start_span(request.method, 'server', parent=parent) as span:
+            response = self.get_response(request)
+            span.name = f'{request.method} {get_url_name(request)}'
+            span.attributes.update({
+                'http.method': request.method,
+                'http.route': get_url_name(request),
+                'http.status_code': response.status_code,
+            })
+            if response.status_code >= 500:
+                span.status = 'error'
+            timings = current_timings.get()
+            if timings is not None:
+                span.attributes['db.queries'] = timings.db_queries
+                span.attributes['db.time_ms'] = round(
+                    timings.db_time * 1000, 3
+                )
+        response['X-Trace-Id'] = span.trace_id
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос по токену сотрудника из заголовка X-Profile
+    или параметра _profile. Режим — X-Profile-Mode или
+    _profile_mode: sample (по умолчанию) или cprofile.
+    Профиль сохраняется в PROFILES_DIR, имя файла
+    отдается в заголовке X-Profile-Id.
+
+    Без токена запрос проходит без профилирования и
+    без обращений к базе
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PROFILE_HEADER not in request.META and \
+                PROFILE_PARAM not in request.META.get('QUERY_STRING', ''):
+            return self.get_response(request)
+
+        token = request.META.get(PROFILE_HEADER) or \
+            request.GET.get(PROFILE_PARAM, '')
+        if get_profiling_user(token) is None:
+            return self.get_response(request)
+
+        mode = request.META.get('HTTP_X_PROFILE_MODE') or \
+            request.GET.get(f'{PROFILE_PARAM}_mode', 'sample')
+        profiler = get_profiler(mode)
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        path = profile_path(
+            f'{request.method}_{get_url_name(request)}', profiler.extension
+        )
+        profiler.save(path)
+        response['X-Profile-Id'] = path.name
+        return response
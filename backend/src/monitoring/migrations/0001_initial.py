@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-19 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveIntegerField(unique=True, verbose_name='Слот')),
+                ('source', models.CharField(db_index=True, max_length=255, verbose_name='Источник')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('duration_ms', models.FloatField(verbose_name='Время (мс)')),
+                ('plan', models.JSONField(blank=True, null=True, verbose_name='План')),
+                ('plan_analyzed', models.BooleanField(default=False, verbose_name='План с ANALYZE')),
+                ('created_at', models.DateTimeField(verbose_name='Время запроса')),
+            ],
+            options={
+                'verbose_name': 'медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-created_at',),
+            },
+        ),
+        # номера слотов кольцевого буфера медленных запросов
+        migrations.RunSQL(
+            'CREATE SEQUENCE monitoring_slowquery_slot_seq MINVALUE 0 START 0',
+            'DROP SEQUENCE monitoring_slowquery_slot_seq'
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Медленный SQL-запрос view или задачи Celery.
+
+    Таблица — кольцевой буфер: номер слота берется из
+    последовательности по модулю размера буфера, и новая
+    запись затирает самую старую
+    """
+    slot = models.PositiveIntegerField(unique=True, verbose_name='Слот')
+    source = models.CharField(
+        max_length=255, db_index=True, verbose_name='Источник'
+    )
+    sql = models.TextField(verbose_name='SQL')
+    duration_ms = models.FloatField(verbose_name='Время (мс)')
+    plan = models.JSONField(null=True, blank=True, verbose_name='План')
+    plan_analyzed = models.BooleanField(
+        default=False, verbose_name='План с ANALYZE'
+    )
+    created_at = models.DateTimeField(verbose_name='Время запроса')
+
+    class Meta:
+        verbose_name = 'медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-created_at',)
@@ -0,0 +1,159 @@
+import cProfile
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+User = get_user_model()
+
+# куда сохраняются профили запросов, по умолчанию вне проекта
+PROFILES_DIR = Path(
+    os.environ.get('PROFILES_DIR')
+    or Path(tempfile.gettempdir()) / 'cloud_mining_profiles'
+)
+
+# сколько последних профилей хранится, старые удаляются
+PROFILES_KEEP = int(os.environ.get('PROFILES_KEEP', 100))
+
+# сколько секунд действует токен профилирования
+PROFILING_TOKEN_MAX_AGE = int(
+    os.environ.get('PROFILING_TOKEN_MAX_AGE', 3600)
+)
+
+# интервал семплирования стека, секунды
+SAMPLING_INTERVAL = 0.002
+
+PROFILING_SALT = 'src.monitoring.profiling'
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+
+PROFILE_NAME_PATTERN = re.compile(r'^[\w.-]+\.(folded|prof)$')
+
+
+def make_profiling_token(user):
+    return signing.dumps(str(user.pk), salt=PROFILING_SALT)
+
+
+def get_profiling_user(token: str):
+    """
+    Сотрудник, которому выдан токен, или None,
+    если токен неверный, истек или пользователь не сотрудник
+    """
+    try:
+        pk = signing.loads(
+            token, salt=PROFILING_SALT, max_age=PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=pk, is_staff=True, is_active=True).first()
+
+
+def _frame_name(code):
+    filename = code.co_filename
+    for root in (str(settings.BASE_DIR), 'site-packages', 'lib/python'):
+        _, found, rest = filename.rpartition(root)
+        if found:
+            filename = rest.lstrip('/0123456789.')
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профилировщик одного потока: фоновый поток
+    каждые interval секунд снимает его стек. Результат —
+    свернутые стеки (формат flamegraph.pl, speedscope)
+    """
+    extension = 'folded'
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread_id = None
+        self.sampler = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def save(self, path: Path):
+        with open(path, 'w') as profile_file:
+            for stack, count in self.stacks.most_common():
+                profile_file.write(f'{stack} {count}\n')
+
+
+class DeterministicProfiler:
+    """
+    cProfile, результат в формате pstats
+    (snakeviz, flameprof, gprof2dot)
+    """
+    extension = 'prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path: Path):
+        self.profile.dump_stats(path)
+
+
+def get_profiler(mode: str):
+    if mode == 'cprofile':
+        return DeterministicProfiler()
+    return SamplingProfiler()
+
+
+def sweep_profiles(keep: int = PROFILES_KEEP):
+    """
+    Удаляет старые профили, оставляя keep последних.
+    Имя профиля начинается со времени записи
+    """
+    profiles = sorted(
+        path for path in PROFILES_DIR.iterdir()
+        if PROFILE_NAME_PATTERN.match(path.name)
+    )
+    for path in profiles[:max(len(profiles) - keep, 0)]:
+        path.unlink(missing_ok=True)
+
+
+def profile_path(view: str, extension: str):
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    # место под новый профиль
+    sweep_profiles(keep=max(PROFILES_KEEP - 1, 0))
+    name = re.sub(r'[^\w.-]+', '_', view)
+    return PROFILES_DIR / f'{time.strftime("%Y%m%d-%H%M%S")}_' \
+        f'{time.time_ns() % 10 ** 9:09d}_{name}.{extension}'
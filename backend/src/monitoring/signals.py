@@ -0,0 +1,107 @@
+import time
+
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_shutdown
+)
+from django.db import connection
+
+from src.monitoring.metrics import registry, task_queue_wait, task_runtime
+from src.monitoring.slow_queries import save_slow_queries
+from src.monitoring.timing import RequestTimings
+from src.monitoring.tracing import (
+    Span,
+    current_span,
+    inject,
+    parse_traceparent,
+    tracing_enabled
+)
+
+
+# task_id -> замеры задачи, в пределах процесса воркера
+_timings = {}
+
+# task_id -> (спан задачи, токен current_span)
+_spans = {}
+
+
+def get_task_header(request, name: str):
+    """
+    Заголовок сообщения задачи: воркер кладет свои заголовки
+    в атрибуты task.request, apply — в task.request.headers
+    """
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get(name)
+    return value
+
+
+@before_task_publish.connect
+def add_published_at(headers=None, **kwargs):
+    # заголовки попадут в task.request воркера
+    if headers is not None:
+        headers['published_at'] = time.time()
+        inject(headers)
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    timings = _timings[task_id] = RequestTimings()
+    connection.execute_wrappers.append(timings.db_wrapper)
+    published_at = get_task_header(task.request, 'published_at')
+    # задачи с eta (повторы с countdown) ждут в очереди намеренно
+    if published_at and not task.request.eta:
+        task_queue_wait.observe(
+            max(time.time() - published_at, 0), task=task.name
+        )
+    if tracing_enabled():
+        start_task_span(task_id, task, published_at)
+
+
+def start_task_span(task_id, task, published_at):
+    """
+    Спан задачи, дочерний к спану, в котором ее поставили
+    в очередь, а для задач beat — начало новой трассы
+    """
+    parent = parse_traceparent(get_task_header(task.request, 'traceparent'))
+    span = Span(task.name, 'consumer', parent=parent, attributes={
+        'celery.task_id': task_id,
+        'celery.retries': task.request.retries or 0,
+    })
+    if published_at:
+        span.attributes['celery.queue_wait_ms'] = round(
+            max(time.time() - published_at, 0) * 1000, 3
+        )
+    _spans[task_id] = (span, current_span.set(span))
+
+
+@task_postrun.connect
+def stop_task_timer(task_id=None, task=None, state=None, **kwargs):
+    finish_task_span(task_id, state)
+    timings = _timings.pop(task_id, None)
+    if timings is None:
+        return
+    if timings.db_wrapper in connection.execute_wrappers:
+        connection.execute_wrappers.remove(timings.db_wrapper)
+    timings.finish()
+    task_runtime.observe(timings.total, task=task.name, state=state)
+    save_slow_queries(task.name, timings.slow_queries)
+
+
+def finish_task_span(task_id, state):
+    span, token = _spans.pop(task_id, (None, None))
+    if span is None:
+        return
+    current_span.reset(token)
+    span.attributes['celery.state'] = state
+    if state not in ('SUCCESS', 'RETRY'):
+        span.status = 'error'
+    span.finish()
+
+
+@worker_process_shutdown.connect
+def flush_metrics(**kwargs):
+    # дочерние процессы воркера завершаются без atexit
+    registry.flush()
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import random
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from dotenv import load_dotenv
+
+from src.monitoring.models import SlowQuery
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# какая доля медленных запросов получает план EXPLAIN ANALYZE
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(
+    os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1)
+)
+
+# сколько последних медленных запросов хранит журнал
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 500))
+
+# сколько самых медленных запросов одного view или задачи записывать
+SLOW_QUERIES_PER_SOURCE = 10
+
+# ограничение времени повторного выполнения запроса для плана
+EXPLAIN_TIMEOUT_MS = 5000
+
+# SELECT, который блокирует строки, меняет последовательности
+# или создает таблицу, повторно не выполняется
+NOT_READ_ONLY_SELECT = re.compile(
+    r'\bFOR\s+(NO\s+KEY\s+|KEY\s+)?(UPDATE|SHARE)\b|\bINTO\b|'
+    r'\b(nextval|setval)\s*\(',
+    re.IGNORECASE
+)
+
+SLOW_QUERY_SLOT_SEQUENCE = 'monitoring_slowquery_slot_seq'
+
+SAVE_SLOW_QUERY_SQL = f'''
+    INSERT INTO {SlowQuery._meta.db_table}
+        (slot, source, sql, duration_ms, plan, plan_analyzed, created_at)
+    VALUES (
+        nextval('{SLOW_QUERY_SLOT_SEQUENCE}') %% %s, %s, %s, %s, %s, %s, %s
+    )
+    ON CONFLICT (slot) DO UPDATE SET
+        source = EXCLUDED.source,
+        sql = EXCLUDED.sql,
+        duration_ms = EXCLUDED.duration_ms,
+        plan = EXCLUDED.plan,
+        plan_analyzed = EXCLUDED.plan_analyzed,
+        created_at = EXCLUDED.created_at
+'''
+
+
+def is_read_only_select(statement: str, sql: str):
+    return statement == 'SELECT' and not NOT_READ_ONLY_SELECT.search(sql)
+
+
+def explain(sql: str, params):
+    """
+    План запроса. Читающий SELECT выполняется повторно с ANALYZE
+    и BUFFERS в транзакции только для чтения. WITH (в нем могут
+    быть UPDATE и DELETE), INSERT, UPDATE и DELETE только
+    планируются. Вернет план и признак ANALYZE,
+    для остальных запросов — None
+    """
+    words = sql.lstrip('( \n\t').split(None, 1)
+    statement = words[0].upper() if words else ''
+    if statement not in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'):
+        return None, False
+    analyze = is_read_only_select(statement, sql)
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}'
+            )
+            if analyze:
+                # запись из вызванной в запросе функции
+                # завершится ошибкой, а не выполнится
+                cursor.execute('SET LOCAL transaction_read_only = on')
+            cursor.execute(f'EXPLAIN ({options}) {sql}', params)
+            plan = cursor.fetchone()[0]
+        transaction.set_rollback(True)
+    return plan, analyze
+
+
+def save_slow_queries(source: str, slow_queries: list):
+    """
+    Записывает медленные запросы view или задачи в журнал.
+    Вызывается после отправки ответа (см. ServerTimingMiddleware)
+    или после задачи, вне их транзакций.
+    Ошибки не пробрасываются, чтобы не сломать ответ
+    """
+    if not slow_queries:
+        return
+    slowest = sorted(slow_queries, key=lambda query: query[3], reverse=True)
+    try:
+        for sql, params, many, elapsed in slowest[:SLOW_QUERIES_PER_SOURCE]:
+            plan, analyzed = None, False
+            if not many and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+                try:
+                    plan, analyzed = explain(sql, params)
+                except DatabaseError as exc:
+                    logger.warning('EXPLAIN of slow query failed: %s', exc)
+            with connection.cursor() as cursor:
+                cursor.execute(SAVE_SLOW_QUERY_SQL, [
+                    SLOW_QUERY_LOG_SIZE,
+                    source[:255],
+                    sql,
+                    round(elapsed * 1000, 3),
+                    None if plan is None else json.dumps(plan),
+                    analyzed,
+                    timezone.now()
+                ])
+    except DatabaseError as exc:
+        logger.warning('Slow queries of %s are not saved: %s', source, exc)
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# запросы к базе дольше порога попадают в журнал медленных запросов
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200)
+)
+
+# заголовок Server-Timing отдается только сотрудникам,
+# SERVER_TIMING_PUBLIC=1 включает его для всех ответов
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC') == '1'
+
+# верхние границы корзин гистограммы времени ответа, мс
+TIMING_BUCKETS_MS = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+# замеры текущего запроса, None вне запроса
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Замеры одного запроса: время SQL, обращения к кэшу,
+    время работы view (вместе с сериализаторами) и рендера ответа.
+    Медленные SQL-запросы копятся в slow_queries
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.view_finished = None
+        self.render_time = 0.0
+        # (sql, params, many, время в секундах)
+        self.slow_queries = []
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """
+        Обертка для connection.execute_wrapper
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_time += elapsed
+            self.db_queries += 1
+            if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+                self.slow_queries.append((sql, params, many, elapsed))
+
+    def mark_view_finished(self):
+        self.view_finished = time.perf_counter()
+
+    def mark_rendered(self):
+        if self.view_finished is not None:
+            self.render_time = time.perf_counter() - self.view_finished
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def view_time(self):
+        """
+        Время кода приложения без SQL и рендера
+        """
+        return max(self.total - self.db_time - self.render_time, 0)
+
+    def server_timing(self):
+        """
+        Значение заголовка Server-Timing
+        """
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits {self.cache_misses} misses"',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'render;dur={self.render_time * 1000:.1f}',
+        ))
+
+
+def record_cache_access(hits: int, misses: int):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+class ViewHistograms:
+    """
+    Гистограммы времени ответа и суммы замеров по view.
+    Данные копятся в памяти процесса
+    """
+
+    def __init__(self, buckets: tuple = TIMING_BUCKETS_MS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view: str, timings: RequestTimings):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = {
+                    'count': 0,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'total_ms': 0.0,
+                    'db_ms': 0.0,
+                    'db_queries': 0,
+                    'render_ms': 0.0,
+                    'cache_hits': 0,
+                    'cache_misses': 0,
+                }
+            total_ms = timings.total * 1000
+            stats['count'] += 1
+            stats['buckets'][bisect_left(self.buckets, total_ms)] += 1
+            stats['total_ms'] += total_ms
+            stats['db_ms'] += timings.db_time * 1000
+            stats['db_queries'] += timings.db_queries
+            stats['render_ms'] += timings.render_time * 1000
+            stats['cache_hits'] += timings.cache_hits
+            stats['cache_misses'] += timings.cache_misses
+
+    def quantile(self, buckets: list, count: int, q: float):
+        """
+        Оценка квантиля по гистограмме: верхняя граница корзины,
+        в которую он попал. Для последней корзины вернет None
+        """
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self):
+        """
+        Сводка по view, самые нагруженные по суммарному времени первыми
+        """
+        with self.lock:
+            views = {view: dict(stats, buckets=list(stats['buckets']))
+                     for view, stats in self.views.items()}
+        result = []
+        for view, stats in views.items():
+            count = stats['count']
+            result.append({
+                'view': view,
+                'count': count,
+                'total_ms': round(stats['total_ms'], 1),
+                'mean_ms': round(stats['total_ms'] / count, 1),
+                'p50_ms': self.quantile(stats['buckets'], count, 0.5),
+                'p95_ms': self.quantile(stats['buckets'], count, 0.95),
+                'p99_ms': self.quantile(stats['buckets'], count, 0.99),
+                'db_queries_mean': round(stats['db_queries'] / count, 2),
+                'db_ms_mean': round(stats['db_ms'] / count, 1),
+                'render_ms_mean': round(stats['render_ms'] / count, 1),
+                'cache_hits': stats['cache_hits'],
+                'cache_misses': stats['cache_misses'],
+                'histogram': {
+                    str(bound): bucket_count for bound, bucket_count in zip(
+                        self.buckets + ('+Inf',), stats['buckets']
+                    )
+                },
+            })
+        return sorted(result, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+view_histograms = ViewHistograms()
@@ -0,0 +1,314 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# файл, в который спаны пишутся построчно в JSON
+TRACE_EXPORT_PATH = os.environ.get('TRACE_EXPORT_PATH')
+
+# url коллектора, которому спаны отправляются пачками
+# POST-запросом {"spans": [...]}
+TRACE_COLLECTOR_URL = os.environ.get('TRACE_COLLECTOR_URL')
+
+# доля трасс, которые записываются; решение принимается
+# в начале трассы и передается дальше флагом в traceparent
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+
+# сколько спанов коллектор получает за один запрос
+COLLECTOR_BATCH_SIZE = 200
+
+# как часто, в секундах, пачка уходит коллектору
+COLLECTOR_FLUSH_INTERVAL = 2.0
+
+# сколько спанов ждут отправки, лишние отбрасываются,
+# чтобы недоступный коллектор не съел память
+COLLECTOR_QUEUE_SIZE = 10000
+
+COLLECTOR_TIMEOUT = 5
+
+TRACEPARENT_PATTERN = re.compile(
+    r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$'
+)
+
+# текущий спан, None вне трассы
+current_span = ContextVar('current_span', default=None)
+
+
+class SpanContext:
+    """
+    Идентификаторы спана, пришедшие из другого процесса
+    """
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+def parse_traceparent(header):
+    """
+    SpanContext из заголовка traceparent (W3C Trace Context)
+    или None, если заголовка нет или он неверный
+    """
+    match = TRACEPARENT_PATTERN.match((header or '').strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Span:
+    """
+    Участок трассы: запрос к API, задача Celery
+    или обращение к внешнему сервису
+    """
+
+    def __init__(self, name: str, kind: str = 'internal', parent=None,
+                 attributes: dict = None):
+        if parent is None:
+            self.trace_id = secrets.token_hex(16)
+            self.parent_id = None
+            self.sampled = random.random() < TRACE_SAMPLE_RATE
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        self.span_id = secrets.token_hex(8)
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+
+    @property
+    def traceparent(self):
+        flags = '01' if self.sampled else '00'
+        return f'00-{self.trace_id}-{self.span_id}-{flags}'
+
+    def set_error(self, exc: BaseException):
+        self.status = 'error'
+        self.attributes['error.type'] = type(exc).__name__
+
+    def finish(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.started
+        if self.sampled and exporter is not None:
+            try:
+                exporter.export(self.to_dict())
+            except Exception:
+                logger.exception('Span export failed')
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.start,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+            'pid': os.getpid(),
+        }
+
+
+def tracing_enabled():
+    return exporter is not None
+
+
+@contextmanager
+def start_span(name: str, kind: str = 'internal', parent=None,
+               attributes: dict = None):
+    """
+    Спан на время блока, по умолчанию дочерний к текущему.
+    Если трассировка выключена, вернет None
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    span = Span(
+        name, kind, parent=parent or current_span.get(),
+        attributes=attributes
+    )
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.set_error(exc)
+        raise
+    finally:
+        current_span.reset(token)
+        span.finish()
+
+
+def inject(headers: dict):
+    """
+    Добавит в заголовки traceparent текущего спана
+    """
+    span = current_span.get()
+    if span is not None:
+        headers['traceparent'] = span.traceparent
+    return headers
+
+
+class FileSpanExporter:
+    """
+    Дописывает спаны в файл, по строке JSON на спан.
+    Файл открывается на каждую запись в режиме добавления,
+    поэтому в него могут писать несколько процессов
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, span: dict):
+        line = json.dumps(span, default=str) + '\n'
+        with self.lock, open(self.path, 'a') as trace_file:
+            trace_file.write(line)
+
+
+class CollectorSpanExporter:
+    """
+    Копит спаны в очереди и отправляет их коллектору
+    пачками из фонового потока, запрос не ждет отправки
+    """
+
+    def __init__(self, url: str, batch_size: int = COLLECTOR_BATCH_SIZE,
+                 interval: float = COLLECTOR_FLUSH_INTERVAL):
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=COLLECTOR_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        atexit.register(self.flush)
+
+    def export(self, span: dict):
+        self.ensure_thread()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def ensure_thread(self):
+        # после fork воркера gunicorn или Celery потока
+        # в дочернем процессе нет, он запускается заново
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+            self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                requests.post(
+                    self.url, json={'spans': batch}, timeout=COLLECTOR_TIMEOUT
+                )
+            except requests.RequestException:
+                logger.warning('Trace collector is unavailable')
+                return
+
+
+def get_exporter():
+    if TRACE_EXPORT_PATH:
+        return FileSpanExporter(TRACE_EXPORT_PATH)
+    if TRACE_COLLECTOR_URL:
+        return CollectorSpanExporter(TRACE_COLLECTOR_URL)
+    return None
+
+
+exporter = get_exporter()
+
+
+def load_traces(path):
+    """
+    Спаны из файла экспорта, сгруппированные по трассам
+    """
+    traces = defaultdict(list)
+    with open(path) as trace_file:
+        for line in trace_file:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                # строка, которую процесс не успел дописать
+                continue
+            traces[span['trace_id']].append(span)
+    return traces
+
+
+def trace_duration(spans: list):
+    """
+    Время от начала первого до конца последнего спана трассы, мс
+    """
+    start = min(span['start'] for span in spans)
+    end = max(span['start'] + span['duration_ms'] / 1000 for span in spans)
+    return (end - start) * 1000
+
+
+def format_trace(spans: list):
+    """
+    Строки дерева спанов трассы: сдвиг от начала трассы,
+    длительность и имя спана с отступом по вложенности
+    """
+    start = min(span['start'] for span in spans)
+    ids = {span['span_id'] for span in spans}
+    children = defaultdict(list)
+    for span in spans:
+        parent = span['parent_id'] if span['parent_id'] in ids else None
+        children[parent].append(span)
+    lines = []
+
+    def walk(parent, depth):
+        for span in sorted(children[parent], key=lambda span: span['start']):
+            offset = (span['start'] - start) * 1000
+            error = ' ERROR' if span['status'] == 'error' else ''
+            lines.append(
+                f'{offset:>9.1f} {span["duration_ms"]:>9.1f} ms  '
+                f'{"  " * depth}{span["name"]} [{span["kind"]}]{error}'
+            )
+            walk(span['span_id'], depth + 1)
+
+    walk(None, 0)
+    return lines
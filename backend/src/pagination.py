@@ -0,0 +1,236 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# начиная с какого числа строк вместо COUNT(*) берется оценка планировщика
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который на больших таблицах берет количество строк
+    из статистики PostgreSQL вместо COUNT(*).
+
+    Для запроса без условий это pg_class.reltuples, для запроса
+    с условиями — оценка строк из EXPLAIN. Если оценка меньше
+    estimate_threshold, считается точное количество
+    """
+    estimate_threshold = ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self):
+        estimate = None
+        if isinstance(self.object_list, QuerySet):
+            estimate = get_estimated_count(self.object_list)
+        if estimate is None or estimate < self.estimate_threshold:
+            return super().count
+        return estimate
+
+
+def get_estimated_count(queryset: QuerySet):
+    """
+    Оценка количества строк запроса по статистике планировщика
+    или None, если ее нет
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct \
+                and not query.is_sliced and query.combinator is None:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # -1, если по таблице еще не собиралась статистика
+            if row is None or row[0] < 0:
+                return None
+            return int(row[0])
+        sql, params = query.get_compiler(using=queryset.db).as_sql()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по курсору на (created_at, id), от новых к старым.
+
+    Следующая страница выбирается условием по последней строке
+    предыдущей, без OFFSET и COUNT(*), поэтому любая страница стоит
+    столько же, сколько первая. Для этого нужен индекс
+    (created_at DESC, id DESC) под фильтр представления.
+
+    С параметром page работает как PageNumberPagination,
+    количество строк при этом оценивается через EstimatedCountPaginator
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 30
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_number_pagination(self):
+        pagination = EstimatedCountPagination()
+        pagination.page_size = self.page_size
+        pagination.page_size_query_param = self.page_size_query_param
+        pagination.max_page_size = self.max_page_size
+        pagination.page_query_param = self.page_query_param
+        return pagination
+
+    def get_page_size(self, request):
+        return self.get_page_number_pagination().get_page_size(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_pagination = None
+        if self.page_query_param in request.query_params:
+            self.page_number_pagination = self.get_page_number_pagination()
+            return self.page_number_pagination.paginate_queryset(
+                queryset, request, view=view
+            )
+
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.reverse = False
+        if cursor is None:
+            queryset = queryset.order_by('-created_at', '-id')
+        else:
+            self.reverse, created_at, pk = cursor
+            if self.reverse:
+                queryset = queryset.filter(
+                    created_at__gte=created_at
+                ).exclude(
+                    created_at=created_at, id__lte=pk
+                ).order_by('created_at', 'id')
+            else:
+                queryset = queryset.filter(
+                    created_at__lte=created_at
+                ).exclude(
+                    created_at=created_at, id__gte=pk
+                ).order_by('-created_at', '-id')
+
+        # лишняя строка показывает, есть ли следующая страница
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if self.reverse:
+            page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        self.page = page
+        return page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            reverse, created_at, pk = b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split('|')
+            created_at = parse_datetime(created_at)
+            if created_at is None or reverse not in ('0', '1'):
+                raise ValueError
+            return reverse == '1', created_at, int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item, reverse=False):
+        value = f'{int(reverse)}|{item.created_at.isoformat()}|{item.pk}'
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            b64encode(value.encode('ascii')).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_fields(self, view):
+        return self.get_page_number_pagination().get_schema_fields(view) + [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(
+                    title='Cursor',
+                    description='The pagination cursor value.'
+                )
+            )
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        return self.get_page_number_pagination(
+        ).get_schema_operation_parameters(view) + [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -0,0 +1,18 @@
+def call_after_response(response, func):
+    """
+    Вызовет func после отправки ответа клиенту.
+
+    Сервер вызывает response.close(), когда ответ уже отправлен,
+    func выполняется перед исходным close, то есть до сигнала
+    request_finished, который закрывает соединения с базой
+    """
+    close = response.close
+
+    def close_after(*args, **kwargs):
+        try:
+            func()
+        finally:
+            close(*args, **kwargs)
+
+    response.close = close_after
+    return response
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from src.reviews.models import Review
+from src.reviews.moderation import delete_reviews, set_published
 
 
 @admin.register(Review)
@@ -11,6 +12,7 @@ class ReviewAdmin(admin.ModelAdmin):
         'created_at',
         'is_published'
     )
+    list_filter = ('is_published', 'rating')
     readonly_fields = [
         'first_name',
         'last_name',
@@ -19,3 +21,18 @@ class ReviewAdmin(admin.ModelAdmin):
         'rating',
         'created_at',
         ]
+    actions = ['publish', 'unpublish']
+
+    @admin.action(description='Опубликовать выбранные отзывы')
+    def publish(self, request, queryset):
+        changed = set_published(queryset, True)
+        self.message_user(request, f'Опубликовано отзывов: {changed}')
+
+    @admin.action(description='Снять с публикации выбранные отзывы')
+    def unpublish(self, request, queryset):
+        changed = set_published(queryset, False)
+        self.message_user(request, f'Снято с публикации отзывов: {changed}')
+
+    def delete_queryset(self, request, queryset):
+        # действие "удалить выбранные" после подтверждения
+        delete_reviews(queryset)
@@ -76,3 +76,14 @@ class AddReviewLogicSerializer(serializers.ModelSerializer):
                     detail='A rating should be a number between 1 and 5'
                 )
             return value
+
+
+class ReviewModerationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(
+        choices=['publish', 'unpublish', 'delete']
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=10000
+    )
@@ -1,5 +1,11 @@
 from faker import Faker
-from src.tests import CreateUsersTestCase
+from src.tests import CreateUsersTestCase, explain_without_seqscan
+from src.reviews.models import Review, ReviewRatingCounter
+from src.reviews.moderation import delete_reviews, set_published
+from src.reviews.stats import rebuild_rating_counters
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
 from django.urls import reverse
 
 
@@ -57,7 +63,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(all_reviews.get('count'), len(users))
+        self.assertEqual(len(all_reviews.get('results')), len(users))
         for user in users.values():
             self.assertContains(
                 response, text=user.get('first_name'), count=1
@@ -143,7 +149,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
-        self.assertEqual(all_reviews.get('count'), len(users))
+        self.assertEqual(len(all_reviews.get('results')), len(users))
         for user in users.values():
             self.assertContains(
                 response, user.get('first_name'), count=1
@@ -206,7 +212,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(all_reviews.get('count'), len(users))
+        self.assertEqual(len(all_reviews.get('results')), len(users))
         for user in users.values():
             self.assertContains(
                 response, user.get('first_name'), count=1
@@ -267,7 +273,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
         self.assertEqual(response.status_code, 200)
-        self.assertNotEqual(all_reviews.get('count'), len(users))
+        self.assertNotEqual(len(all_reviews.get('results')), len(users))
 
     def test_create_review_by_user_without_phone_number_without_add_data(self):
         """
@@ -308,7 +314,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
         self.assertEqual(response.status_code, 200)
-        self.assertNotEqual(all_reviews.get('count'), len(users))
+        self.assertNotEqual(len(all_reviews.get('results')), len(users))
 
     def test_create_review_by_user_without_phone_number_with_add_data(self):
         """
@@ -374,7 +380,7 @@ class ReviewTestCase(CreateUsersTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('data', response.json().keys())
         all_reviews = response.json().get('data')
-        self.assertEqual(all_reviews.get('count'), len(users))
+        self.assertEqual(len(all_reviews.get('results')), len(users))
         for user in users.values():
             self.assertContains(
                 response, user.get('first_name'), count=1
@@ -388,3 +394,435 @@ class ReviewTestCase(CreateUsersTestCase):
             self.assertContains(
                 response, user.get('text'), count=1
             )
+
+
+class ReviewsPaginationTestCase(TestCase):
+
+    def setUp(self):
+        # страницы отзывов кэшируются, кэш прошлых тестов не нужен
+        cache.clear()
+        Review.objects.bulk_create([
+            Review(
+                first_name=f'first_{index}',
+                last_name='last',
+                phone_number='80000000000',
+                text='text',
+                rating=5,
+                is_published=True
+            )
+            for index in range(12)
+        ])
+        # одинаковое время создания у части отзывов
+        Review.objects.filter(
+            first_name__in=['first_3', 'first_4', 'first_5']
+        ).update(created_at=Review.objects.first().created_at)
+
+    def get_page(self, url, **params):
+        response = self.client.get(path=url, data=params)
+        self.assertEqual(response.status_code, 200)
+        return response.json().get('data')
+
+    def test_cursor_pagination(self):
+        """
+        Проверяет, что отзывы проходятся по курсору без пропусков
+        и повторов, и что по ссылке previous возвращается
+        предыдущая страница
+        """
+        expected = list(Review.objects.order_by(
+            '-created_at', '-id'
+        ).values_list('id', flat=True))
+        pages = []
+        page = self.get_page(reverse('reviews'), page_size=5)
+        self.assertNotIn('count', page.keys())
+        self.assertIsNone(page.get('previous'))
+        pages.append(page)
+        while page.get('next'):
+            page = self.get_page(page.get('next'))
+            pages.append(page)
+        self.assertEqual([len(page['results']) for page in pages], [5, 5, 2])
+        self.assertEqual(
+            [review['id'] for page in pages for review in page['results']],
+            expected
+        )
+
+        previous = self.get_page(pages[2].get('previous'))
+        self.assertEqual(previous.get('results'), pages[1].get('results'))
+        self.assertIsNotNone(previous.get('next'))
+
+    def test_page_number_pagination(self):
+        """
+        Проверяет постраничный вывод отзывов по номеру страницы
+        """
+        page = self.get_page(reverse('reviews'), page=2, page_size=5)
+        self.assertEqual(page.get('count'), 12)
+        self.assertEqual(len(page.get('results')), 5)
+
+    def test_published_reviews_use_index(self):
+        """
+        Проверяет, что выборка опубликованных отзывов
+        идет по индексу review_published_created_idx
+        """
+        plan = explain_without_seqscan(Review.objects.filter(
+            is_published=True
+        ).order_by('-created_at', '-id')[:6])
+        self.assertIn('review_published_created_idx', plan)
+
+    def test_invalid_cursor(self):
+        """
+        Проверяет запрос с неверным курсором
+        """
+        response = self.client.get(
+            path=reverse('reviews'), data={'cursor': 'invalid'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ReviewsCacheTestCase(CreateUsersTestCase):
+    """
+    Список опубликованных отзывов отдается из кэша,
+    изменение отзывов сбрасывает кэш после коммита
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.review = self.create_review(is_published=True)
+        return result
+
+    def create_review(self, is_published):
+        return Review.objects.create(
+            first_name='first',
+            last_name='last',
+            phone_number='80000000000',
+            text='text',
+            rating=5,
+            is_published=is_published
+        )
+
+    def get_reviews(self):
+        response = self.client.get(path=reverse('reviews'))
+        self.assertEqual(response.status_code, 200)
+        ids = [
+            review['id'] for review in response.json()['data']['results']
+        ]
+        return response['X-Cache'], ids
+
+    def test_new_review_keeps_cache(self):
+        """
+        Проверяет, что неопубликованный отзыв не сбрасывает кэш,
+        а повторный запрос отдается из кэша без запросов к базе
+        """
+        self.assertEqual(self.get_reviews(), ('miss', [self.review.pk]))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.create_review(is_published=False)
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_reviews(), ('hit', [self.review.pk]))
+
+    def test_publish_and_delete_invalidate_cache(self):
+        """
+        Проверяет, что публикация и удаление отзыва сбрасывают кэш
+        """
+        review = self.create_review(is_published=False)
+        self.get_reviews()
+        with self.captureOnCommitCallbacks(execute=True):
+            review.is_published = True
+            review.save()
+        self.assertEqual(
+            self.get_reviews(), ('miss', [review.pk, self.review.pk])
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertEqual(self.get_reviews(), ('miss', [self.review.pk]))
+
+    def test_cache_is_kept_until_commit(self):
+        """
+        Проверяет, что кэш сбрасывается только после коммита
+        """
+        self.get_reviews()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.review.is_published = False
+            self.review.save()
+            self.assertEqual(self.get_reviews()[0], 'hit')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_reviews(), ('miss', []))
+
+    def test_admin_unpublish_invalidates_cache(self):
+        """
+        Проверяет, что снятие отзыва с публикации в админке
+        сбрасывает кэш
+        """
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        self.client.force_login(admin_user)
+        self.get_reviews()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('admin:reviews_review_change', args=[self.review.pk]),
+                data={'is_published': ''}
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_reviews(), ('miss', []))
+
+
+class ReviewStatsTestCase(CreateUsersTestCase):
+    """
+    Счетчики оценок меняются вместе с отзывами,
+    статистика читается только из счетчиков
+    """
+
+    def create_review(self, rating, is_published=True):
+        return Review.objects.create(
+            first_name='first',
+            last_name='last',
+            phone_number='80000000000',
+            text='text',
+            rating=rating,
+            is_published=is_published
+        )
+
+    def get_counters(self):
+        return dict(ReviewRatingCounter.objects.exclude(
+            count=0
+        ).values_list('rating', 'count'))
+
+    def test_counters_follow_moderation(self):
+        """
+        Проверяет, что публикация, снятие с публикации,
+        смена оценки и удаление меняют счетчики
+        """
+        five = self.create_review(5)
+        self.create_review(5)
+        three = self.create_review(3, is_published=False)
+        self.assertEqual(self.get_counters(), {5: 2})
+
+        three.is_published = True
+        three.save()
+        five.is_published = False
+        five.save()
+        self.assertEqual(self.get_counters(), {3: 1, 5: 1})
+
+        three = Review.objects.only('id').get(pk=three.pk)
+        three.rating = 4
+        three.save(update_fields=['rating'])
+        self.assertEqual(self.get_counters(), {4: 1, 5: 1})
+
+        Review.objects.filter(rating=4).delete()
+        five.delete()
+        self.assertEqual(self.get_counters(), {5: 1})
+
+    def test_stale_copies_are_counted_once(self):
+        """
+        Проверяет, что две копии одного отзыва, загруженные
+        до публикации, учитываются в счетчиках один раз
+        """
+        review = self.create_review(4, is_published=False)
+        first = Review.objects.get(pk=review.pk)
+        second = Review.objects.get(pk=review.pk)
+        first.is_published = True
+        first.save()
+        second.is_published = True
+        second.save()
+        self.assertEqual(self.get_counters(), {4: 1})
+
+        first.is_published = False
+        first.save()
+        second.rating = 2
+        second.save()
+        self.assertEqual(self.get_counters(), {2: 1})
+
+    def test_saving_text_makes_no_extra_queries(self):
+        """
+        Проверяет, что сохранение отзыва без изменения публикации
+        и оценки не читает отзыв повторно
+        """
+        review = Review.objects.get(pk=self.create_review(5).pk)
+        review.text = 'new text'
+        with self.assertNumQueries(1):
+            review.save()
+        review = Review.objects.get(pk=review.pk)
+        with self.assertNumQueries(2):
+            # DELETE и изменение счетчика
+            review.delete()
+        self.assertEqual(self.get_counters(), {})
+
+    def test_stats_endpoint(self):
+        """
+        Проверяет статистику оценок, прочитанную одним запросом
+        """
+        for rating in (5, 5, 4, 1):
+            self.create_review(rating)
+        self.create_review(2, is_published=False)
+        with self.assertNumQueries(1):
+            response = self.client.get(path=reverse('review-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], {
+            'count': 4,
+            'average': 3.75,
+            'histogram': {'1': 1, '2': 0, '3': 0, '4': 1, '5': 2}
+        })
+
+    def test_rebuild(self):
+        """
+        Проверяет пересчет счетчиков после вставки в обход модели
+        """
+        Review.objects.bulk_create([
+            Review(
+                first_name='first',
+                last_name='last',
+                phone_number='80000000000',
+                text='text',
+                rating=2,
+                is_published=True
+            )
+        ])
+        self.assertEqual(self.get_counters(), {})
+        rebuild_rating_counters()
+        self.assertEqual(self.get_counters(), {2: 1})
+
+
+class ReviewModerationTestCase(CreateUsersTestCase):
+    """
+    Массовая модерация: один запрос к таблице отзывов,
+    счетчики оценок и кэш отзывов обновляются один раз
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.create_token()
+        self.reviews = Review.objects.bulk_create([
+            Review(
+                first_name='first',
+                last_name='last',
+                phone_number='80000000000',
+                text='text',
+                rating=rating,
+                is_published=False
+            )
+            for rating in (1, 3, 5, 5)
+        ])
+        return result
+
+    def get_counters(self):
+        return dict(ReviewRatingCounter.objects.exclude(
+            count=0
+        ).values_list('rating', 'count'))
+
+    def get_published(self):
+        return set(Review.objects.filter(
+            is_published=True
+        ).values_list('id', flat=True))
+
+    def moderate(self, action, ids, user='user_1'):
+        return self.client.post(
+            path=reverse('review-moderation'),
+            data={'action': action, 'ids': ids},
+            content_type='application/json',
+            headers={
+                'Authorization': f'Bearer {self.users[user]["token"]}'
+            }
+        )
+
+    def test_publish_and_unpublish(self):
+        """
+        Проверяет массовую публикацию и снятие с публикации:
+        счетчики оценок меняются только для измененных отзывов,
+        кэш сбрасывается один раз
+        """
+        ids = [review.id for review in self.reviews]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            # UPDATE с подсчетом оценок и изменение счетчиков
+            with self.assertNumQueries(4):
+                self.assertEqual(
+                    set_published(Review.objects.filter(id__in=ids), True),
+                    4
+                )
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.get_published(), set(ids))
+        self.assertEqual(self.get_counters(), {1: 1, 3: 1, 5: 2})
+
+        # уже опубликованные не считаются повторно
+        self.assertEqual(
+            set_published(Review.objects.filter(id__in=ids[:2]), True), 0
+        )
+        self.assertEqual(
+            set_published(Review.objects.filter(rating=5), False), 2
+        )
+        self.assertEqual(self.get_published(), set(ids[:2]))
+        self.assertEqual(self.get_counters(), {1: 1, 3: 1})
+
+    def test_delete(self):
+        """
+        Проверяет массовое удаление отзывов со списанием
+        опубликованных оценок из счетчиков
+        """
+        ids = [review.id for review in self.reviews]
+        set_published(Review.objects.filter(id__in=ids[1:]), True)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(
+                delete_reviews(Review.objects.filter(id__in=ids[:3])), 3
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            set(Review.objects.values_list('id', flat=True)), set(ids[3:])
+        )
+        self.assertEqual(self.get_counters(), {5: 1})
+
+    def test_moderation_endpoint(self):
+        """
+        Проверяет эндпоинт модерации: доступ только персоналу,
+        публикацию, удаление и неверные запросы
+        """
+        ids = [review.id for review in self.reviews]
+        response = self.moderate('publish', ids)
+        self.assertEqual(response.status_code, 403)
+
+        get_user_model().objects.filter(
+            username=self.users['user_1']['username']
+        ).update(is_staff=True)
+        response = self.moderate('publish', ids[:3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['data'], {'action': 'publish', 'count': 3}
+        )
+        self.assertEqual(self.get_published(), set(ids[:3]))
+
+        response = self.moderate('delete', ids[2:])
+        self.assertEqual(response.json()['data']['count'], 2)
+        self.assertEqual(self.get_counters(), {1: 1, 3: 1})
+
+        response = self.moderate('archive', ids)
+        self.assertEqual(response.status_code, 400)
+        response = self.moderate('publish', [])
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_actions(self):
+        """
+        Проверяет действия публикации и удаления в админке
+        """
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        self.client.force_login(admin_user)
+        ids = [review.id for review in self.reviews]
+        response = self.client.post(
+            reverse('admin:reviews_review_changelist'),
+            data={'action': 'publish', '_selected_action': ids[1:]}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_counters(), {3: 1, 5: 2})
+
+        response = self.client.post(
+            reverse('admin:reviews_review_changelist'),
+            data={
+                'action': 'delete_selected',
+                '_selected_action': ids[2:],
+                'post': 'yes'
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(Review.objects.values_list('id', flat=True)), set(ids[:2])
+        )
+        self.assertEqual(self.get_counters(), {3: 1})
@@ -1,7 +1,18 @@
 from django.urls import path
-from src.reviews.api.v1.views import AllReviewsView, AddReviewView
+from src.reviews.api.v1.views import (
+    AllReviewsView,
+    AddReviewView,
+    ReviewStatsView,
+    ReviewModerationView
+)
 
 urlpatterns = [
     path('add/', AddReviewView.as_view(), name='review-add'),
     path('', AllReviewsView.as_view(), name='reviews'),
+    path('stats/', ReviewStatsView.as_view(), name='review-stats'),
+    path(
+        'moderation/',
+        ReviewModerationView.as_view(),
+        name='review-moderation'
+    ),
 ]
\ No newline at end of file
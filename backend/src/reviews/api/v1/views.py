@@ -1,20 +1,23 @@
-from django.contrib.auth import get_user_model
 from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.views import APIView
 from src.reviews.api.v1.serializers import (
     ReviewsSerializer,
     AddReviewLogicSerializer,
-    AddReviewSerializer
+    AddReviewSerializer,
+    ReviewModerationSerializer
 )
 from src.reviews.models import Review
 from src.reviews.api.v1.renderars import ReviewDataRender
+from src.reviews.moderation import delete_reviews, set_published
+from src.reviews.stats import get_rating_stats
+from src.caching import cache_response
+from src.reviews.constants import REVIEWS_CACHE_KEY_PREFIX
+from src.pagination import KeysetPagination
 
 
-User = get_user_model()
-
-
-class ReviewsListPagination(PageNumberPagination):
+class ReviewsListPagination(KeysetPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 30
@@ -30,21 +33,15 @@ class AddReviewView(generics.GenericAPIView):
             return request.data
 
         elif request.user.is_authenticated:
-            uuid = request.user.uuid
-            user = User.objects.get(uuid=uuid)
-            first_name = request.data.get('first_name')
-            last_name = request.data.get('last_name')
-            phone_number = request.data.get('phone_number')
-
-            if not user.first_name and first_name:
-                user.first_name = first_name
-                user.save()
-            if not user.last_name and last_name:
-                user.last_name = last_name
-                user.save()
-            if not user.phone_number and phone_number:
-                user.phone_number = phone_number
-                user.save()
+            user = request.user
+            changed_fields = []
+            for field in ('first_name', 'last_name', 'phone_number'):
+                value = request.data.get(field)
+                if not getattr(user, field) and value:
+                    setattr(user, field, value)
+                    changed_fields.append(field)
+            if changed_fields:
+                user.save(update_fields=changed_fields)
 
             return {
                 'first_name': user.first_name,
@@ -78,3 +75,50 @@ class AllReviewsView(generics.ListAPIView):
             is_published=True
         )
         return queryset
+
+    # кэш сбрасывается при изменении отзывов, см. src.reviews.signals
+    @cache_response(
+        REVIEWS_CACHE_KEY_PREFIX, timeout=60 * 60, stale_timeout=10 * 60
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ReviewStatsView(APIView):
+    """
+    Статистика оценок опубликованных отзывов: число отзывов,
+    средняя оценка и число отзывов с каждой оценкой
+    """
+    renderer_classes = (ReviewDataRender,)
+
+    @cache_response(
+        REVIEWS_CACHE_KEY_PREFIX, timeout=60 * 60, stale_timeout=10 * 60
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(get_rating_stats(), status=status.HTTP_200_OK)
+
+
+class ReviewModerationView(generics.GenericAPIView):
+    """
+    Публикация, снятие с публикации или удаление отзывов
+    списком ids одним запросом к таблице отзывов
+    """
+    renderer_classes = (ReviewDataRender,)
+    serializer_class = ReviewModerationSerializer
+    permission_classes = [IsAdminUser, ]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        queryset = Review.objects.filter(
+            id__in=serializer.validated_data['ids']
+        )
+        if action == 'delete':
+            count = delete_reviews(queryset)
+        else:
+            count = set_published(queryset, action == 'publish')
+        return Response(
+            {'action': action, 'count': count},
+            status=status.HTTP_200_OK
+        )
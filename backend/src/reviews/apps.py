@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'src.reviews'
+
+    def ready(self):
+        from src.reviews import signals  # noqa: F401
@@ -0,0 +1,5 @@
+# префикс кэша ответов списка опубликованных отзывов
+REVIEWS_CACHE_KEY_PREFIX = 'reviews'
+
+# возможные оценки отзыва
+RATINGS = range(1, 6)
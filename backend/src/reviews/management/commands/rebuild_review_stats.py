@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from src.reviews.constants import RATINGS
+from src.reviews.stats import rebuild_rating_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики оценок по опубликованным отзывам, '
+        'если отзывы менялись в обход модели'
+    )
+
+    def handle(self, *args, **options):
+        counts = rebuild_rating_counters()
+        self.stdout.write(', '.join(
+            f'{rating}: {counts.get(rating, 0)}' for rating in RATINGS
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 04:45
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # индекс строится CONCURRENTLY, без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at', '-id'], name='review_published_created_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 06:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Начальные значения счетчиков по уже опубликованным отзывам
+    """
+    Review = apps.get_model('reviews', 'Review')
+    ReviewRatingCounter = apps.get_model('reviews', 'ReviewRatingCounter')
+    counts = dict(
+        Review.objects.filter(is_published=True).values_list(
+            'rating'
+        ).annotate(Count('id')).order_by()
+    )
+    ReviewRatingCounter.objects.bulk_create([
+        ReviewRatingCounter(rating=rating, count=counts.get(rating, 0))
+        for rating in range(1, 6)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_review_published_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewRatingCounter',
+            fields=[
+                ('rating', models.PositiveSmallIntegerField(primary_key=True, serialize=False, verbose_name='Оценка')),
+                ('count', models.IntegerField(default=0, verbose_name='Опубликовано отзывов')),
+            ],
+            options={
+                'verbose_name': 'счетчик оценок',
+                'verbose_name_plural': 'Счетчики оценок',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -22,7 +22,41 @@ class Review(models.Model):
         default=False, verbose_name='Опубликован'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # оценка, с которой отзыв учтен в счетчиках оценок,
+        # см. src.reviews.stats
+        if 'is_published' in field_names and 'rating' in field_names:
+            instance.counted_rating = (
+                instance.rating if instance.is_published else None
+            )
+        return instance
+
     class Meta:
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='review_published_created_idx',
+                condition=models.Q(is_published=True)
+            ),
+        ]
+
+
+class ReviewRatingCounter(models.Model):
+    """
+    Число опубликованных отзывов с оценкой rating
+    """
+    rating = models.PositiveSmallIntegerField(
+        primary_key=True, verbose_name='Оценка'
+    )
+    count = models.IntegerField(
+        default=0, verbose_name='Опубликовано отзывов'
+    )
+
+    class Meta:
+        verbose_name = 'счетчик оценок'
+        verbose_name_plural = 'Счетчики оценок'
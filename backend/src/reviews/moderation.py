@@ -0,0 +1,83 @@
+from django.db import connection, transaction
+
+from src.reviews.models import Review
+from src.reviews.signals import invalidate_reviews_cache
+from src.reviews.stats import adjust_rating_counters
+
+
+REVIEW_TABLE = Review._meta.db_table
+
+# Меняет is_published у выбранных отзывов, у которых он другой,
+# и возвращает число измененных отзывов с каждой оценкой
+SET_PUBLISHED_SQL = f'''
+    WITH changed AS (
+        UPDATE {REVIEW_TABLE} SET is_published = %s
+        WHERE is_published <> %s AND id IN ({{ids}})
+        RETURNING rating
+    )
+    SELECT rating, count(*) FROM changed GROUP BY rating
+'''
+
+# Удаляет выбранные отзывы и возвращает число удаленных
+# с каждой оценкой, опубликованных и нет
+DELETE_SQL = f'''
+    WITH deleted AS (
+        DELETE FROM {REVIEW_TABLE} WHERE id IN ({{ids}})
+        RETURNING rating, is_published
+    )
+    SELECT rating, is_published, count(*) FROM deleted
+    GROUP BY rating, is_published
+'''
+
+
+def execute_for_queryset(sql: str, queryset, params=()):
+    """
+    Выполняет sql, подставив в {ids} подзапрос id отзывов
+    queryset. Отзывы в Python не загружаются
+    """
+    ids = queryset.order_by().values('id').query
+    ids_sql, ids_params = ids.sql_with_params()
+    # подзапрос стоит в конце sql, его параметры идут последними
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(ids=ids_sql), (*params, *ids_params))
+        return cursor.fetchall()
+
+
+@transaction.atomic
+def set_published(queryset, is_published: bool) -> int:
+    """
+    Публикует или снимает с публикации отзывы queryset одним
+    UPDATE. Счетчики оценок меняются одним запросом, кэш
+    отзывов сбрасывается один раз после коммита.
+    Сигналы save не отправляются.
+    Вернет число отзывов, у которых изменилась публикация
+    """
+    rows = execute_for_queryset(
+        SET_PUBLISHED_SQL, queryset, (is_published, is_published)
+    )
+    sign = 1 if is_published else -1
+    adjust_rating_counters({rating: sign * count for rating, count in rows})
+    changed = sum(count for rating, count in rows)
+    if changed:
+        invalidate_reviews_cache()
+    return changed
+
+
+@transaction.atomic
+def delete_reviews(queryset) -> int:
+    """
+    Удаляет отзывы queryset одним DELETE, без загрузки отзывов
+    и сигналов delete. Счетчики оценок меняются одним запросом,
+    кэш отзывов сбрасывается один раз после коммита.
+    Вернет число удаленных отзывов
+    """
+    rows = execute_for_queryset(DELETE_SQL, queryset)
+    deltas = {}
+    for rating, is_published, count in rows:
+        if is_published:
+            deltas[rating] = -count
+    adjust_rating_counters(deltas)
+    deleted = sum(count for rating, is_published, count in rows)
+    if deleted:
+        invalidate_reviews_cache()
+    return deleted
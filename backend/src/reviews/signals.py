@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from src.caching import invalidate_responses
+from src.reviews.constants import REVIEWS_CACHE_KEY_PREFIX
+from src.reviews.models import Review
+from src.reviews.stats import (
+    COUNTED_FIELDS,
+    adjust_rating_counters,
+    claim_counted_rating,
+    get_counted_rating
+)
+
+
+def invalidate_reviews_cache():
+    """
+    Сбрасывает кэш списка отзывов после коммита транзакции,
+    чтобы пересчет не прочитал незакоммиченные данные
+    """
+    transaction.on_commit(
+        lambda: invalidate_responses(REVIEWS_CACHE_KEY_PREFIX)
+    )
+
+
+def load_counted_rating(instance):
+    # отзыв загружен без is_published или rating (only, defer)
+    # или создан в коде с существующим pk
+    if not hasattr(instance, 'counted_rating'):
+        saved = Review.objects.filter(pk=instance.pk).first()
+        instance.counted_rating = saved and get_counted_rating(saved)
+
+
+def counted_fields_saved(update_fields):
+    return update_fields is None or \
+        not COUNTED_FIELDS.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(instance=None, update_fields=None, **kwargs):
+    if instance.pk is not None and counted_fields_saved(update_fields):
+        instance.previous_counted_rating = claim_counted_rating(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(instance=None, created=False, update_fields=None,
+                 **kwargs):
+    if not counted_fields_saved(update_fields):
+        invalidate_reviews_cache()
+        return
+    if created:
+        counted = None
+    else:
+        counted = getattr(instance, 'previous_counted_rating', None)
+    rating = get_counted_rating(instance)
+    if rating != counted:
+        adjust_rating_counters({counted: -1, rating: 1})
+    instance.counted_rating = rating
+    # новые отзывы не опубликованы и в список не попадают,
+    # а изменение могло снять отзыв с публикации
+    if instance.is_published or not created:
+        invalidate_reviews_cache()
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(instance=None, **kwargs):
+    # отзывы из queryset.delete() загружены целиком,
+    # их состояние уже записано в from_db
+    load_counted_rating(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(instance=None, **kwargs):
+    if instance.counted_rating is not None:
+        adjust_rating_counters({instance.counted_rating: -1})
+        invalidate_reviews_cache()
@@ -0,0 +1,124 @@
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from src.caching import invalidate_responses
+from src.reviews.constants import RATINGS, REVIEWS_CACHE_KEY_PREFIX
+from src.reviews.models import Review, ReviewRatingCounter
+
+
+ADJUST_COUNTERS_SQL = f'''
+    INSERT INTO {ReviewRatingCounter._meta.db_table} (rating, count)
+    VALUES {{values}}
+    ON CONFLICT (rating) DO UPDATE SET
+        count = {ReviewRatingCounter._meta.db_table}.count + EXCLUDED.count
+'''
+
+
+def get_counted_rating(review: Review):
+    """
+    Оценка, с которой отзыв учтен в счетчиках, или None,
+    если отзыв не опубликован
+    """
+    return review.rating if review.is_published else None
+
+
+# поля отзыва, от которых зависят счетчики
+COUNTED_FIELDS = frozenset(('rating', 'is_published'))
+
+_unknown = object()
+
+
+def claim_counted_rating(review: Review):
+    """
+    Переводит строку сохраняемого отзыва в новое состояние
+    счетчиков (оценка и публикация) условным UPDATE: строка
+    меняется, только если в базе то состояние, с которым отзыв
+    был загружен (Review.from_db). Если отзыв успели изменить,
+    состояние перечитывается и UPDATE повторяется, так что
+    каждый переход учитывается в счетчиках один раз.
+    Запросов нет, если состояние не меняется.
+    Вернет оценку, с которой отзыв был учтен до сохранения
+    """
+    rating = get_counted_rating(review)
+    counted = getattr(review, 'counted_rating', _unknown)
+    while True:
+        if counted is _unknown:
+            saved = Review.objects.filter(pk=review.pk).values_list(
+                'rating', 'is_published'
+            ).first()
+            if saved is None:
+                return None
+            counted = saved[0] if saved[1] else None
+        if counted == rating:
+            return counted
+        if counted is None:
+            condition = Q(is_published=False)
+        else:
+            condition = Q(is_published=True, rating=counted)
+        claimed = Review.objects.filter(condition, pk=review.pk).update(
+            rating=review.rating, is_published=review.is_published
+        )
+        if claimed:
+            return counted
+        counted = _unknown
+
+
+def adjust_rating_counters(deltas: dict):
+    """
+    Прибавляет к счетчикам оценок deltas (оценка -> изменение)
+    одним запросом, недостающие счетчики создаются
+    """
+    deltas = sorted(
+        (rating, delta) for rating, delta in deltas.items()
+        if rating is not None and delta
+    )
+    if not deltas:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ADJUST_COUNTERS_SQL.format(
+                values=', '.join(['(%s, %s)'] * len(deltas))
+            ),
+            [value for pair in deltas for value in pair]
+        )
+
+
+def get_rating_stats():
+    """
+    Число опубликованных отзывов, средняя оценка и число
+    отзывов с каждой оценкой. Читает только счетчики
+    """
+    counts = dict(
+        ReviewRatingCounter.objects.values_list('rating', 'count')
+    )
+    histogram = {str(rating): counts.get(rating, 0) for rating in RATINGS}
+    total = sum(histogram.values())
+    average = None
+    if total:
+        average = round(sum(
+            rating * counts.get(rating, 0) for rating in RATINGS
+        ) / total, 2)
+    return {'count': total, 'average': average, 'histogram': histogram}
+
+
+@transaction.atomic
+def rebuild_rating_counters():
+    """
+    Пересчитывает счетчики по таблице отзывов, например после
+    изменения отзывов в обход модели (queryset.update, bulk_create).
+    Счетчики блокируются, пока идет пересчет
+    """
+    list(ReviewRatingCounter.objects.select_for_update())
+    counts = dict(
+        Review.objects.filter(is_published=True).values_list(
+            'rating'
+        ).annotate(Count('id')).order_by()
+    )
+    for rating in RATINGS:
+        ReviewRatingCounter.objects.update_or_create(
+            rating=rating, defaults={'count': counts.get(rating, 0)}
+        )
+    transaction.on_commit(
+        lambda: invalidate_responses(REVIEWS_CACHE_KEY_PREFIX)
+    )
+    return counts
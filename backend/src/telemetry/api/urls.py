@@ -0,0 +1,5 @@
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/v1/telemetry/', include('src.telemetry.api.v1.urls')),
+]
@@ -0,0 +1,29 @@
+import json
+from rest_framework import parsers, exceptions
+
+
+class NDJSONParser(parsers.BaseParser):
+    """
+    Разбирает тело запроса в формате NDJSON построчно.
+
+    Вместо списка возвращает генератор, поэтому пачка замеров
+    не загружается в память целиком
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self.iter_lines(stream)
+
+    def iter_lines(self, stream):
+        if stream is None:
+            return
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise exceptions.ParseError(
+                    detail={'line': f'Line {number} is not valid JSON: {exc}'}
+                )
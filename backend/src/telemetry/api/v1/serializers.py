@@ -0,0 +1,37 @@
+from datetime import timedelta
+from rest_framework import serializers, exceptions
+
+
+MAX_ROLLUP_PERIOD = timedelta(days=31)
+
+
+class TelemetryRollupSerializer(serializers.Serializer):
+    since = serializers.DateTimeField()
+    until = serializers.DateTimeField()
+    bucket = serializers.ChoiceField(
+        choices=['minute', 'hour', 'day'], default='hour'
+    )
+    miner = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        validated_data = super().validate(attrs)
+        since = attrs.get('since')
+        until = attrs.get('until')
+        if since >= until:
+            raise exceptions.ValidationError(
+                detail={'since': 'The period start must be before its end.'}
+            )
+        if until - since > MAX_ROLLUP_PERIOD:
+            raise exceptions.ValidationError(
+                detail={'until': 'The period cannot be longer than 31 days.'}
+            )
+        return validated_data
+
+
+class TelemetryRollupBucketSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    miner_id = serializers.IntegerField()
+    hashrate = serializers.FloatField()
+    power = serializers.FloatField(allow_null=True)
+    temperature = serializers.FloatField(allow_null=True)
+    samples = serializers.IntegerField()
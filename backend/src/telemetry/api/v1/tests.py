@@ -0,0 +1,131 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from src.tests import CreateUsersTestCase
+from src.application.models import Miner
+from src.telemetry.db_commands import (
+    PARTITION_DAYS_AHEAD,
+    ensure_telemetry_partitions,
+    get_telemetry_partitions,
+    partition_name
+)
+from src.telemetry.models import MinerTelemetry
+
+
+User = get_user_model()
+
+
+class TelemetryTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        User.objects.update(is_staff=True)
+        self.create_token()
+        self.token = self.users.get('user_1').get('token')
+        self.miner = Miner.objects.create(name='miner', hashrate=100)
+        self.now = datetime.now(tz=timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        return result
+
+    def post_samples(self, lines):
+        return self.client.generic(
+            'POST',
+            reverse('telemetry_ingest'),
+            '\n'.join(lines),
+            content_type='application/x-ndjson',
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+
+    def test_ingest_and_rollup(self):
+        """
+        Проверяет загрузку пачки замеров и агрегаты по часам
+        """
+        lines = [
+            json.dumps({
+                'miner': self.miner.id,
+                'ts': (self.now + timedelta(minutes=minute)).timestamp(),
+                'hashrate': 90 + minute % 2 * 20,
+                'temperature': 60 + minute,
+                'power': 3000
+            })
+            for minute in range(60)
+        ]
+        lines.append(json.dumps({
+            'miner': self.miner.id,
+            'ts': (self.now + timedelta(hours=1)).isoformat(),
+            'hashrate': 50
+        }))
+        response = self.post_samples(lines)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json().get('samples'), 61)
+        self.assertEqual(MinerTelemetry.objects.count(), 61)
+
+        response = self.client.get(
+            path=reverse('telemetry_rollup'),
+            data={
+                'since': self.now.isoformat(),
+                'until': (self.now + timedelta(hours=2)).isoformat(),
+                'miner': self.miner.id
+            },
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        first, second = response.json()
+        self.assertEqual(first.get('samples'), 60)
+        self.assertEqual(first.get('hashrate'), 100)
+        self.assertEqual(first.get('temperature'), 119)
+        self.assertEqual(first.get('power'), 3000)
+        self.assertEqual(second.get('samples'), 1)
+        self.assertIsNone(second.get('power'))
+
+    def test_invalid_batch_is_not_saved(self):
+        """
+        Проверяет, что пачка с ошибкой не записывается даже частично
+        """
+        lines = [
+            json.dumps({
+                'miner': self.miner.id,
+                'ts': self.now.timestamp(),
+                'hashrate': 100
+            }),
+            json.dumps({'miner': self.miner.id, 'ts': 'yesterday'}),
+        ]
+        response = self.post_samples(lines)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MinerTelemetry.objects.count(), 0)
+
+        response = self.post_samples(['{"miner": 1,'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_samples_outside_stored_period_are_rejected(self):
+        """
+        Проверяет, что замеры за дни без секций отклоняются
+        и не мешают потом создать секции этих дней
+        """
+        future = self.now + timedelta(days=PARTITION_DAYS_AHEAD + 2)
+        response = self.post_samples([json.dumps({
+            'miner': self.miner.id,
+            'ts': future.timestamp(),
+            'hashrate': 100
+        })])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MinerTelemetry.objects.count(), 0)
+
+        ensure_telemetry_partitions(days_ahead=PARTITION_DAYS_AHEAD + 2)
+        self.assertEqual(
+            set(get_telemetry_partitions()),
+            {
+                partition_name(date.today() + timedelta(days=offset))
+                for offset in range(PARTITION_DAYS_AHEAD + 3)
+            }
+        )
+
+    def test_ingest_requires_staff(self):
+        """
+        Проверяет, что телеметрию принимают только от персонала
+        """
+        User.objects.update(is_staff=False)
+        response = self.post_samples([])
+        self.assertEqual(response.status_code, 403)
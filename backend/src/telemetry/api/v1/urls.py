@@ -0,0 +1,10 @@
+from django.urls import path
+from src.telemetry.api.v1.views import (
+    TelemetryIngestView,
+    TelemetryRollupView
+)
+
+urlpatterns = [
+    path('', TelemetryIngestView.as_view(), name='telemetry_ingest'),
+    path('rollup/', TelemetryRollupView.as_view(), name='telemetry_rollup'),
+]
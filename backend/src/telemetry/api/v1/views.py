@@ -0,0 +1,95 @@
+import os
+from django.db import IntegrityError, transaction
+from dotenv import load_dotenv
+from rest_framework import status, exceptions
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from src.telemetry.api.v1.parsers import NDJSONParser
+from src.telemetry.api.v1.serializers import (
+    TelemetryRollupSerializer,
+    TelemetryRollupBucketSerializer
+)
+from src.telemetry.db_commands import (
+    copy_telemetry,
+    get_ingest_window,
+    get_telemetry_rollup
+)
+
+
+load_dotenv()
+
+TELEMETRY_MAX_BATCH_SAMPLES = int(
+    os.environ.get('TELEMETRY_MAX_BATCH_SAMPLES', 200_000)
+)
+
+
+def limit_batch(samples, limit):
+    for number, sample in enumerate(samples, start=1):
+        if number > limit:
+            raise exceptions.ValidationError(
+                detail={'samples': f'A batch cannot have more than {limit}\
+ samples.'}
+            )
+        yield sample
+
+
+class TelemetryIngestView(APIView):
+    """
+    Загрузка пачки замеров телеметрии майнеров.
+
+    Тело запроса — NDJSON, по одному замеру в строке:
+    {"miner": 1, "ts": 1690000000, "hashrate": 98.5,
+    "temperature": 71, "power": 3250}.
+    Пачка записывается целиком или не записывается совсем.
+    Замеры вне периода хранения (см. get_ingest_window)
+    отклоняются
+    """
+    permission_classes = [IsAdminUser, ]
+    parser_classes = (NDJSONParser,)
+
+    def post(self, request):
+        try:
+            with transaction.atomic():
+                count = copy_telemetry(
+                    samples=limit_batch(
+                        request.data, TELEMETRY_MAX_BATCH_SAMPLES
+                    ),
+                    window=get_ingest_window()
+                )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise exceptions.ValidationError(
+                detail={'samples': f'Invalid sample: {exc!r}'}
+            )
+        except IntegrityError:
+            # секцию за день замера еще не создали или уже удалили
+            raise exceptions.ValidationError(
+                detail={'samples': 'No partition for the sample day.'}
+            )
+        return Response(
+            data={'samples': count},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TelemetryRollupView(APIView):
+    """
+    Агрегаты телеметрии по майнерам за период:
+    средний хешрейт и потребление, максимальная температура
+    """
+    permission_classes = [IsAdminUser, ]
+
+    def get(self, request):
+        serializer = TelemetryRollupSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        rollup = get_telemetry_rollup(
+            since=params.get('since'),
+            until=params.get('until'),
+            bucket=params.get('bucket'),
+            miner_id=params.get('miner')
+        )
+        return Response(
+            data=TelemetryRollupBucketSerializer(rollup, many=True).data,
+            status=status.HTTP_200_OK
+        )
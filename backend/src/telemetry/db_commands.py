@@ -0,0 +1,176 @@
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from io import StringIO
+
+from django.db import connection
+from django.db.models import Avg, Count, Max
+from django.db.models.functions import Trunc
+from django.utils.dateparse import parse_datetime
+from dotenv import load_dotenv
+
+from src.telemetry.models import MinerTelemetry
+
+
+load_dotenv()
+
+TELEMETRY_RETENTION_DAYS = int(os.environ.get('TELEMETRY_RETENTION_DAYS', 30))
+
+# на сколько дней вперед создаются секции
+PARTITION_DAYS_AHEAD = 3
+
+TELEMETRY_TABLE = MinerTelemetry._meta.db_table
+
+# сколько строк отправлять в базу одним COPY
+COPY_CHUNK_SIZE = 10_000
+
+COPY_SQL = f'''
+    COPY {TELEMETRY_TABLE} (miner_id, recorded_at, hashrate, temperature, power)
+    FROM STDIN
+'''
+
+
+def partition_name(day: date):
+    return f'{TELEMETRY_TABLE}_p{day:%Y%m%d}'
+
+
+def ensure_telemetry_partitions(days_ahead: int = PARTITION_DAYS_AHEAD,
+                                start: date = None):
+    """
+    Создает дневные секции телеметрии с сегодняшнего дня
+    на days_ahead дней вперед.
+    Секции DEFAULT у таблицы нет: замер за день без секции
+    не записывается, а не мешает потом создать эту секцию
+    """
+    start = start or date.today()
+    with connection.cursor() as cursor:
+        for offset in range(days_ahead + 1):
+            day = start + timedelta(days=offset)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {partition_name(day)} '
+                f'PARTITION OF {TELEMETRY_TABLE} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [day.isoformat(), (day + timedelta(days=1)).isoformat()]
+            )
+
+
+def get_telemetry_partitions():
+    """
+    Вернет имена секций таблицы телеметрии
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            ''',
+            [TELEMETRY_TABLE]
+        )
+        return [name for name, in cursor.fetchall()]
+
+
+def drop_old_telemetry_partitions(keep_days: int):
+    """
+    Удаляет дневные секции старше keep_days дней.
+    Удаление секции не требует DELETE по строкам
+    """
+    cutoff = partition_name(date.today() - timedelta(days=keep_days))
+    old = [
+        name for name in get_telemetry_partitions()
+        if name.startswith(f'{TELEMETRY_TABLE}_p') and name < cutoff
+    ]
+    with connection.cursor() as cursor:
+        for name in old:
+            cursor.execute(f'DROP TABLE IF EXISTS {name}')
+    return old
+
+
+def _value(value):
+    return '\\N' if value is None else repr(float(value))
+
+
+def get_ingest_window():
+    """
+    Период, на который обслуживание держит секции: от начала дня
+    TELEMETRY_RETENTION_DAYS дней назад до конца последней
+    созданной вперед секции
+    """
+    today = datetime.combine(date.today(), time(), tzinfo=timezone.utc)
+    return (
+        today - timedelta(days=TELEMETRY_RETENTION_DAYS),
+        today + timedelta(days=PARTITION_DAYS_AHEAD + 1)
+    )
+
+
+def _timestamp(value, window=None):
+    if isinstance(value, (int, float)):
+        recorded_at = datetime.fromtimestamp(value, tz=timezone.utc)
+    else:
+        recorded_at = parse_datetime(value)
+        if recorded_at is None:
+            raise ValueError(f'Invalid timestamp {value!r}')
+        if recorded_at.tzinfo is None:
+            recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+    if window and not window[0] <= recorded_at < window[1]:
+        raise ValueError(
+            f'Timestamp {value!r} is outside of the stored period'
+        )
+    return recorded_at.isoformat()
+
+
+def copy_telemetry(samples, window=None):
+    """
+    Записывает замеры (miner, ts, hashrate, temperature, power)
+    через COPY частями по COPY_CHUNK_SIZE строк.
+    Если задан window (начало, конец), замер вне него
+    вызывает ValueError.
+    Вызывается внутри транзакции, вернет число строк
+    """
+    total = 0
+    buffer = StringIO()
+    rows = 0
+    with connection.cursor() as cursor:
+        for sample in samples:
+            recorded_at = _timestamp(sample['ts'], window)
+            buffer.write(
+                f'{int(sample["miner"])}\t{recorded_at}\t'
+                f'{_value(sample["hashrate"])}\t'
+                f'{_value(sample.get("temperature"))}\t'
+                f'{_value(sample.get("power"))}\n'
+            )
+            rows += 1
+            if rows >= COPY_CHUNK_SIZE:
+                total += _copy(cursor, buffer)
+                buffer = StringIO()
+                rows = 0
+        if rows:
+            total += _copy(cursor, buffer)
+    return total
+
+
+def _copy(cursor, buffer):
+    buffer.seek(0)
+    cursor.copy_expert(COPY_SQL, buffer)
+    return cursor.rowcount
+
+
+def get_telemetry_rollup(since: datetime, until: datetime,
+                         bucket: str = 'hour', miner_id: int = None):
+    """
+    Вернет средний хешрейт, потребление и максимальную температуру
+    майнеров по интервалам bucket (minute, hour, day)
+    """
+    queryset = MinerTelemetry.objects.filter(
+        recorded_at__gte=since, recorded_at__lt=until
+    )
+    if miner_id is not None:
+        queryset = queryset.filter(miner_id=miner_id)
+    return queryset.annotate(
+        bucket=Trunc('recorded_at', bucket)
+    ).values('bucket', 'miner_id').annotate(
+        hashrate=Avg('hashrate'),
+        power=Avg('power'),
+        temperature=Max('temperature'),
+        samples=Count('id')
+    ).order_by('bucket', 'miner_id')
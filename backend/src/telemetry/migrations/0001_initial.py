@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-19 09:12
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_partitions(apps, schema_editor):
+    for offset in range(4):
+        day = date.today() + timedelta(days=offset)
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS telemetry_minertelemetry_p{day:%Y%m%d} '
+            f'PARTITION OF telemetry_minertelemetry '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [day.isoformat(), (day + timedelta(days=1)).isoformat()]
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('application', '0012_miner_worker_name_workerhashrate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MinerTelemetry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('recorded_at', models.DateTimeField(verbose_name='Время замера')),
+                ('hashrate', models.FloatField(verbose_name='Хешрейт (в TH)')),
+                ('temperature', models.FloatField(null=True, verbose_name='Температура (°C)')),
+                ('power', models.FloatField(null=True, verbose_name='Потребление (Вт)')),
+                ('miner', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='telemetry', to='application.miner', verbose_name='Майнер')),
+            ],
+            options={
+                'verbose_name': 'телеметрия майнера',
+                'verbose_name_plural': 'Телеметрия майнеров',
+                'db_table': 'telemetry_minertelemetry',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            sql='''
+                CREATE TABLE telemetry_minertelemetry (
+                    id bigint GENERATED BY DEFAULT AS IDENTITY,
+                    miner_id bigint NOT NULL,
+                    recorded_at timestamp with time zone NOT NULL,
+                    hashrate double precision NOT NULL,
+                    temperature double precision NULL,
+                    power double precision NULL
+                ) PARTITION BY RANGE (recorded_at);
+                CREATE INDEX telemetry_minertelemetry_recorded_at_brin
+                    ON telemetry_minertelemetry USING brin (recorded_at);
+            ''',
+            reverse_sql='DROP TABLE telemetry_minertelemetry;'
+        ),
+        migrations.RunPython(create_partitions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+
+from src.application.models import Miner
+
+
+class MinerTelemetry(models.Model):
+    """
+    Замер телеметрии майнера.
+
+    Таблица секционирована по дням (recorded_at) и создается
+    миграцией вручную, поэтому Django ею не управляет
+    """
+    id = models.BigAutoField(primary_key=True)
+    miner = models.ForeignKey(
+        Miner,
+        verbose_name='Майнер',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='telemetry'
+    )
+    recorded_at = models.DateTimeField(verbose_name='Время замера')
+    hashrate = models.FloatField(verbose_name='Хешрейт (в TH)')
+    temperature = models.FloatField(
+        null=True, verbose_name='Температура (°C)'
+    )
+    power = models.FloatField(null=True, verbose_name='Потребление (Вт)')
+
+    class Meta:
+        managed = False
+        db_table = 'telemetry_minertelemetry'
+        verbose_name = 'телеметрия майнера'
+        verbose_name_plural = 'Телеметрия майнеров'
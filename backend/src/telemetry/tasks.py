@@ -0,0 +1,16 @@
+from config.celery import app
+from src.telemetry.db_commands import (
+    TELEMETRY_RETENTION_DAYS,
+    ensure_telemetry_partitions,
+    drop_old_telemetry_partitions
+)
+
+
+@app.task
+def maintain_telemetry_partitions():
+    """
+    Создает секции телеметрии на ближайшие дни
+    и удаляет секции старше срока хранения
+    """
+    ensure_telemetry_partitions()
+    drop_old_telemetry_partitions(keep_days=TELEMETRY_RETENTION_DAYS)
@@ -0,0 +1,514 @@
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from importlib import import_module
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from src.tests import CreateUsersTestCase
+from src.application.models import (
+    Contract,
+    CryptocurrencyToUsdtExchange,
+    Difficulty,
+    MaintenanceCost,
+    Miner,
+    RentalThCost,
+    Reward
+)
+from src.monitoring.profiling import profile_path
+from src.reviews.models import Review
+from src.telemetry.db_commands import copy_telemetry
+from src.users.models import NewEmail
+
+
+User = get_user_model()
+
+SRC_DIR = Path(__file__).resolve().parent
+
+QUERY_BUDGETS_PATH = SRC_DIR / 'query_budgets.json'
+
+# QUERY_BUDGETS_UPDATE=1 перезаписывает лимиты запросов замеренными
+QUERY_BUDGETS_UPDATE = os.environ.get('QUERY_BUDGETS_UPDATE') == '1'
+
+# файл для отчета о расхождениях с лимитами в JSON, '-' — вывод в stderr
+QUERY_BUDGETS_REPORT = os.environ.get('QUERY_BUDGETS_REPORT')
+
+# QUERY_BUDGETS_CHECK_TIME=1 проверяет и лимиты времени; время зависит
+# от машины, поэтому по умолчанию оно только попадает в отчет
+QUERY_BUDGETS_CHECK_TIME = os.environ.get('QUERY_BUDGETS_CHECK_TIME') == '1'
+
+DEFAULT_TIME_BUDGET_MS = 250
+
+STRONG_PASSWORD = 'Budget-Pa55word!'
+
+
+def get_api_url_names():
+    """
+    Имена всех url из src/*/api/v1/urls.py
+    """
+    names = []
+    for path in sorted(SRC_DIR.glob('*/api/v1/urls.py')):
+        module = import_module(
+            '.'.join(('src',) + path.relative_to(SRC_DIR).with_suffix('').parts)
+        )
+        names.extend(pattern.name for pattern in module.urlpatterns)
+    return names
+
+
+def load_query_budgets():
+    with open(QUERY_BUDGETS_PATH) as budgets_file:
+        return json.load(budgets_file)
+
+
+class QueryBudgetTestCase(CreateUsersTestCase):
+    """
+    Вызывает каждый эндпоинт API на заполненной базе и сравнивает
+    число запросов к базе с лимитами из query_budgets.json.
+    Время ответа сравнивается с лимитом только
+    с QUERY_BUDGETS_CHECK_TIME=1
+
+    У каждого url должен быть сценарий request_<имя url> и лимит.
+    Замер делается на втором вызове, после прогрева, и каждый вызов
+    откатывается, поэтому сценарии не влияют друг на друга
+    """
+
+    def setUp(self):
+        result = super().setUp()
+        self.create_token()
+        self.user = User.objects.get(username=self.users['user_1']['username'])
+        self.user.is_staff = True
+        self.user.save()
+        self.auth_data = {
+            'Authorization': f'Bearer {self.users["user_1"]["token"]}'
+        }
+        self.unconfirmed = User.objects.create(
+            username='unconfirmed',
+            email='unconfirmed@example.com',
+            is_confirm=False
+        )
+        self.unpaid_customer = User.objects.get(
+            username=self.users['user_2']['username']
+        )
+
+        Difficulty.objects.create(difficulty=50 * 10 ** 12)
+        Reward.objects.create(reward_block=6.25)
+        MaintenanceCost.objects.create(cost=0.05)
+        RentalThCost.objects.create(cost=0)
+        CryptocurrencyToUsdtExchange.objects.create(id='btc', usdt=30_000)
+
+        today = date.today()
+        Contract.objects.bulk_create([
+            Contract(
+                customer=self.user,
+                hashrate=10,
+                contract_start=today - timedelta(days=index),
+                contract_end=today + timedelta(days=30),
+                is_paid=True,
+                status=Contract.Status.ACTIVE
+            )
+            for index in range(25)
+        ])
+        self.contract = Contract.objects.filter(customer=self.user).first()
+        Contract.objects.create(
+            customer=self.unpaid_customer,
+            hashrate=10,
+            contract_start=today + timedelta(days=1),
+            contract_end=today + timedelta(days=30)
+        )
+        self.reviews = Review.objects.bulk_create([
+            Review(
+                first_name=f'first_{index}',
+                last_name='last',
+                phone_number='80000000000',
+                text='text',
+                rating=5,
+                is_published=True
+            )
+            for index in range(10)
+        ])
+
+        NewEmail.objects.create(
+            user_uuid=self.user, email='changed@example.com'
+        )
+
+        self.miner = Miner.objects.create(name='miner', hashrate=100)
+        self.now = datetime.now(tz=timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        copy_telemetry(
+            {
+                'miner': self.miner.id,
+                'ts': (self.now + timedelta(minutes=minute)).timestamp(),
+                'hashrate': 100
+            }
+            for minute in range(60)
+        )
+        return result
+
+    # сценарии вызова эндпоинтов, по одному на имя url
+
+    def request_token_refresh(self):
+        return self.client.post(
+            path=reverse('token_refresh'),
+            data={'refresh': str(RefreshToken.for_user(self.user))}
+        )
+
+    def request_register(self):
+        return self.client.post(
+            path=reverse('register'),
+            data={
+                'username': 'new_user',
+                'email': 'new_user@example.com',
+                'password': STRONG_PASSWORD,
+                'password_confirm': STRONG_PASSWORD
+            }
+        )
+
+    def request_activation(self):
+        token = RefreshToken.for_user(self.unconfirmed).access_token
+        return self.client.get(
+            path=reverse('activation', kwargs={'token': str(token)})
+        )
+
+    def request_resend_activation(self):
+        return self.client.get(path=reverse(
+            'resend_activation', kwargs={'email': self.unconfirmed.email}
+        ))
+
+    def request_login(self):
+        return self.client.post(
+            path=reverse('login'),
+            data={
+                'username': self.users['user_3']['username'],
+                'password': self.users['user_3']['password']
+            }
+        )
+
+    def request_confirm_for_reset_password(self):
+        return self.client.put(
+            path=reverse(
+                'confirm_for_reset_password',
+                kwargs={
+                    'uidb64': urlsafe_base64_encode(force_bytes(self.user.uuid)),
+                    'token': PasswordResetTokenGenerator().make_token(self.user)
+                }
+            ),
+            data={
+                'password': STRONG_PASSWORD,
+                'password_confirm': STRONG_PASSWORD
+            },
+            content_type='application/json'
+        )
+
+    def request_send_email_for_reset(self):
+        return self.client.post(
+            path=reverse('send_email_for_reset'),
+            data={'email': self.user.email}
+        )
+
+    def request_change_first_name(self):
+        return self.client.put(
+            path=reverse('change_first_name'),
+            data={'first_name': 'First'},
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_change_last_name(self):
+        return self.client.put(
+            path=reverse('change_last_name'),
+            data={'last_name': 'Last'},
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_change_phone_number(self):
+        return self.client.put(
+            path=reverse('change_phone_number'),
+            data={'phone_number': '89000000000'},
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_change_password(self):
+        return self.client.put(
+            path=reverse('change_password'),
+            data={
+                'current_password': self.users['user_1']['password'],
+                'new_password': STRONG_PASSWORD,
+                'new_password_confirm': STRONG_PASSWORD
+            },
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_change_email(self):
+        return self.client.post(
+            path=reverse('change_email'),
+            data={'email': 'changed@example.com'},
+            headers=self.auth_data
+        )
+
+    def request_confirm_for_change_email(self):
+        return self.client.put(
+            path=reverse(
+                'confirm_for_change_email',
+                kwargs={
+                    'uidb64': urlsafe_base64_encode(force_bytes(self.user.uuid)),
+                    'token': PasswordResetTokenGenerator().make_token(self.user)
+                }
+            ),
+            headers=self.auth_data
+        )
+
+    def request_change_username(self):
+        return self.client.put(
+            path=reverse('change_username'),
+            data={'username': 'changed_username'},
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_user(self):
+        return self.client.get(path=reverse('user'), headers=self.auth_data)
+
+    def request_review_add(self):
+        return self.client.post(
+            path=reverse('review-add'),
+            data={
+                'first_name': 'First',
+                'last_name': 'Last',
+                'phone_number': '89000000001',
+                'text': 'text',
+                'rating': 5
+            },
+            headers=self.auth_data
+        )
+
+    def request_reviews(self):
+        return self.client.get(path=reverse('reviews'))
+
+    def request_review_stats(self):
+        return self.client.get(path=reverse('review-stats'))
+
+    def request_review_moderation(self):
+        return self.client.post(
+            path=reverse('review-moderation'),
+            data={
+                'action': 'unpublish',
+                'ids': [review.id for review in self.reviews]
+            },
+            content_type='application/json',
+            headers=self.auth_data
+        )
+
+    def request_create_contract(self):
+        return self.client.post(
+            path=reverse('create_contract'),
+            data={
+                'hashrate': 10,
+                'contract_start': date.today() + timedelta(days=1),
+                'contract_end': date.today() + timedelta(days=31)
+            },
+            headers=self.auth_data
+        )
+
+    def request_get_price(self):
+        return self.client.get(path=reverse(
+            'get_price',
+            kwargs={
+                'hashrate': '10',
+                'contract_start': date.today().isoformat(),
+                'contract_end': (date.today() + timedelta(days=30)).isoformat()
+            }
+        ))
+
+    def request_check_payment(self):
+        return self.client.post(
+            path=reverse('check_payment'),
+            data={
+                'user_id': str(self.unpaid_customer.uuid),
+                'count': 0,
+                'crypto_type': 'usdt'
+            }
+        )
+
+    def request_export_contracts(self):
+        return self.client.get(
+            path=reverse('export_contracts'),
+            data={'export_format': 'csv'},
+            headers=self.auth_data
+        )
+
+    def request_get_incomes(self):
+        return self.client.get(
+            path=reverse('get_incomes', kwargs={'pk': self.contract.pk}),
+            headers=self.auth_data
+        )
+
+    def request_all_contracts(self):
+        return self.client.get(
+            path=reverse('all_contracts'), headers=self.auth_data
+        )
+
+    def request_telemetry_ingest(self):
+        lines = [
+            json.dumps({
+                'miner': self.miner.id,
+                'ts': (self.now + timedelta(minutes=minute)).timestamp(),
+                'hashrate': 100
+            })
+            for minute in range(60)
+        ]
+        return self.client.generic(
+            'POST',
+            reverse('telemetry_ingest'),
+            '\n'.join(lines),
+            content_type='application/x-ndjson',
+            headers=self.auth_data
+        )
+
+    def request_telemetry_rollup(self):
+        return self.client.get(
+            path=reverse('telemetry_rollup'),
+            data={
+                'since': self.now.isoformat(),
+                'until': (self.now + timedelta(hours=1)).isoformat()
+            },
+            headers=self.auth_data
+        )
+
+    def request_view_timings(self):
+        return self.client.get(
+            path=reverse('view_timings'), headers=self.auth_data
+        )
+
+    def request_profiling_token(self):
+        return self.client.post(
+            path=reverse('profiling_token'), headers=self.auth_data
+        )
+
+    def request_profile_download(self):
+        path = profile_path('budget', 'folded')
+        path.write_text('main 1\n')
+        self.addCleanup(path.unlink)
+        return self.client.get(
+            path=reverse('profile_download', kwargs={'name': path.name}),
+            headers=self.auth_data
+        )
+
+    def call(self, name):
+        """
+        Вызывает сценарий в транзакции, которая затем откатывается.
+        Вернет код ответа, число запросов и время в мс
+        """
+        # лимиты запросов к эндпоинтам не должны влиять на замер
+        cache.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(self, f'request_{name.replace("-", "_")}')()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        return response.status_code, len(queries), elapsed
+
+    def measure(self, name):
+        # первый вызов прогревает кэши шаблонов, сайтов и т.п.
+        self.call(name)
+        return self.call(name)
+
+    def test_every_endpoint_has_budget(self):
+        """
+        Проверяет, что у каждого эндпоинта есть сценарий запроса
+        и лимит в query_budgets.json
+        """
+        budgets = load_query_budgets()
+        for name in get_api_url_names():
+            with self.subTest(url=name):
+                self.assertTrue(
+                    hasattr(self, f'request_{name.replace("-", "_")}'),
+                    f'No request scenario for {name}'
+                )
+                if not QUERY_BUDGETS_UPDATE:
+                    self.assertIn(name, budgets)
+
+    def test_query_budgets(self):
+        """
+        Проверяет, что ни один эндпоинт не выходит за лимит запросов
+        (и времени, если задан QUERY_BUDGETS_CHECK_TIME)
+        """
+        budgets = load_query_budgets()
+        report = {}
+        for name in get_api_url_names():
+            status_code, queries, elapsed = self.measure(name)
+            self.assertLess(
+                status_code, 400, f'{name} responded with {status_code}'
+            )
+            budget = budgets.get(name, {})
+            report[name] = {
+                'queries': queries,
+                'queries_budget': budget.get('queries'),
+                'time_ms': round(elapsed, 1),
+                'time_ms_budget': budget.get(
+                    'time_ms', DEFAULT_TIME_BUDGET_MS
+                )
+            }
+        table = self.format_report(report)
+        if QUERY_BUDGETS_REPORT == '-' or QUERY_BUDGETS_UPDATE:
+            sys.stderr.write(table + '\n')
+        elif QUERY_BUDGETS_REPORT:
+            with open(QUERY_BUDGETS_REPORT, 'w') as report_file:
+                json.dump(report, report_file, indent=4, sort_keys=True)
+
+        if QUERY_BUDGETS_UPDATE:
+            with open(QUERY_BUDGETS_PATH, 'w') as budgets_file:
+                json.dump({
+                    name: {
+                        'queries': row['queries'],
+                        'time_ms': row['time_ms_budget']
+                    }
+                    for name, row in report.items()
+                }, budgets_file, indent=4, sort_keys=True)
+                budgets_file.write('\n')
+            return
+
+        exceeded = [
+            f'{name}: {row["queries"]} queries '
+            f'(budget {row["queries_budget"]}), '
+            f'{row["time_ms"]} ms (budget {row["time_ms_budget"]} ms)'
+            for name, row in report.items()
+            if row['queries_budget'] is None
+            or row['queries'] > row['queries_budget']
+            or (
+                QUERY_BUDGETS_CHECK_TIME
+                and row['time_ms'] > row['time_ms_budget']
+            )
+        ]
+        self.assertFalse(
+            exceeded,
+            'Endpoints over budget:\n' + '\n'.join(exceeded) + '\n' + table
+        )
+
+    def format_report(self, report):
+        lines = ['', 'Query budgets (measured / budget, delta):']
+        for name, row in sorted(report.items()):
+            budget = row['queries_budget']
+            delta = '' if budget is None else f'{row["queries"] - budget:+d}'
+            lines.append(
+                f'  {name:<28} {row["queries"]:>3} / {budget} {delta:>4}'
+                f'  {row["time_ms"]:>7.1f} / {row["time_ms_budget"]} ms'
+            )
+        return '\n'.join(lines)
@@ -1,6 +1,12 @@
+import copy
+
 from faker import Faker
+from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.runner import DiscoverRunner
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from src.reviews.models import Review
@@ -12,9 +18,55 @@ User = get_user_model()
 fake = Faker()
 
 
+def explain_without_seqscan(queryset):
+    """
+    План запроса, в котором планировщику запрещено последовательное
+    чтение таблиц. На маленьких тестовых таблицах иначе он всегда
+    выбирает seq scan, а так видно, есть ли подходящий индекс
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+        try:
+            return queryset.explain()
+        finally:
+            cursor.execute('RESET enable_seqscan')
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Тесты пишут в кэш под своим префиксом ключей, который
+    очищается до и после прогона: лимиты запросов прошлых
+    прогонов не влияют на тесты, а тесты — на кэш приложения.
+
+    Тесты входят под несколькими пользователями с одного адреса,
+    поэтому лимит входа в них выше, чем в боевых настройках
+    """
+    login_rate = '1000/minute'
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        caches = copy.deepcopy(settings.CACHES)
+        for params in caches.values():
+            params['KEY_PREFIX'] = f'{params.get("KEY_PREFIX", "")}_test'
+        rest_framework = copy.deepcopy(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES']['login'] = self.login_rate
+        self.cache_settings = override_settings(
+            CACHES=caches, REST_FRAMEWORK=rest_framework
+        )
+        self.cache_settings.enable()
+        cache.clear()
+
+    def teardown_test_environment(self, **kwargs):
+        cache.clear()
+        self.cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
 class CreateUsersTestCase(TestCase):
 
     def setUp(self):
+        # лимиты запросов не переходят из теста в тест
+        cache.clear()
         self.users = {}
         for index in range(1, 5):
             profile = fake.simple_profile()
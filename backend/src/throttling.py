@@ -0,0 +1,160 @@
+import logging
+import math
+
+from django.core.cache import cache
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+
+# Корзина токенов в хеше {tokens, ts}. Время берется у Redis,
+# чтобы часы разных хостов не влияли на пополнение.
+# ARGV: емкость корзины, скорость пополнения в токенах за мс.
+# Вернет: разрешен ли запрос, сколько токенов осталось,
+# через сколько мс корзина наполнится и через сколько
+# мс появится следующий токен
+TOKEN_BUCKET_SCRIPT = '''
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) / rate)
+end
+local full = math.ceil((capacity - tokens) / rate)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.max(full, 1))
+return {allowed, math.floor(tokens), full, wait}
+'''
+
+_script = None
+
+
+def take_token(client, key: str, capacity: int, duration: int):
+    """
+    Берет токен из корзины key емкостью capacity, которая
+    полностью пополняется за duration секунд.
+    Один вызов EVALSHA, то есть один запрос к Redis
+    """
+    global _script
+    if _script is None:
+        _script = client.register_script(TOKEN_BUCKET_SCRIPT)
+    allowed, remaining, full_ms, wait_ms = _script(
+        keys=[key], args=[capacity, capacity / (duration * 1000)],
+        client=client
+    )
+    return bool(allowed), remaining, full_ms / 1000, wait_ms / 1000
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Лимит запросов корзиной токенов в Redis. Корзина своя
+    у каждой пары scope + пользователь (или IP для анонимов).
+    Скорость из DEFAULT_THROTTLE_RATES по throttle_scope view:
+    '10/minute' — до 10 запросов подряд, затем по одному
+    каждые 6 секунд.
+
+    Если кэш не в Redis или Redis недоступен, запросы
+    пропускаются: лимит не должен останавливать API
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # скорость зависит от view, она читается в allow_request
+        pass
+
+    @property
+    def THROTTLE_RATES(self):
+        # читаются при каждой проверке, а не при импорте
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        self.state = None
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        get_client = getattr(cache, 'get_client', None)
+        if get_client is None:
+            return True
+        key = cache.make_key(self.get_cache_key(request, view))
+        try:
+            allowed, remaining, reset, wait = take_token(
+                get_client(), key, self.num_requests, self.duration
+            )
+        except RedisError:
+            logger.warning('Rate limit for %s is not checked', self.scope)
+            return True
+        self.state = {
+            'limit': self.num_requests,
+            'remaining': remaining,
+            'reset': reset,
+            'wait': wait,
+        }
+        return allowed
+
+    def wait(self):
+        return self.state['wait'] if self.state else None
+
+    def get_headers(self):
+        """
+        Заголовки RateLimit-* последней проверки
+        """
+        if not self.state:
+            return {}
+        return {
+            'RateLimit-Limit': str(self.state['limit']),
+            'RateLimit-Remaining': str(self.state['remaining']),
+            'RateLimit-Reset': str(math.ceil(self.state['reset'])),
+            'RateLimit-Policy': (
+                f'{self.state["limit"]};w={self.duration}'
+            ),
+        }
+
+
+class RateLimitMixin:
+    """
+    Подключает к view TokenBucketThrottle со scope throttle_scope
+    и добавляет к ответам заголовки RateLimit-*, в том числе
+    к ответу 429
+    """
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = None
+
+    def get_throttles(self):
+        self._throttles = super().get_throttles()
+        return self._throttles
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        for throttle in getattr(self, '_throttles', ()):
+            if isinstance(throttle, TokenBucketThrottle):
+                for header, value in throttle.get_headers().items():
+                    response[header] = value
+        return response
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from src.pagination import EstimatedCountPaginator
 
 
 User = get_user_model()
@@ -14,3 +15,5 @@ class UserAdmin(admin.ModelAdmin):
         'email',
         'phone_number'
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
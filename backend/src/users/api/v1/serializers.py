@@ -96,6 +96,7 @@ class UserTokenSerializer(serializers.Serializer):
                 {'link': 'An activation link has expired.'}
             )
         validated_data['uuid'] = user.uuid
+        validated_data['user'] = user
         return validated_data
 
 
@@ -122,6 +123,7 @@ class ResendActivationAccountEmailSerializer(serializers.ModelSerializer):
             raise exceptions.NotFound(
                 detail={'user': 'An user is already confirm.'}
             )
+        validated_data['user'] = user
         return validated_data
 
 
@@ -174,7 +176,7 @@ class SendResetPasswordEmailSerializer(serializers.ModelSerializer):
         validated_data = super().validate(attrs)
         email = attrs.get('email', '')
         try:
-            self.Meta.model.objects.get(email=email)
+            validated_data['user'] = self.Meta.model.objects.get(email=email)
         except self.Meta.model.DoesNotExist:
             raise exceptions.NotFound(
                 detail={'email': 'An email does not exist.'}
@@ -395,7 +397,8 @@ class UserTokenUIDSerializer(serializers.ModelSerializer):
                 detail={'token': 'A token is not valid.'}
             )
         return {
-            'uuid': uid
+            'uuid': uid,
+            'user': user
         }
 
 
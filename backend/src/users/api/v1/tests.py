@@ -1,9 +1,12 @@
+import copy
+
 from faker import Faker
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.urls import reverse
 from rest_framework.response import Response
-from src.tests import CreateUsersTestCase
+from src.tests import CreateUsersTestCase, explain_without_seqscan
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode
@@ -999,3 +1002,79 @@ class UserTestCase(CreateUsersTestCase):
         user_data = response.json().get('data')
         self.assertEqual(user_data.get('email'), old_email)
         self.assertNotEqual(user_data.get('email'), new_email)
+
+
+class UserIndexesTestCase(CreateUsersTestCase):
+
+    def test_hot_lookups_use_indexes(self):
+        """
+        Проверяет, что проверка номера телефона и поиск
+        нового email пользователя идут по индексам
+        """
+        user = User.objects.first()
+        plan = explain_without_seqscan(
+            User.objects.filter(phone_number='89000000000')
+        )
+        self.assertIn('user_phone_number_idx', plan)
+
+        plan = explain_without_seqscan(
+            NewEmail.objects.filter(user_uuid_id=user.uuid)
+        )
+        self.assertIn('Index', plan)
+        self.assertIn('user_uuid', plan)
+
+
+class RateLimitTestCase(CreateUsersTestCase):
+
+    def setUp(self):
+        result = super().setUp()
+        # за время теста корзина не успевает пополниться
+        rest_framework = copy.deepcopy(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES']['login'] = '30/day'
+        rate_settings = self.settings(REST_FRAMEWORK=rest_framework)
+        rate_settings.enable()
+        self.addCleanup(rate_settings.disable)
+        return result
+
+    def test_login_token_bucket(self):
+        """
+        Проверяет, что на вход есть 30 попыток подряд с одного IP,
+        а остаток корзины виден в заголовках RateLimit-*
+        """
+        data = {'username': 'unknown', 'password': 'wrong'}
+        for remaining in range(29, -1, -1):
+            response = self.client.post(path=reverse('login'), data=data)
+            self.assertNotEqual(
+                response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            self.assertEqual(response['RateLimit-Remaining'], str(remaining))
+        self.assertEqual(response['RateLimit-Limit'], '30')
+        self.assertEqual(response['RateLimit-Policy'], '30;w=86400')
+        self.assertLessEqual(int(response['RateLimit-Reset']), 86400)
+
+        response = self.client.post(path=reverse('login'), data=data)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertIn('Retry-After', response)
+        self.assertEqual(response['RateLimit-Remaining'], '0')
+
+        response = self.client.post(
+            path=reverse('login'), data=data, REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response['RateLimit-Remaining'], '29')
+
+    def test_scopes_are_separate(self):
+        """
+        Проверяет, что исчерпанный лимит входа
+        не влияет на лимиты других эндпоинтов
+        """
+        for _ in range(10):
+            self.client.post(path=reverse('login'), data={})
+        response = self.client.get(path=reverse('get_price', kwargs={
+            'hashrate': '100',
+            'contract_start': '2030-01-01',
+            'contract_end': '2030-04-01'
+        }))
+        self.assertEqual(response['RateLimit-Limit'], '120')
+        self.assertEqual(response['RateLimit-Remaining'], '119')
@@ -1,12 +1,12 @@
 import os
 import requests
 from dotenv import load_dotenv
-from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import AnonRateThrottle
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import generics, status
+from src.throttling import RateLimitMixin
 from src.users.api.v1.serializers import (
     UserRegisterSerializer,
     UserTokenSerializer,
@@ -38,8 +38,6 @@ load_dotenv()
 
 BASE_URL = os.environ.get("BASE_URL")
 
-User = get_user_model()
-
 
 class GetUserDataView(APIView):
     """
@@ -63,7 +61,7 @@ class GetUserDataView(APIView):
         )
 
 
-class UserRegistrationView(generics.GenericAPIView):
+class UserRegistrationView(RateLimitMixin, generics.GenericAPIView):
     """
     Регистрация пользователя.
 
@@ -76,14 +74,14 @@ class UserRegistrationView(generics.GenericAPIView):
 
     serializer_class = UserRegisterSerializer
     renderer_classes = (UserDataRender,)
+    throttle_scope = 'register'
 
     def post(self, request):
         user = request.data
         serializer = self.serializer_class(data=user)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        user = serializer.save()
         user_data = serializer.data
-        user = User.objects.get(email=user_data.get('email'))
         data = get_data_for_activation_account_email(
             user=user,
             request=request
@@ -107,7 +105,7 @@ class ResendActivationAccountEmailView(generics.GenericAPIView):
     def get(self, request, email):
         serializer = self.serializer_class(data={'email': email})
         serializer.is_valid(raise_exception=True)
-        user = User.objects.get(email=serializer.data.get('email'))
+        user = serializer.validated_data.get('user')
         data = get_data_for_activation_account_email(
             user=user,
             request=request
@@ -128,13 +126,13 @@ class UserActivationAccountView(APIView):
     def get(self, request, token):
         serializer = self.serializer_class(data={'token': token})
         serializer.is_valid(raise_exception=True)
-        user = User.objects.get(pk=serializer.data.get('uuid'))
+        user = serializer.validated_data.get('user')
         user.is_confirm = True
-        user.save()
+        user.save(update_fields=['is_confirm'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UserLoginView(generics.GenericAPIView):
+class UserLoginView(RateLimitMixin, generics.GenericAPIView):
     """
     Авторизация пользователя в системе.
 
@@ -142,6 +140,7 @@ class UserLoginView(generics.GenericAPIView):
     """
     serializer_class = LoginUserSerializer
     renderer_classes = (UserDataRender,)
+    throttle_scope = 'login'
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -166,7 +165,7 @@ class ResetPasswordView(generics.GenericAPIView):
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = User.objects.get(email=serializer.data.get('email'))
+        user = serializer.validated_data.get('user')
         data = get_data_for_reset_password_email(
             user=user,
             request=request
@@ -195,8 +194,7 @@ class CheckTokenForResetPasswordView(generics.GenericAPIView):
             }
         )
         uuid_token_serializer.is_valid(raise_exception=True)
-        uuid = uuid_token_serializer.data.get('uuid')
-        user = User.objects.get(uuid=uuid)
+        user = uuid_token_serializer.validated_data.get('user')
         serializer = self.serializer_class(data=request.data, instance=user)
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -328,7 +326,7 @@ class CheckTokenForChangeUserEmailView(generics.GenericAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         if str(request.user.uuid) == uuid:
-            user = User.objects.get(uuid=uuid)
+            user = request.user
             user.email = new_email.first().email
             user.save()
             new_email.delete()
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 04:48
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # индекс строится CONCURRENTLY, без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('users', '0009_alter_user_phone_number'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(fields=['phone_number'], name='user_phone_number_idx'),
+        ),
+    ]
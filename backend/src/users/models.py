@@ -55,6 +55,14 @@ class User(AbstractUser):
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(
+                fields=['phone_number'],
+                name='user_phone_number_idx'
+            ),
+        ]
+
     def tokens(self):
         refresh_token = RefreshToken.for_user(self)
         return {
@@ -1,8 +1,9 @@
 import os
-import requests
 from dotenv import load_dotenv
 from django.contrib.auth import get_user_model
 from config.celery import app
+from src.monitoring.metrics import upstream_request
+from src.monitoring.tracing import start_span
 from .utils import send_email
 
 
@@ -13,6 +14,10 @@ User = get_user_model()
 
 BASE_URL = os.environ.get("BASE_URL")
 
+UPSTREAM_REQUEST_TIMEOUT = float(
+    os.environ.get('UPSTREAM_REQUEST_TIMEOUT', 10)
+)
+
 
 @app.task(bind=True, default_retry_delay=5 * 60)
 def send_email_for_user(self, data):
@@ -24,9 +29,10 @@ def send_email_for_user(self, data):
     произойдет через 1 минуту
     """
     try:
-        send_email(
-            data=data
-        )
+        with start_span('send email', 'client'):
+            send_email(
+                data=data
+            )
     except Exception as exc:
         raise self.retry(exc=exc, countdown=60)
 
@@ -45,9 +51,12 @@ def create_user_wallet(self, access_token):
             'Authorization': f'Bearer {access_token}'
         }
     try:
-        requests.post(
+        upstream_request(
+            'wallet',
+            'post',
             url=BASE_URL + '/api/v1/users/create',
-            headers=auth_data
+            headers=auth_data,
+            timeout=UPSTREAM_REQUEST_TIMEOUT
         )
     except Exception as exc:
         raise self.retry(exc=exc, countdown=60)